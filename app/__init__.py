@@ -39,8 +39,8 @@ def create_app(config_name: str = None) -> Flask:
 
     @login_manager.user_loader
     def load_user(user_id):
-        from .models import User
-        return User.query.get(int(user_id))
+        from .services.user_cache import cargar_usuario
+        return cargar_usuario(int(user_id))
 
     # ── Registrar blueprints ───────────────────────────────────────
     from .routes import auth_bp, public_bp, supervisor_bp, admin_bp
@@ -49,6 +49,24 @@ def create_app(config_name: str = None) -> Flask:
     app.register_blueprint(supervisor_bp)
     app.register_blueprint(admin_bp)
 
+    # ── Instrumentación (opcional) ─────────────────────────────────
+    from .services.metrics import init_metrics
+    init_metrics(app)
+
+    # ── Caché de disponibilidad ────────────────────────────────────
+    from .services.availability_cache import init_cache
+    from .services.slot_index import init_indice
+    init_cache(app)
+    init_indice(app)
+
+    # ── Hash ficticio para logins con email inexistente ────────────
+    from .services.password_service import init_passwords
+    init_passwords(app)
+
+    # ── Plantillas de correo precompiladas ─────────────────────────
+    from .services.email_service import precargar_plantillas
+    precargar_plantillas(app)
+
     # ── Inicializar scheduler ──────────────────────────────────────
     from .services.scheduler import init_scheduler
     with app.app_context():
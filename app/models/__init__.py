@@ -1,6 +1,26 @@
 from .user import User
 from .challenge import Challenge
 from .disponibilidad import Disponibilidad
+from .disponibilidad_dia import DisponibilidadDia
+from .regla_disponibilidad import ReglaDisponibilidad, ExcepcionDisponibilidad
 from .evaluacion import Evaluacion
+from .email_outbox import EmailOutbox
+from .estadistica import EstadisticaEvaluacion
+from .job_run import JobRun
+from .scheduler_lease import SchedulerLease
+from .version_disponibilidad import VersionDisponibilidad
 
-__all__ = ["User", "Challenge", "Disponibilidad", "Evaluacion"]
+__all__ = [
+    "User",
+    "Challenge",
+    "Disponibilidad",
+    "DisponibilidadDia",
+    "ReglaDisponibilidad",
+    "ExcepcionDisponibilidad",
+    "Evaluacion",
+    "EmailOutbox",
+    "EstadisticaEvaluacion",
+    "JobRun",
+    "SchedulerLease",
+    "VersionDisponibilidad",
+]
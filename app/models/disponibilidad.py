@@ -3,6 +3,7 @@ app/models/disponibilidad.py
 Bloques de disponibilidad horaria por supervisor.
 """
 from .. import db
+from .tipos import HoraHHMM
 
 
 class Disponibilidad(db.Model):
@@ -11,8 +12,11 @@ class Disponibilidad(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     supervisor_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     fecha = db.Column(db.Date, nullable=False)
-    hora = db.Column(db.String(5), nullable=False)   # "HH:MM"
+    hora = db.Column(HoraHHMM, nullable=False)       # TIME, "HH:MM" en Python
+    duracion_min = db.Column(db.Integer, nullable=False, default=60, server_default="60")
     disponible = db.Column(db.Boolean, default=True, nullable=False)
+    # Materializado desde una regla semanal al reservarse: al liberarse se borra
+    origen_regla = db.Column(db.Boolean, default=False, nullable=False, server_default=db.false())
 
     __table_args__ = (
         db.UniqueConstraint("supervisor_id", "fecha", "hora", name="uq_supervisor_fecha_hora"),
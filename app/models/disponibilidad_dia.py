@@ -0,0 +1,25 @@
+"""
+app/models/disponibilidad_dia.py
+Disponibilidad compacta: una fila por (supervisor, fecha) con bitmasks
+de slots horarios (bit h = slot "HH:00").
+"""
+from .. import db
+
+
+class DisponibilidadDia(db.Model):
+    __tablename__ = "disponibilidad_dias"
+
+    id = db.Column(db.Integer, primary_key=True)
+    supervisor_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    ofrecidos = db.Column(db.Integer, nullable=False, default=0)   # slots publicados
+    libres = db.Column(db.Integer, nullable=False, default=0)      # subconjunto no bloqueado
+    # Subconjunto de `ofrecidos` materializado desde reglas al reservarse
+    de_reglas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        db.UniqueConstraint("supervisor_id", "fecha", name="uq_supervisor_fecha_dia"),
+    )
+
+    def __repr__(self):
+        return f"<DisponibilidadDia sup={self.supervisor_id} {self.fecha} {self.libres:024b}>"
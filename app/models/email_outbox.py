@@ -0,0 +1,48 @@
+"""
+app/models/email_outbox.py
+Cola persistente de correos salientes.
+"""
+from datetime import datetime, timezone
+from .. import db
+
+
+ESTADOS_OUTBOX = ("PENDIENTE", "ENVIADO", "FALLIDO")
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinatarios = db.Column(db.Text, nullable=False)   # separados por coma
+    asunto = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+
+    # Origen: evaluación y plantilla (permite actuar al confirmarse la entrega)
+    evaluacion_id = db.Column(
+        db.Integer, db.ForeignKey("evaluaciones.id", ondelete="SET NULL"), nullable=True
+    )
+    tipo = db.Column(db.String(40), nullable=True)
+
+    # Estado y reintentos
+    estado = db.Column(db.String(20), nullable=False, default="PENDIENTE")
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    siguiente_intento_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    ultimo_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    enviado_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_outbox_estado_siguiente", "estado", "siguiente_intento_at"),
+        db.Index("ix_outbox_evaluacion_tipo", "evaluacion_id", "tipo"),
+        # Tasa de envío (estadisticas_outbox)
+        db.Index("ix_outbox_enviado_at", "enviado_at"),
+    )
+
+    def lista_destinatarios(self) -> list:
+        return [d for d in self.destinatarios.split(",") if d]
+
+    def dominios(self) -> set:
+        return {d.rsplit("@", 1)[-1].lower() for d in self.lista_destinatarios()}
+
+    def __repr__(self):
+        return f"<EmailOutbox id={self.id} {self.estado} intentos={self.intentos}>"
@@ -0,0 +1,17 @@
+"""
+app/models/estadistica.py
+Snapshot materializado de conteos de evaluaciones por estado.
+"""
+from datetime import datetime, timezone
+from .. import db
+
+
+class EstadisticaEvaluacion(db.Model):
+    __tablename__ = "estadisticas_evaluaciones"
+
+    estado = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    actualizado_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<EstadisticaEvaluacion {self.estado}={self.total}>"
@@ -4,6 +4,7 @@ Evaluaciones (solicitudes de agendamiento).
 """
 from datetime import datetime, timezone, timedelta
 from .. import db
+from .tipos import HoraHHMM
 
 
 ESTADOS = ("PENDIENTE", "CONFIRMADO", "RECHAZADO", "CANCELADO_AUTO")
@@ -23,7 +24,10 @@ class Evaluacion(db.Model):
 
     # Horario
     fecha = db.Column(db.Date, nullable=False)
-    hora = db.Column(db.String(5), nullable=False)   # "HH:MM"
+    hora = db.Column(HoraHHMM, nullable=False)       # TIME, "HH:MM" en Python
+    duracion_min = db.Column(db.Integer, nullable=False, default=60, server_default="60")
+    inicio_at = db.Column(db.DateTime(timezone=True))   # fecha + hora (UTC)
+    fin_at = db.Column(db.DateTime(timezone=True))      # inicio_at + duracion_min
 
     # Estado y tiempos
     estado = db.Column(db.String(20), nullable=False, default="PENDIENTE")
@@ -35,16 +39,52 @@ class Evaluacion(db.Model):
 
     __table_args__ = (
         db.Index("ix_eval_supervisor_fecha_hora", "supervisor_id", "fecha", "hora"),
+        # Índice parcial para el job de auto-cancelación
+        db.Index(
+            "ix_eval_pendiente_expires_at",
+            "expires_at",
+            postgresql_where=db.text("estado = 'PENDIENTE'"),
+            sqlite_where=db.text("estado = 'PENDIENTE'"),
+        ),
+        # Paginación keyset de listados
+        db.Index("ix_eval_created_id", "created_at", "id"),
+        db.Index("ix_eval_supervisor_created_id", "supervisor_id", "created_at", "id"),
+        db.Index("ix_eval_estado_created_id", "estado", "created_at", "id"),
+        # Solapamiento de horarios por supervisor
+        db.Index("ix_eval_supervisor_inicio_fin", "supervisor_id", "inicio_at", "fin_at"),
+        # Ventana de recordatorios
+        db.Index(
+            "ix_eval_estado_recordatorio_inicio",
+            "estado",
+            "recordatorio_enviado",
+            "inicio_at",
+        ),
     )
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if self.expires_at is None and self.created_at:
             self.expires_at = self.created_at + timedelta(hours=12)
+        if self.inicio_at is None and self.fecha and self.hora:
+            self.inicio_at = Evaluacion.calcular_inicio(self.fecha, self.hora)
+        if self.fin_at is None and self.inicio_at:
+            self.fin_at = self.inicio_at + timedelta(minutes=self.duracion_min or 60)
 
     @staticmethod
-    def create(supervisor_id, challenge_id, nombre, email, telefono, fecha, hora):
+    def calcular_inicio(fecha, hora) -> datetime:
+        """Combina fecha y "HH:MM" en un datetime UTC."""
+        horas, minutos = hora.split(":")
+        return datetime(
+            fecha.year, fecha.month, fecha.day,
+            int(horas), int(minutos),
+            tzinfo=timezone.utc,
+        )
+
+    @staticmethod
+    def create(supervisor_id, challenge_id, nombre, email, telefono, fecha, hora,
+               duracion_min=60):
         now = datetime.now(timezone.utc)
+        inicio = Evaluacion.calcular_inicio(fecha, hora)
         return Evaluacion(
             supervisor_id=supervisor_id,
             challenge_id=challenge_id,
@@ -53,6 +93,9 @@ class Evaluacion(db.Model):
             telefono=telefono,
             fecha=fecha,
             hora=hora,
+            duracion_min=duracion_min,
+            inicio_at=inicio,
+            fin_at=inicio + timedelta(minutes=duracion_min),
             estado="PENDIENTE",
             created_at=now,
             expires_at=now + timedelta(hours=12),
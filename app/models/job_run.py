@@ -0,0 +1,27 @@
+"""
+app/models/job_run.py
+Historial de ejecuciones de los jobs del scheduler.
+"""
+from datetime import datetime, timezone
+from .. import db
+
+
+class JobRun(db.Model):
+    __tablename__ = "job_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(60), nullable=False)
+    inicio_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    duracion_ms = db.Column(db.Integer, nullable=False, default=0)
+    filas_leidas = db.Column(db.Integer, nullable=False, default=0)
+    filas_afectadas = db.Column(db.Integer, nullable=False, default=0)
+    errores = db.Column(db.Integer, nullable=False, default=0)
+    estado = db.Column(db.String(10), nullable=False, default="OK")   # OK / ERROR / OMITIDO
+    detalle = db.Column(db.String(500), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_job_runs_job_inicio", "job_id", "inicio_at"),
+    )
+
+    def __repr__(self):
+        return f"<JobRun {self.job_id} {self.estado} {self.duracion_ms}ms>"
@@ -0,0 +1,62 @@
+"""
+app/models/regla_disponibilidad.py
+Reglas semanales de disponibilidad y excepciones por fecha.
+"""
+from datetime import datetime, timezone
+from .. import db
+from .tipos import HoraHHMM
+
+
+DIAS_SEMANA = ("Lu", "Ma", "Mi", "Ju", "Vi", "Sa", "Do")
+
+
+class ReglaDisponibilidad(db.Model):
+    """Ej.: lunes a viernes de 09:00 a 13:00 desde X hasta Y (slots de 1 hora)."""
+    __tablename__ = "reglas_disponibilidad"
+
+    id = db.Column(db.Integer, primary_key=True)
+    supervisor_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    dias_semana = db.Column(db.Integer, nullable=False)       # bit 0 = lunes ... bit 6 = domingo
+    hora_inicio = db.Column(HoraHHMM, nullable=False)         # inclusive
+    hora_fin = db.Column(HoraHHMM, nullable=False)            # exclusiva
+    desde = db.Column(db.Date, nullable=False)
+    hasta = db.Column(db.Date, nullable=True)                 # None = sin fin
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index("ix_regla_supervisor_desde", "supervisor_id", "desde"),
+    )
+
+    def aplica(self, fecha) -> bool:
+        return bool(self.dias_semana >> fecha.weekday() & 1)
+
+    def horas(self) -> list:
+        """Slots "HH:MM" de una hora entre hora_inicio y hora_fin."""
+        h_ini, m_ini = (int(x) for x in self.hora_inicio.split(":"))
+        h_fin, m_fin = (int(x) for x in self.hora_fin.split(":"))
+        inicio, fin = h_ini * 60 + m_ini, h_fin * 60 + m_fin
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in range(inicio, fin - 59, 60)]
+
+    def dias_legibles(self) -> str:
+        return ", ".join(d for i, d in enumerate(DIAS_SEMANA) if self.dias_semana >> i & 1)
+
+    def __repr__(self):
+        return f"<ReglaDisponibilidad sup={self.supervisor_id} {self.dias_legibles()} {self.hora_inicio}-{self.hora_fin}>"
+
+
+class ExcepcionDisponibilidad(db.Model):
+    """Excluye de las reglas un día completo (hora=None) o un slot puntual."""
+    __tablename__ = "excepciones_disponibilidad"
+
+    id = db.Column(db.Integer, primary_key=True)
+    supervisor_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    hora = db.Column(HoraHHMM, nullable=True)
+    motivo = db.Column(db.String(150), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_excepcion_supervisor_fecha", "supervisor_id", "fecha"),
+    )
+
+    def __repr__(self):
+        return f"<ExcepcionDisponibilidad sup={self.supervisor_id} {self.fecha} {self.hora or 'día'}>"
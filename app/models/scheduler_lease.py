@@ -0,0 +1,17 @@
+"""
+app/models/scheduler_lease.py
+Lease del líder del scheduler (un solo proceso ejecuta los jobs).
+"""
+from .. import db
+
+
+class SchedulerLease(db.Model):
+    __tablename__ = "scheduler_lease"
+
+    nombre = db.Column(db.String(50), primary_key=True)
+    titular = db.Column(db.String(120), nullable=False)
+    expira_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    renovado_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<SchedulerLease {self.nombre} {self.titular} hasta {self.expira_at}>"
@@ -0,0 +1,33 @@
+"""
+app/models/tipos.py
+Tipos de columna compartidos por los modelos.
+"""
+from datetime import time
+from sqlalchemy.types import Time, TypeDecorator
+
+
+class HoraHHMM(TypeDecorator):
+    """
+    Columna TIME nativa que en Python se expone como "HH:MM".
+
+    En la base de datos las horas se comparan, ordenan e indexan como
+    tiempo (rangos con BETWEEN, solapamientos); el resto de la aplicación
+    (plantillas, JSON, claves de caché) sigue trabajando con cadenas.
+    Acepta tanto "HH:MM" como datetime.time al escribir o filtrar.
+    """
+    impl = Time
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, time):
+            return value
+        horas, minutos = str(value).split(":")[:2]
+        return time(int(horas), int(minutos))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return f"{value.hour:02d}:{value.minute:02d}"
+
+    def coerce_compared_value(self, op, value):
+        return self
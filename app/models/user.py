@@ -4,7 +4,6 @@ Modelo de usuarios (ADMIN y SUPERVISOR).
 """
 from datetime import datetime, timezone
 from flask_login import UserMixin
-import bcrypt
 from .. import db
 
 
@@ -25,16 +24,14 @@ class User(UserMixin, db.Model):
 
     # ── Métodos de contraseña ──────────────────────────────────────
     def set_password(self, password: str) -> None:
-        """Hashea y almacena la contraseña con bcrypt."""
-        self.password_hash = bcrypt.hashpw(
-            password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        """Hashea y almacena la contraseña con bcrypt (BCRYPT_ROUNDS)."""
+        from ..services import password_service
+        self.password_hash = password_service.hashear(password)
 
     def check_password(self, password: str) -> bool:
         """Verifica la contraseña contra el hash almacenado."""
-        return bcrypt.checkpw(
-            password.encode("utf-8"), self.password_hash.encode("utf-8")
-        )
+        from ..services import password_service
+        return password_service.verificar(password, self.password_hash)
 
     # ── Helpers ────────────────────────────────────────────────────
     def is_admin(self) -> bool:
@@ -0,0 +1,21 @@
+"""
+app/models/version_disponibilidad.py
+Marca de la última modificación de disponibilidad por supervisor
+(versión de la caché mensual y base de ETag/Last-Modified).
+
+Vive fuera de `users` para que las reservas y liberaciones no bloqueen
+la fila del usuario (login, carga de sesión, panel de admin).
+"""
+from .. import db
+
+
+class VersionDisponibilidad(db.Model):
+    __tablename__ = "versiones_disponibilidad"
+
+    supervisor_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    actualizada_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<VersionDisponibilidad sup={self.supervisor_id} {self.actualizada_at}>"
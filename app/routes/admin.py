@@ -2,9 +2,20 @@
 app/routes/admin.py
 Rutas del panel administrador.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import login_required, current_user
-from ..models import User, Challenge, Evaluacion
+from ..models import User, Challenge
+from ..services import query_service, slot_index, stats_service, user_cache
 from .. import db
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -21,27 +32,12 @@ def _require_admin():
 @login_required
 def dashboard():
     _require_admin()
-    total_supervisores = User.query.filter_by(rol="SUPERVISOR", activo=True).count()
-    total_challenges = Challenge.query.filter_by(activo=True).count()
-    total_evaluaciones = Evaluacion.query.count()
-    pendientes = Evaluacion.query.filter_by(estado="PENDIENTE").count()
-    confirmadas = Evaluacion.query.filter_by(estado="CONFIRMADO").count()
-    rechazadas = Evaluacion.query.filter_by(estado="RECHAZADO").count()
-    canceladas = Evaluacion.query.filter_by(estado="CANCELADO_AUTO").count()
-
-    recientes = Evaluacion.query.order_by(Evaluacion.created_at.desc()).limit(10).all()
+    stats = stats_service.estadisticas_dashboard()
+    recientes = query_service.evaluaciones_recientes(10)
 
     return render_template(
         "admin/dashboard.html",
-        stats={
-            "supervisores": total_supervisores,
-            "challenges": total_challenges,
-            "evaluaciones": total_evaluaciones,
-            "pendientes": pendientes,
-            "confirmadas": confirmadas,
-            "rechazadas": rechazadas,
-            "canceladas": canceladas,
-        },
+        stats=stats,
         recientes=recientes,
     )
 
@@ -125,6 +121,8 @@ def eliminar_supervisor(user_id):
     # Soft delete
     sup.activo = False
     db.session.commit()
+    slot_index.indice.invalidar()
+    user_cache.invalidar(sup.id)
     flash(f"Supervisor '{sup.nombre}' desactivado.", "warning")
     return redirect(url_for("admin.supervisores"))
 
@@ -136,19 +134,94 @@ def restaurar_supervisor(user_id):
     sup = User.query.filter_by(id=user_id, rol="SUPERVISOR").first_or_404()
     sup.activo = True
     db.session.commit()
+    slot_index.indice.invalidar()
+    user_cache.invalidar(sup.id)
     flash(f"Supervisor '{sup.nombre}' restaurado.", "success")
     return redirect(url_for("admin.supervisores"))
 
 
 # ── Evaluaciones globales ──────────────────────────────────────────
 
+ESTADOS_FILTRO = ("PENDIENTE", "CONFIRMADO", "RECHAZADO", "CANCELADO_AUTO")
+
+
 @admin_bp.route("/evaluaciones")
 @login_required
 def evaluaciones():
     _require_admin()
     estado = request.args.get("estado", "")
-    q = Evaluacion.query
-    if estado in ("PENDIENTE", "CONFIRMADO", "RECHAZADO", "CANCELADO_AUTO"):
-        q = q.filter_by(estado=estado)
-    evaluaciones = q.order_by(Evaluacion.created_at.desc()).limit(200).all()
-    return render_template("admin/evaluaciones.html", evaluaciones=evaluaciones, filtro_estado=estado)
+    if estado not in ESTADOS_FILTRO:
+        estado = ""
+    cursor = request.args.get("cursor", "")
+    evaluaciones, siguiente = query_service.listar_evaluaciones(estado or None, cursor, limit=100)
+    return render_template(
+        "admin/evaluaciones.html",
+        evaluaciones=evaluaciones,
+        filtro_estado=estado,
+        cursor=cursor,
+        siguiente=siguiente,
+    )
+
+
+@admin_bp.route("/api/evaluaciones")
+@login_required
+def api_evaluaciones():
+    """Listado JSON paginado por cursor (?estado=&cursor=&limit=)."""
+    _require_admin()
+    estado = request.args.get("estado", "")
+    if estado and estado not in ESTADOS_FILTRO:
+        return jsonify({"error": "Estado inválido"}), 400
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+    evaluaciones, siguiente = query_service.listar_evaluaciones(
+        estado or None, request.args.get("cursor", ""), limit=limit
+    )
+    return jsonify({
+        "items": [
+            {
+                "id": ev.id,
+                "supervisor": ev.supervisor.nombre,
+                "challenge": ev.challenge.nombre,
+                "nombre_solicitante": ev.nombre_solicitante,
+                "email_solicitante": ev.email_solicitante,
+                "fecha": ev.fecha.isoformat(),
+                "hora": ev.hora,
+                "estado": ev.estado,
+                "created_at": ev.created_at.isoformat(),
+            }
+            for ev in evaluaciones
+        ],
+        "siguiente": siguiente,
+    })
+
+
+# ── Cola de correos ────────────────────────────────────────────────
+
+@admin_bp.route("/api/email-outbox")
+@login_required
+def api_email_outbox():
+    _require_admin()
+    from ..services.email_outbox import estadisticas_outbox
+    return jsonify(estadisticas_outbox())
+
+
+# ── Jobs del scheduler ─────────────────────────────────────────────
+
+@admin_bp.route("/jobs")
+@login_required
+def jobs():
+    _require_admin()
+    from ..services.job_metrics import resumen_jobs, ultimas_ejecuciones
+    from ..services.scheduler import intervalos_jobs
+    from ..services.scheduler_leader import lider_actual
+    try:
+        horas = min(max(int(request.args.get("horas", 24)), 1), 24 * 30)
+    except ValueError:
+        horas = 24
+    return render_template(
+        "admin/jobs.html",
+        resumen=resumen_jobs(horas),
+        ultimas=ultimas_ejecuciones(50),
+        intervalos=intervalos_jobs(current_app.config),
+        lider=lider_actual(),
+        horas=horas,
+    )
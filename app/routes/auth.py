@@ -2,9 +2,11 @@
 app/routes/auth.py
 Rutas de autenticación: login, registro de supervisor, logout.
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from ..models import User
+from ..services import password_service, user_cache
+from ..services.password_service import PoolSaturado
 from .. import db
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -23,8 +25,12 @@ def login():
         if not email or not password:
             error = "Todos los campos son obligatorios."
         else:
-            user = User.query.filter_by(email=email, activo=True).first()
-            if user and user.check_password(password):
+            try:
+                user = password_service.autenticar(email, password)
+            except PoolSaturado:
+                return _saturado("auth/login.html")
+            if user:
+                db.session.commit()   # persiste un eventual rehash
                 login_user(user, remember=True)
                 next_page = request.args.get("next")
                 return redirect(next_page or _redirect_url_by_role(user))
@@ -57,9 +63,13 @@ def register():
             error = "Ya existe una cuenta con ese email."
         else:
             user = User(nombre=nombre, email=email, rol="SUPERVISOR")
-            user.set_password(password)
+            try:
+                user.set_password(password)
+            except PoolSaturado:
+                return _saturado("auth/register.html")
             db.session.add(user)
             db.session.commit()
+            user_cache.invalidar(user.id)
             login_user(user)
             flash("¡Cuenta creada exitosamente! Bienvenido/a a EvaluaCalender.", "success")
             return redirect(url_for("supervisor.dashboard"))
@@ -71,12 +81,20 @@ def register():
 @login_required
 def logout():
     logout_user()
+    session.pop(user_cache.CLAVE_SESION, None)
     flash("Sesión cerrada correctamente.", "info")
     return redirect(url_for("auth.login"))
 
 
 # ── Helpers ────────────────────────────────────────────────────────
 
+def _saturado(plantilla):
+    """503 con Retry-After cuando el pool de contraseñas está lleno."""
+    espera = current_app.config.get("PASSWORD_RETRY_AFTER_SECONDS", 2)
+    error = "El servicio está ocupado. Intente nuevamente en unos segundos."
+    return render_template(plantilla, error=error), 503, {"Retry-After": str(espera)}
+
+
 def _redirect_by_role(user):
     return redirect(_redirect_url_by_role(user))
 
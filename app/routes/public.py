@@ -4,9 +4,12 @@ Rutas públicas: home, perfil supervisor, agendamiento.
 No requieren autenticación.
 """
 
+import hashlib
 from datetime import date, datetime
 from flask import (
     Blueprint,
+    Response,
+    current_app,
     render_template,
     request,
     redirect,
@@ -15,14 +18,17 @@ from flask import (
     jsonify,
     abort,
 )
-from ..models import User, Challenge, Evaluacion
+from ..models import User, Challenge
 from ..services import (
+    marca_disponibilidad,
     get_disponibilidad_mes,
-    slot_disponible,
-    bloquear_slot,
+    get_disponibilidad_rango,
+    codificar_bitmask,
+    reservar_slot,
     enviar_solicitud_recibida,
     enviar_nueva_solicitud_supervisor,
 )
+from ..services import slot_index
 from .. import db
 
 public_bp = Blueprint("public", __name__)
@@ -57,7 +63,9 @@ def perfil_supervisor(supervisor_id):
         month = 1
         year += 1
 
-    disponibilidad = get_disponibilidad_mes(supervisor_id, year, month)
+    disponibilidad = get_disponibilidad_mes(
+        supervisor_id, year, month, marca=marca_disponibilidad(supervisor)
+    )
     challenges = Challenge.query.filter_by(activo=True).order_by(Challenge.nombre).all()
 
     return render_template(
@@ -103,12 +111,19 @@ def agendar():
             url_for("public.perfil_supervisor", supervisor_id=supervisor_id)
         )
 
-    # Parsear fecha
+    # Parsear fecha y hora
     try:
         fecha = date.fromisoformat(fecha_str)
     except ValueError:
         flash("Fecha inválida.", "danger")
         return redirect(url_for("public.home"))
+    try:
+        hora = datetime.strptime(hora, "%H:%M").strftime("%H:%M")
+    except ValueError:
+        flash("Hora inválida.", "danger")
+        return redirect(
+            url_for("public.perfil_supervisor", supervisor_id=supervisor_id)
+        )
 
     # Verificar supervisor y challenge
     supervisor = User.query.filter_by(
@@ -118,8 +133,18 @@ def agendar():
     if not supervisor or not challenge:
         abort(400)
 
-    # Verificar disponibilidad en backend
-    if not slot_disponible(supervisor_id, fecha, hora):
+    # Reservar el slot y crear la evaluación de forma atómica
+    evaluacion = reservar_slot(
+        supervisor_id,
+        fecha,
+        hora,
+        challenge_id=challenge_id,
+        nombre=nombre,
+        email=email,
+        telefono=telefono,
+    )
+    if evaluacion is None:
+        db.session.rollback()
         flash(
             "El horario seleccionado ya no está disponible. Por favor elige otro.",
             "warning",
@@ -128,41 +153,11 @@ def agendar():
             url_for("public.perfil_supervisor", supervisor_id=supervisor_id)
         )
 
-    # Crear evaluación
-    evaluacion = Evaluacion.create(
-        supervisor_id=supervisor_id,
-        challenge_id=challenge_id,
-        nombre=nombre,
-        email=email,
-        telefono=telefono,
-        fecha=fecha,
-        hora=hora,
-    )
-    db.session.add(evaluacion)
-    bloquear_slot(supervisor_id, fecha, hora)
+    # Correos encolados en la misma transacción que la reserva
+    enviar_solicitud_recibida(evaluacion)
+    enviar_nueva_solicitud_supervisor(evaluacion)
     db.session.commit()
 
-    # ── Enviar correos en segundo plano (no bloquea la respuesta) ──
-    from flask import current_app
-    import threading
-
-    _app = current_app._get_current_object()
-    _eval_id = evaluacion.id
-
-    def enviar_correos():
-        with _app.app_context():
-            from ..models import Evaluacion as Ev
-
-            ev = Ev.query.get(_eval_id)
-            if ev:
-                try:
-                    enviar_solicitud_recibida(ev)
-                    enviar_nueva_solicitud_supervisor(ev)
-                except Exception as e:
-                    _app.logger.error(f"Error enviando correos: {e}")
-
-    threading.Thread(target=enviar_correos, daemon=True).start()
-
     flash(
         f"¡Solicitud enviada! Recibirás una confirmación en {email}. "
         f"El supervisor tiene 12 horas para responder.",
@@ -177,8 +172,133 @@ def api_disponibilidad(supervisor_id):
     try:
         year = int(request.args.get("year", date.today().year))
         month = int(request.args.get("month", date.today().month))
+        date(year, month, 1)
     except (ValueError, TypeError):
         return jsonify({"error": "Parámetros inválidos"}), 400
 
-    disponibilidad = get_disponibilidad_mes(supervisor_id, year, month)
-    return jsonify(disponibilidad)
+    supervisor = _supervisor_activo_or_404(supervisor_id)
+    marca = marca_disponibilidad(supervisor)
+    # El cuerpo se sirve de la caché solo si se calculó con esta misma marca
+    return _respuesta_condicional(
+        supervisor.id,
+        marca,
+        f"mes:{year}-{month}",
+        lambda: get_disponibilidad_mes(supervisor_id, year, month, marca=marca),
+    )
+
+
+@public_bp.route("/api/disponibilidad/<int:supervisor_id>/rango")
+def api_disponibilidad_rango(supervisor_id):
+    """
+    Disponibilidad entre ?from=YYYY-MM-DD y ?to=YYYY-MM-DD (inclusive),
+    opcionalmente acotada a ?hora_desde=&hora_hasta= (HH:MM).
+    Con ?formato=bitmask responde un entero por día (bit h = slot h:00).
+    """
+    try:
+        desde = date.fromisoformat(request.args.get("from", ""))
+        hasta = date.fromisoformat(request.args.get("to", ""))
+        hora_desde = _hora_opcional("hora_desde")
+        hora_hasta = _hora_opcional("hora_hasta")
+    except ValueError:
+        return jsonify({"error": "Parámetros inválidos"}), 400
+    max_dias = current_app.config.get("DISPONIBILIDAD_RANGO_MAX_DIAS", 93)
+    if hasta < desde or (hasta - desde).days + 1 > max_dias:
+        return jsonify({"error": f"Rango inválido (máximo {max_dias} días)"}), 400
+    formato = request.args.get("formato", "lista")
+    if formato not in ("lista", "bitmask"):
+        return jsonify({"error": "Formato inválido"}), 400
+
+    supervisor = _supervisor_activo_or_404(supervisor_id)
+
+    def generar():
+        disponibilidad = get_disponibilidad_rango(
+            supervisor_id, desde, hasta, hora_desde=hora_desde, hora_hasta=hora_hasta
+        )
+        if formato == "lista":
+            return disponibilidad
+        return {
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "bits": codificar_bitmask(disponibilidad, desde, hasta),
+        }
+
+    return _respuesta_condicional(
+        supervisor.id,
+        marca_disponibilidad(supervisor),
+        f"rango:{desde}:{hasta}:{hora_desde}:{hora_hasta}:{formato}",
+        generar,
+    )
+
+
+@public_bp.route("/api/primeros-slots")
+def api_primeros_slots():
+    """
+    Primeros N slots libres entre todos los supervisores activos.
+    Filtros opcionales: ?from=&to= (YYYY-MM-DD) y ?hora_desde=&hora_hasta= (HH:MM).
+    """
+    try:
+        n = min(max(int(request.args.get("n", 10)), 1), 100)
+        desde = request.args.get("from")
+        hasta = request.args.get("to")
+        desde = date.fromisoformat(desde) if desde else None
+        hasta = date.fromisoformat(hasta) if hasta else None
+        hora_desde = _hora_opcional("hora_desde")
+        hora_hasta = _hora_opcional("hora_hasta")
+    except (ValueError, TypeError):
+        return jsonify({"error": "Parámetros inválidos"}), 400
+
+    slots = slot_index.indice.buscar(n, desde, hasta, hora_desde, hora_hasta)
+    nombres = dict(
+        db.session.query(User.id, User.nombre)
+        .filter(User.id.in_({s[2] for s in slots}))
+        .all()
+    ) if slots else {}
+    return jsonify([
+        {
+            "fecha": fecha.isoformat(),
+            "hora": hora,
+            "supervisor_id": supervisor_id,
+            "supervisor": nombres.get(supervisor_id),
+        }
+        for fecha, hora, supervisor_id in slots
+    ])
+
+
+# ── Helpers ────────────────────────────────────────────────────────
+
+def _hora_opcional(nombre: str):
+    """?nombre=H:MM normalizado a "HH:MM", o None si falta; ValueError si es inválido."""
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    return datetime.strptime(valor, "%H:%M").strftime("%H:%M")
+
+
+def _supervisor_activo_or_404(supervisor_id):
+    return User.query.filter_by(
+        id=supervisor_id, rol="SUPERVISOR", activo=True
+    ).first_or_404()
+
+
+def _respuesta_condicional(supervisor_id: int, marca: datetime, clave: str, generar):
+    """
+    Responde 304 si el cliente ya tiene la versión vigente; el ETag y
+    Last-Modified derivan de `marca` (marca_disponibilidad), la misma
+    con la que `generar` debe obtener el cuerpo.
+    """
+    etag = hashlib.sha1(
+        f"{supervisor_id}:{marca.isoformat()}:{clave}".encode("utf-8")
+    ).hexdigest()
+
+    if request.if_none_match:
+        no_modificado = request.if_none_match.contains(etag)
+    else:
+        desde = request.if_modified_since
+        no_modificado = desde is not None and marca.replace(microsecond=0) <= desde
+
+    respuesta = Response(status=304) if no_modificado else jsonify(generar())
+    respuesta.set_etag(etag)
+    respuesta.last_modified = marca
+    respuesta.cache_control.public = True
+    respuesta.cache_control.no_cache = True
+    return respuesta
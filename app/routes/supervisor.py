@@ -3,8 +3,7 @@ app/routes/supervisor.py
 Rutas del panel de supervisor.
 """
 
-import threading
-from datetime import date
+from datetime import date, datetime
 from flask import (
     Blueprint,
     render_template,
@@ -14,18 +13,25 @@ from flask import (
     flash,
     jsonify,
     abort,
-    current_app,
 )
 from flask_login import login_required, current_user
 from ..models import Evaluacion, Disponibilidad
+from ..models.regla_disponibilidad import DIAS_SEMANA
 from ..services import (
     get_todos_slots_mes,
     guardar_disponibilidad_bulk,
     eliminar_slot,
     liberar_slot,
+    get_reglas,
+    crear_regla,
+    eliminar_regla,
+    get_excepciones,
+    agregar_excepcion,
+    eliminar_excepcion,
     enviar_confirmacion,
     enviar_rechazo,
 )
+from ..services import evaluation_timers, query_service, stats_service
 from .. import db
 
 supervisor_bp = Blueprint("supervisor", __name__, url_prefix="/supervisor")
@@ -36,43 +42,12 @@ def _require_supervisor():
         abort(403)
 
 
-def _enviar_en_background(app, eval_id, funcion_correo):
-    """Envía un correo en un hilo separado para no bloquear la respuesta."""
-
-    def tarea():
-        with app.app_context():
-            from ..models import Evaluacion as Ev
-
-            ev = Ev.query.get(eval_id)
-            if ev:
-                try:
-                    funcion_correo(ev)
-                except Exception as e:
-                    app.logger.error(f"Error enviando correo: {e}")
-
-    threading.Thread(target=tarea, daemon=True).start()
-
-
 @supervisor_bp.route("/dashboard")
 @login_required
 def dashboard():
     _require_supervisor()
-    pendientes = (
-        Evaluacion.query.filter_by(supervisor_id=current_user.id, estado="PENDIENTE")
-        .order_by(Evaluacion.fecha, Evaluacion.hora)
-        .all()
-    )
-
-    proximas = (
-        Evaluacion.query.filter(
-            Evaluacion.supervisor_id == current_user.id,
-            Evaluacion.estado == "CONFIRMADO",
-            Evaluacion.fecha >= date.today(),
-        )
-        .order_by(Evaluacion.fecha, Evaluacion.hora)
-        .limit(20)
-        .all()
-    )
+    pendientes = query_service.pendientes_supervisor(current_user.id)
+    proximas = query_service.proximas_supervisor(current_user.id, date.today(), limit=20)
 
     return render_template(
         "supervisor/dashboard.html",
@@ -85,7 +60,7 @@ def dashboard():
 @login_required
 def confirmar_evaluacion(eval_id):
     _require_supervisor()
-    ev = Evaluacion.query.filter_by(
+    ev = query_service.con_relaciones(Evaluacion.query, supervisor=False).filter_by(
         id=eval_id, supervisor_id=current_user.id
     ).first_or_404()
 
@@ -94,10 +69,11 @@ def confirmar_evaluacion(eval_id):
         return redirect(url_for("supervisor.dashboard"))
 
     ev.confirmar()
+    stats_service.registrar_transicion("PENDIENTE", "CONFIRMADO")
+    evaluation_timers.al_confirmar(ev)
+    enviar_confirmacion(ev)
     db.session.commit()
 
-    _enviar_en_background(current_app._get_current_object(), ev.id, enviar_confirmacion)
-
     flash(f"Evaluación de {ev.nombre_solicitante} confirmada exitosamente.", "success")
     return redirect(url_for("supervisor.dashboard"))
 
@@ -106,7 +82,7 @@ def confirmar_evaluacion(eval_id):
 @login_required
 def rechazar_evaluacion(eval_id):
     _require_supervisor()
-    ev = Evaluacion.query.filter_by(
+    ev = query_service.con_relaciones(Evaluacion.query, supervisor=False).filter_by(
         id=eval_id, supervisor_id=current_user.id
     ).first_or_404()
 
@@ -115,11 +91,12 @@ def rechazar_evaluacion(eval_id):
         return redirect(url_for("supervisor.dashboard"))
 
     ev.rechazar()
+    stats_service.registrar_transicion("PENDIENTE", "RECHAZADO")
+    evaluation_timers.al_rechazar(ev)
     liberar_slot(current_user.id, ev.fecha, ev.hora)
+    enviar_rechazo(ev)
     db.session.commit()
 
-    _enviar_en_background(current_app._get_current_object(), ev.id, enviar_rechazo)
-
     flash(
         f"Evaluación de {ev.nombre_solicitante} rechazada. El horario fue liberado.",
         "info",
@@ -148,6 +125,9 @@ def disponibilidad():
     return render_template(
         "supervisor/disponibilidad.html",
         slots=slots,
+        reglas=get_reglas(current_user.id),
+        excepciones=get_excepciones(current_user.id, date.today()),
+        dias_semana=DIAS_SEMANA,
         year=year,
         month=month,
     )
@@ -167,17 +147,17 @@ def guardar_disponibilidad():
             slots_validos.append(
                 {
                     "fecha": date.fromisoformat(s["fecha"]),
-                    "hora": s["hora"],
+                    "hora": datetime.strptime(s["hora"], "%H:%M").strftime("%H:%M"),
                 }
             )
-        except (KeyError, ValueError):
+        except (KeyError, TypeError, ValueError):
             continue
 
     if not slots_validos:
         return jsonify({"error": "No hay slots válidos"}), 400
 
-    guardar_disponibilidad_bulk(current_user.id, slots_validos)
-    return jsonify({"ok": True, "guardados": len(slots_validos)})
+    resumen = guardar_disponibilidad_bulk(current_user.id, slots_validos)
+    return jsonify({"ok": True, "guardados": len(slots_validos), **resumen})
 
 
 @supervisor_bp.route("/disponibilidad/<int:slot_id>/eliminar", methods=["POST"])
@@ -194,14 +174,80 @@ def eliminar_disponibilidad(slot_id):
     return redirect(url_for("supervisor.disponibilidad"))
 
 
+@supervisor_bp.route("/reglas", methods=["POST"])
+@login_required
+def crear_regla_disponibilidad():
+    _require_supervisor()
+    try:
+        hasta = request.form.get("hasta")
+        crear_regla(
+            current_user.id,
+            dias_semana=[int(d) for d in request.form.getlist("dias")],
+            hora_inicio=request.form.get("hora_inicio", ""),
+            hora_fin=request.form.get("hora_fin", ""),
+            desde=date.fromisoformat(request.form.get("desde") or date.today().isoformat()),
+            hasta=date.fromisoformat(hasta) if hasta else None,
+        )
+    except ValueError as exc:
+        flash(f"Regla inválida: {exc}", "danger")
+    else:
+        flash("Regla semanal creada.", "success")
+    return redirect(url_for("supervisor.disponibilidad"))
+
+
+@supervisor_bp.route("/reglas/<int:regla_id>/eliminar", methods=["POST"])
+@login_required
+def eliminar_regla_disponibilidad(regla_id):
+    _require_supervisor()
+    if eliminar_regla(current_user.id, regla_id):
+        flash("Regla eliminada.", "success")
+    else:
+        flash("La regla no existe.", "danger")
+    return redirect(url_for("supervisor.disponibilidad"))
+
+
+@supervisor_bp.route("/excepciones", methods=["POST"])
+@login_required
+def crear_excepcion_disponibilidad():
+    _require_supervisor()
+    try:
+        fecha = date.fromisoformat(request.form.get("fecha", ""))
+        creada = agregar_excepcion(
+            current_user.id,
+            fecha,
+            hora=request.form.get("hora") or None,
+            motivo=(request.form.get("motivo") or "").strip()[:150] or None,
+        )
+    except ValueError:
+        flash("Fecha u hora inválida.", "danger")
+    else:
+        if creada:
+            flash("Excepción registrada.", "success")
+        else:
+            flash("Esa excepción ya existe.", "info")
+    return redirect(url_for("supervisor.disponibilidad"))
+
+
+@supervisor_bp.route("/excepciones/<int:excepcion_id>/eliminar", methods=["POST"])
+@login_required
+def eliminar_excepcion_disponibilidad(excepcion_id):
+    _require_supervisor()
+    if eliminar_excepcion(current_user.id, excepcion_id):
+        flash("Excepción eliminada.", "success")
+    else:
+        flash("La excepción no existe.", "danger")
+    return redirect(url_for("supervisor.disponibilidad"))
+
+
 @supervisor_bp.route("/historial")
 @login_required
 def historial():
     _require_supervisor()
-    evaluaciones = (
-        Evaluacion.query.filter_by(supervisor_id=current_user.id)
-        .order_by(Evaluacion.created_at.desc())
-        .limit(100)
-        .all()
+    cursor = request.args.get("cursor", "")
+    evaluaciones, siguiente = query_service.historial_supervisor(current_user.id, cursor, limit=50)
+    return render_template(
+        "supervisor/historial.html",
+        evaluaciones=evaluaciones,
+        cursor=cursor,
+        siguiente=siguiente,
     )
-    return render_template("supervisor/historial.html", evaluaciones=evaluaciones)
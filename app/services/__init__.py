@@ -4,16 +4,29 @@ from .email_service import (
     enviar_confirmacion,
     enviar_rechazo,
     enviar_cancelacion_auto,
+    enviar_cancelacion_auto_lote,
     enviar_recordatorio,
+    enviar_recordatorio_lote,
 )
 from .availability_service import (
+    marca_disponibilidad,
     get_disponibilidad_mes,
+    get_disponibilidad_rango,
+    codificar_bitmask,
     get_todos_slots_mes,
     slot_disponible,
     bloquear_slot,
+    reservar_slot,
     liberar_slot,
+    liberar_slots,
     guardar_disponibilidad_bulk,
     eliminar_slot,
+    get_reglas,
+    crear_regla,
+    eliminar_regla,
+    get_excepciones,
+    agregar_excepcion,
+    eliminar_excepcion,
 )
 
 __all__ = [
@@ -22,12 +35,25 @@ __all__ = [
     "enviar_confirmacion",
     "enviar_rechazo",
     "enviar_cancelacion_auto",
+    "enviar_cancelacion_auto_lote",
     "enviar_recordatorio",
+    "enviar_recordatorio_lote",
+    "marca_disponibilidad",
     "get_disponibilidad_mes",
+    "get_disponibilidad_rango",
+    "codificar_bitmask",
     "get_todos_slots_mes",
     "slot_disponible",
     "bloquear_slot",
+    "reservar_slot",
     "liberar_slot",
+    "liberar_slots",
     "guardar_disponibilidad_bulk",
     "eliminar_slot",
+    "get_reglas",
+    "crear_regla",
+    "eliminar_regla",
+    "get_excepciones",
+    "agregar_excepcion",
+    "eliminar_excepcion",
 ]
@@ -0,0 +1,362 @@
+"""
+app/services/availability_bitmap.py
+Almacenamiento de disponibilidad en modo bitmap (AVAILABILITY_STORAGE="bitmap").
+
+Una fila de disponibilidad_dias por (supervisor, fecha) con máscaras de
+24 bits: `ofrecidos` (slots publicados), `libres` (los que siguen sin
+bloquear) y `de_reglas` (ofrecidos solo porque se reservó un slot de una
+regla semanal; al liberarse dejan de ofrecerse). Es la capa de acceso a
+datos; availability_service conserva la API pública, las invalidaciones
+y los commits.
+Solo admite slots en punto ("HH:00"), como exige la regla de 1 hora.
+"""
+from collections import namedtuple
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from ..models import Disponibilidad, DisponibilidadDia, User
+from .. import db
+
+tabla = DisponibilidadDia.__table__
+
+# Vista de un slot compatible con lo que usa supervisor/disponibilidad.html.
+# El id codifica (id del día, hora): id_dia * 24 + hora.
+SlotVista = namedtuple("SlotVista", "id fecha hora disponible")
+
+
+def bit(hora: str) -> int:
+    """Máscara del slot "HH:00"; ValueError si no es una hora en punto."""
+    horas, _, minutos = hora.partition(":")
+    h = int(horas)
+    if minutos != "00" or not 0 <= h < 24:
+        raise ValueError(f"Slot no horario: {hora}")
+    return 1 << h
+
+
+def _bit_o_cero(hora: str) -> int:
+    try:
+        return bit(hora)
+    except ValueError:
+        return 0
+
+
+def horas(mascara: int) -> list:
+    return [f"{h:02d}:00" for h in range(24) if mascara >> h & 1]
+
+
+def _and(columna, valor):
+    return columna.op("&")(valor)
+
+
+def _or(columna, valor):
+    return columna.op("|")(valor)
+
+
+# ── Lecturas ───────────────────────────────────────────────────────
+
+def estados(desde, hasta, supervisor_id: int = None, dias=None,
+            hora_desde: str = None, hora_hasta: str = None) -> dict:
+    """
+    {(supervisor_id, fecha, "HH:00"): disponible} de los slots ofrecidos.
+    Sin supervisor_id se limita a supervisores activos. La ventana horaria
+    se aplica como máscara sobre `ofrecidos`, también en SQL.
+    """
+    ventana = (1 << 24) - 1
+    if hora_desde is not None:
+        # El primer slot en punto que empieza en hora_desde o después
+        horas_desde, minutos_desde = (int(p) for p in hora_desde.split(":")[:2])
+        ventana &= ~((1 << horas_desde + (minutos_desde > 0)) - 1)
+    if hora_hasta is not None:
+        ventana &= (1 << int(hora_hasta.split(":")[0]) + 1) - 1
+    q = db.session.query(
+        DisponibilidadDia.supervisor_id,
+        DisponibilidadDia.fecha,
+        DisponibilidadDia.ofrecidos,
+        DisponibilidadDia.libres,
+    ).filter(
+        DisponibilidadDia.fecha >= desde,
+        DisponibilidadDia.fecha <= hasta,
+        _and(DisponibilidadDia.ofrecidos, ventana) != 0,
+    )
+    if supervisor_id is not None:
+        q = q.filter(DisponibilidadDia.supervisor_id == supervisor_id)
+    else:
+        q = q.join(User, User.id == DisponibilidadDia.supervisor_id).filter(
+            User.rol == "SUPERVISOR",
+            User.activo == True,
+        )
+    if dias is not None:
+        q = q.filter(tuple_(DisponibilidadDia.supervisor_id, DisponibilidadDia.fecha).in_(dias))
+    return {
+        (s, fecha, f"{h:02d}:00"): bool(libres >> h & 1)
+        for s, fecha, ofrecidos, libres in q
+        for h in range(24)
+        if (ofrecidos & ventana) >> h & 1
+    }
+
+
+def todos_slots(supervisor_id: int, desde, hasta) -> list:
+    dias = DisponibilidadDia.query.filter(
+        DisponibilidadDia.supervisor_id == supervisor_id,
+        DisponibilidadDia.fecha >= desde,
+        DisponibilidadDia.fecha <= hasta,
+        DisponibilidadDia.ofrecidos != 0,
+    ).order_by(DisponibilidadDia.fecha).all()
+    return [
+        SlotVista(d.id * 24 + h, d.fecha, f"{h:02d}:00", bool(d.libres >> h & 1))
+        for d in dias
+        for h in range(24)
+        if d.ofrecidos >> h & 1
+    ]
+
+
+# ── Escrituras (sin commit) ────────────────────────────────────────
+
+def bloquear(supervisor_id: int, fecha, hora: str, condicion=None) -> bool:
+    """Apaga el bit en `libres` si estaba libre (y se cumple `condicion`)."""
+    mascara = _bit_o_cero(hora)
+    if not mascara:
+        return False
+    filtros = [
+        tabla.c.supervisor_id == supervisor_id,
+        tabla.c.fecha == fecha,
+        _and(tabla.c.libres, mascara) != 0,
+    ]
+    if condicion is not None:
+        filtros.append(condicion)
+    resultado = db.session.execute(
+        update(tabla).where(*filtros).values(libres=_and(tabla.c.libres, ~mascara))
+    )
+    return resultado.rowcount == 1
+
+
+def liberar(slots: list) -> int:
+    """
+    Enciende en `libres` los bits ofrecidos de [(supervisor_id, fecha, hora)];
+    los de `de_reglas` en cambio dejan de ofrecerse (los decide la regla).
+    `de_reglas` está contenido en `ofrecidos`, así que restar equivale a
+    apagar bits.
+    """
+    por_dia = {}
+    for supervisor_id, fecha, hora in slots:
+        clave = (supervisor_id, fecha)
+        por_dia[clave] = por_dia.get(clave, 0) | _bit_o_cero(hora)
+    if not por_dia:
+        return 0
+    de_reglas = _and(tabla.c.de_reglas, bindparam("b"))
+    resultado = db.session.execute(
+        update(tabla)
+        .where(tabla.c.supervisor_id == bindparam("s"), tabla.c.fecha == bindparam("f"))
+        .values(
+            libres=_or(tabla.c.libres, _and(tabla.c.ofrecidos, bindparam("b"))) - de_reglas,
+            ofrecidos=tabla.c.ofrecidos - de_reglas,
+            de_reglas=tabla.c.de_reglas - de_reglas,
+        ),
+        [{"s": s, "f": f, "b": b} for (s, f), b in por_dia.items()],
+    )
+    return resultado.rowcount
+
+
+def guardar_bulk(supervisor_id: int, claves: list) -> dict:
+    """
+    Publica y libera los slots [(fecha, hora)]; retorna los conteos.
+    Los slots que no son en punto se ignoran.
+    """
+    nuevos = {}
+    for fecha, hora in claves:
+        mascara = _bit_o_cero(hora)
+        if mascara:
+            nuevos[fecha] = nuevos.get(fecha, 0) | mascara
+    resultado = {"insertados": 0, "reactivados": 0, "sin_cambios": 0}
+    if not nuevos:
+        return resultado
+
+    existentes = {
+        fecha: (ofrecidos, libres)
+        for fecha, ofrecidos, libres in db.session.query(
+            DisponibilidadDia.fecha, DisponibilidadDia.ofrecidos, DisponibilidadDia.libres
+        ).filter(
+            DisponibilidadDia.supervisor_id == supervisor_id,
+            DisponibilidadDia.fecha.in_(list(nuevos)),
+        )
+    }
+    for fecha, mascara in nuevos.items():
+        ofrecidos, libres = existentes.get(fecha, (0, 0))
+        resultado["insertados"] += bin(mascara & ~ofrecidos).count("1")
+        resultado["sin_cambios"] += bin(mascara & libres).count("1")
+        resultado["reactivados"] += bin(mascara & ofrecidos & ~libres).count("1")
+
+    filas = [
+        {"supervisor_id": supervisor_id, "fecha": fecha, "ofrecidos": m, "libres": m}
+        for fecha, m in nuevos.items()
+        if m & ~existentes.get(fecha, (0, 0))[1]
+    ]
+    if not filas:
+        return resultado
+
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("postgresql", "sqlite"):
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(tabla).values(filas)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["supervisor_id", "fecha"],
+            set_={
+                "ofrecidos": _or(tabla.c.ofrecidos, stmt.excluded.ofrecidos),
+                "libres": _or(tabla.c.libres, stmt.excluded.libres),
+                # Publicados explícitamente: dejan de depender de una regla
+                "de_reglas": tabla.c.de_reglas - _and(tabla.c.de_reglas, stmt.excluded.ofrecidos),
+            },
+        ))
+    else:
+        actualizar = [f for f in filas if f["fecha"] in existentes]
+        if actualizar:
+            db.session.execute(
+                update(tabla)
+                .where(tabla.c.supervisor_id == bindparam("s"), tabla.c.fecha == bindparam("f"))
+                .values(
+                    ofrecidos=_or(tabla.c.ofrecidos, bindparam("m")),
+                    libres=_or(tabla.c.libres, bindparam("m")),
+                    de_reglas=tabla.c.de_reglas - _and(tabla.c.de_reglas, bindparam("m")),
+                ),
+                [{"s": supervisor_id, "f": f["fecha"], "m": f["ofrecidos"]} for f in actualizar],
+            )
+        nuevas = [f for f in filas if f["fecha"] not in existentes]
+        if nuevas:
+            db.session.execute(insert(tabla), nuevas)
+    return resultado
+
+
+def materializar(supervisor_id: int, fecha, hora: str) -> None:
+    """
+    Publica un slot generado por una regla si el día aún no lo ofrece,
+    marcándolo en `de_reglas`. Un slot ya ofrecido (libre u ocupado) no se toca.
+    """
+    mascara = _bit_o_cero(hora)
+    if not mascara:
+        return
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("postgresql", "sqlite"):
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(tabla).values(
+            supervisor_id=supervisor_id, fecha=fecha,
+            ofrecidos=mascara, libres=mascara, de_reglas=mascara,
+        )
+        nuevo = mascara - _and(tabla.c.ofrecidos, mascara)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["supervisor_id", "fecha"],
+            set_={
+                "ofrecidos": _or(tabla.c.ofrecidos, mascara),
+                "libres": _or(tabla.c.libres, nuevo),
+                "de_reglas": _or(tabla.c.de_reglas, nuevo),
+            },
+        ))
+        return
+    resultado = db.session.execute(
+        update(tabla)
+        .where(
+            tabla.c.supervisor_id == supervisor_id,
+            tabla.c.fecha == fecha,
+            _and(tabla.c.ofrecidos, mascara) == 0,
+        )
+        .values(
+            ofrecidos=_or(tabla.c.ofrecidos, mascara),
+            libres=_or(tabla.c.libres, mascara),
+            de_reglas=_or(tabla.c.de_reglas, mascara),
+        )
+    )
+    if resultado.rowcount == 0 and not db.session.query(
+        select(tabla.c.id).where(tabla.c.supervisor_id == supervisor_id, tabla.c.fecha == fecha).exists()
+    ).scalar():
+        db.session.execute(insert(tabla).values(
+            supervisor_id=supervisor_id, fecha=fecha,
+            ofrecidos=mascara, libres=mascara, de_reglas=mascara,
+        ))
+
+
+def slot_por_id(supervisor_id: int, slot_id: int):
+    """Decodifica un id de SlotVista en (fecha, hora) o None si no existe."""
+    dia = DisponibilidadDia.query.filter_by(
+        id=slot_id // 24, supervisor_id=supervisor_id
+    ).first()
+    h = slot_id % 24
+    if not dia or not dia.ofrecidos >> h & 1:
+        return None
+    return dia.fecha, f"{h:02d}:00"
+
+
+def eliminar(supervisor_id: int, fecha, hora: str) -> None:
+    mascara = ~bit(hora)
+    db.session.execute(
+        update(tabla)
+        .where(tabla.c.supervisor_id == supervisor_id, tabla.c.fecha == fecha)
+        .values(
+            ofrecidos=_and(tabla.c.ofrecidos, mascara),
+            libres=_and(tabla.c.libres, mascara),
+            de_reglas=_and(tabla.c.de_reglas, mascara),
+        )
+    )
+
+
+# ── Migración desde el modelo fila-por-slot ───────────────────────
+
+def migrar_desde_filas(tam_lote: int = 5000) -> int:
+    """
+    Vuelca disponibilidades (fila por slot) en disponibilidad_dias.
+    Idempotente: combina con OR sobre los días ya existentes.
+    Retorna la cantidad de días escritos.
+    """
+    por_dia = {}
+    filas = db.session.query(
+        Disponibilidad.supervisor_id,
+        Disponibilidad.fecha,
+        Disponibilidad.hora,
+        Disponibilidad.disponible,
+        Disponibilidad.origen_regla,
+    ).yield_per(tam_lote)
+    for supervisor_id, fecha, hora, disponible, origen_regla in filas:
+        mascara = _bit_o_cero(hora)
+        if not mascara:
+            continue
+        ofrecidos, libres, de_reglas = por_dia.get((supervisor_id, fecha), (0, 0, 0))
+        por_dia[(supervisor_id, fecha)] = (
+            ofrecidos | mascara,
+            libres | mascara if disponible else libres,
+            de_reglas | mascara if origen_regla else de_reglas,
+        )
+
+    existentes = {
+        (s, f): (o, l, r)
+        for s, f, o, l, r in db.session.query(
+            DisponibilidadDia.supervisor_id,
+            DisponibilidadDia.fecha,
+            DisponibilidadDia.ofrecidos,
+            DisponibilidadDia.libres,
+            DisponibilidadDia.de_reglas,
+        )
+    }
+    nuevas, actualizar = [], []
+    for (s, f), (o, l, r) in por_dia.items():
+        if (s, f) in existentes:
+            o0, l0, r0 = existentes[(s, f)]
+            # Un bit ofrecido explícitamente en cualquiera de los dos no depende de reglas
+            r = (r | r0) & ~((o & ~r) | (o0 & ~r0))
+            actualizar.append({"s": s, "f": f, "o": o | o0, "l": l | l0, "r": r})
+        else:
+            nuevas.append({
+                "supervisor_id": s, "fecha": f, "ofrecidos": o, "libres": l, "de_reglas": r,
+            })
+    if actualizar:
+        db.session.execute(
+            update(tabla)
+            .where(tabla.c.supervisor_id == bindparam("s"), tabla.c.fecha == bindparam("f"))
+            .values(ofrecidos=bindparam("o"), libres=bindparam("l"), de_reglas=bindparam("r")),
+            actualizar,
+        )
+    if nuevas:
+        db.session.execute(insert(tabla), nuevas)
+    db.session.commit()
+    return len(por_dia)
@@ -0,0 +1,151 @@
+"""
+app/services/availability_cache.py
+Caché de disponibilidad mensual por supervisor.
+
+Las claves son (supervisor_id, year, month). Por defecto se usa un
+backend en memoria del proceso (LRU + TTL); si se configura
+AVAILABILITY_CACHE_URL (redis://...) se usa Redis, compartido entre
+los workers de gunicorn.
+
+Cada mes se guarda junto con la versión de disponibilidad del supervisor
+(VersionDisponibilidad.actualizada_at) con la que se calculó, y solo se
+sirve si coincide con la vigente: una escritura hecha en otro proceso
+(p. ej. la auto-cancelación del líder) deja obsoleta la entrada aunque
+este proceso no la haya invalidado.
+
+Las escrituras sobre disponibilidad llaman además a `invalidar_meses`: el
+mes se descarta de inmediato y de nuevo tras el commit de la sesión, para
+que una lectura concurrente no vuelva a cachear datos sin confirmar.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import db
+
+
+class MemoryBackend:
+    """Backend en memoria del proceso con expulsión LRU y TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor) -> None:
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entries:
+                self._datos.popitem(last=False)
+
+    def delete(self, *claves) -> None:
+        with self._lock:
+            for clave in claves:
+                self._datos.pop(clave, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+class RedisBackend:
+    """Backend compartido entre procesos sobre Redis (requiere `redis`)."""
+
+    def __init__(self, url: str, ttl: int = 300, prefijo: str = "evaluacal:disp"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefijo = prefijo
+
+    def _key(self, clave) -> str:
+        return f"{self.prefijo}:{clave[0]}:{clave[1]}:{clave[2]}"
+
+    def get(self, clave):
+        raw = self._redis.get(self._key(clave))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, clave, valor) -> None:
+        self._redis.setex(self._key(clave), self.ttl, json.dumps(valor))
+
+    def delete(self, *claves) -> None:
+        if claves:
+            self._redis.delete(*(self._key(c) for c in claves))
+
+    def clear(self) -> None:
+        for key in self._redis.scan_iter(f"{self.prefijo}:*"):
+            self._redis.delete(key)
+
+
+_backend = MemoryBackend()
+
+
+def init_cache(app) -> None:
+    """Configura el backend según AVAILABILITY_CACHE_* de la app."""
+    global _backend
+    ttl = app.config.get("AVAILABILITY_CACHE_TTL", 300)
+    url = app.config.get("AVAILABILITY_CACHE_URL")
+    if url:
+        _backend = RedisBackend(url, ttl=ttl)
+    else:
+        _backend = MemoryBackend(
+            max_entries=app.config.get("AVAILABILITY_CACHE_MAX_ENTRIES", 1024),
+            ttl=ttl,
+        )
+
+
+def set_backend(backend) -> None:
+    """Reemplaza el backend (p. ej. un MemoryBackend aislado en pruebas)."""
+    global _backend
+    _backend = backend
+
+
+def obtener_mes(supervisor_id: int, year: int, month: int, version: str):
+    """El mes cacheado si se calculó con `version`; si no, None."""
+    item = _backend.get((supervisor_id, year, month))
+    if item is None or item[0] != version:
+        return None
+    return item[1]
+
+
+def guardar_mes(supervisor_id: int, year: int, month: int, valor: dict, version: str) -> None:
+    _backend.set((supervisor_id, year, month), [version, valor])
+
+
+def invalidar_meses(supervisor_id: int, fechas) -> None:
+    """Descarta los meses de `fechas` ahora y otra vez tras el commit."""
+    claves = {(supervisor_id, f.year, f.month) for f in fechas}
+    if not claves:
+        return
+    _backend.delete(*claves)
+    db.session.info.setdefault("disp_cache_pendientes", set()).update(claves)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(session):
+    claves = session.info.pop("disp_cache_pendientes", None)
+    if claves:
+        _backend.delete(*claves)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop("disp_cache_pendientes", None)
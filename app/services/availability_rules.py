@@ -0,0 +1,80 @@
+"""
+app/services/availability_rules.py
+Expansión de reglas semanales de disponibilidad.
+
+Las reglas no se materializan en filas: se expanden al vuelo para la
+ventana pedida con una consulta de reglas y otra de excepciones, así
+el costo depende del tamaño de la ventana y no de hasta cuándo llegue
+la disponibilidad. availability_service superpone el resultado a los
+slots almacenados (que siempre tienen prioridad) y materializa un slot
+de regla solo cuando se reserva.
+"""
+from datetime import timedelta
+from sqlalchemy import or_
+from ..models import ExcepcionDisponibilidad, ReglaDisponibilidad, User
+from .. import db
+
+
+def reglas_en_rango(desde, hasta, supervisor_ids=None, solo_activos: bool = False) -> list:
+    """Reglas que se solapan con [desde, hasta]."""
+    q = ReglaDisponibilidad.query.filter(
+        ReglaDisponibilidad.desde <= hasta,
+        or_(ReglaDisponibilidad.hasta.is_(None), ReglaDisponibilidad.hasta >= desde),
+    )
+    if supervisor_ids is not None:
+        q = q.filter(ReglaDisponibilidad.supervisor_id.in_(supervisor_ids))
+    if solo_activos:
+        q = q.join(User, User.id == ReglaDisponibilidad.supervisor_id).filter(
+            User.rol == "SUPERVISOR",
+            User.activo == True,
+        )
+    return q.all()
+
+
+def excepciones_en_rango(desde, hasta, supervisor_ids) -> set:
+    """{(supervisor_id, fecha, hora)}; hora None excluye el día completo."""
+    if not supervisor_ids:
+        return set()
+    return set(
+        db.session.query(
+            ExcepcionDisponibilidad.supervisor_id,
+            ExcepcionDisponibilidad.fecha,
+            ExcepcionDisponibilidad.hora,
+        ).filter(
+            ExcepcionDisponibilidad.supervisor_id.in_(supervisor_ids),
+            ExcepcionDisponibilidad.fecha >= desde,
+            ExcepcionDisponibilidad.fecha <= hasta,
+        )
+    )
+
+
+def expandir(reglas, excepciones: set, desde, hasta) -> set:
+    """{(supervisor_id, fecha, hora)} generados por las reglas en la ventana."""
+    slots = set()
+    for regla in reglas:
+        horas = regla.horas()
+        dia = max(desde, regla.desde)
+        fin = min(hasta, regla.hasta) if regla.hasta else hasta
+        while dia <= fin:
+            if regla.aplica(dia) and (regla.supervisor_id, dia, None) not in excepciones:
+                slots.update(
+                    (regla.supervisor_id, dia, hora)
+                    for hora in horas
+                    if (regla.supervisor_id, dia, hora) not in excepciones
+                )
+            dia += timedelta(days=1)
+    return slots
+
+
+def slots_de_reglas(desde, hasta, supervisor_ids=None, solo_activos: bool = False) -> set:
+    """Expande las reglas de la ventana descontando excepciones."""
+    reglas = reglas_en_rango(desde, hasta, supervisor_ids, solo_activos)
+    if not reglas:
+        return set()
+    excepciones = excepciones_en_rango(desde, hasta, {r.supervisor_id for r in reglas})
+    return expandir(reglas, excepciones, desde, hasta)
+
+
+def cubre(supervisor_id: int, fecha, hora: str) -> bool:
+    """True si alguna regla del supervisor genera el slot y no está exceptuado."""
+    return (supervisor_id, fecha, hora) in slots_de_reglas(fecha, fecha, [supervisor_id])
@@ -1,41 +1,269 @@
 """
 app/services/availability_service.py
 Lógica de negocio para disponibilidad y agendamiento.
+
+El almacenamiento depende de AVAILABILITY_STORAGE: "filas" (una fila de
+Disponibilidad por slot) o "bitmap" (una fila de DisponibilidadDia por
+día, ver availability_bitmap). La API y su semántica son las mismas.
+Sobre ambos se superponen las reglas semanales (availability_rules).
 """
-from datetime import date
-from ..models import Disponibilidad, Evaluacion
+from datetime import date, datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import and_, delete, insert, or_, select, tuple_, update
+from ..models import (
+    Disponibilidad,
+    Evaluacion,
+    ExcepcionDisponibilidad,
+    ReglaDisponibilidad,
+    User,
+    VersionDisponibilidad,
+)
 from .. import db
+from . import (
+    availability_bitmap,
+    availability_cache,
+    availability_rules,
+    evaluation_timers,
+    slot_index,
+    stats_service,
+)
+
+
+def _modo_bitmap() -> bool:
+    return current_app.config.get("AVAILABILITY_STORAGE", "filas") == "bitmap"
+
+
+def _duracion_slot() -> int:
+    return current_app.config.get("SLOT_DURACION_MIN", 60)
+
+
+def _eval_activa(supervisor_id: int, fecha: date, hora: str, duracion_min: int = None):
+    """
+    EXISTS de una evaluación PENDIENTE/CONFIRMADA que ocupe el slot:
+    la misma hora o cualquier intervalo [inicio_at, fin_at) que se solape.
+    """
+    inicio = Evaluacion.calcular_inicio(fecha, hora)
+    fin = inicio + timedelta(minutes=duracion_min or _duracion_slot())
+    return (
+        select(Evaluacion.id)
+        .where(
+            Evaluacion.supervisor_id == supervisor_id,
+            Evaluacion.fecha == fecha,
+            Evaluacion.estado.in_(["PENDIENTE", "CONFIRMADO"]),
+            or_(
+                Evaluacion.hora == hora,
+                and_(Evaluacion.inicio_at < fin, Evaluacion.fin_at > inicio),
+            ),
+        )
+        .exists()
+    )
+
+
+def _registrar_cambio(supervisor_id: int, fechas) -> None:
+    """Invalida los meses afectados y marca la última modificación del supervisor."""
+    availability_cache.invalidar_meses(supervisor_id, fechas)
+    slot_index.marcar_cambio(supervisor_id, fechas)
+    _marcar_actualizacion([supervisor_id])
+
+
+def _marcar_actualizacion(supervisor_ids: list) -> None:
+    """
+    Sube la marca de VersionDisponibilidad (base de ETag/Last-Modified).
+    Es una fila propia por supervisor: la transacción de una reserva no
+    bloquea la fila de `users`.
+    """
+    if not supervisor_ids:
+        return
+    ahora = datetime.now(timezone.utc)
+    tabla = VersionDisponibilidad.__table__
+    filas = [{"supervisor_id": s, "actualizada_at": ahora} for s in sorted(set(supervisor_ids))]
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("postgresql", "sqlite"):
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(tabla).values(filas)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["supervisor_id"],
+            set_={"actualizada_at": stmt.excluded.actualizada_at},
+        ))
+        return
+    existentes = set(db.session.scalars(
+        select(tabla.c.supervisor_id).where(tabla.c.supervisor_id.in_(supervisor_ids))
+    ))
+    if existentes:
+        db.session.execute(
+            update(tabla).where(tabla.c.supervisor_id.in_(existentes)).values(actualizada_at=ahora)
+        )
+    nuevas = [f for f in filas if f["supervisor_id"] not in existentes]
+    if nuevas:
+        db.session.execute(insert(tabla), nuevas)
+
+
+def _leer_marca(supervisor_id: int):
+    return db.session.scalar(
+        select(VersionDisponibilidad.actualizada_at)
+        .where(VersionDisponibilidad.supervisor_id == supervisor_id)
+    )
+
+
+def marca_disponibilidad(supervisor) -> datetime:
+    """
+    Última modificación de disponibilidad del supervisor (UTC): versión de
+    la caché mensual y base de ETag/Last-Modified. Sin modificaciones
+    registradas es su created_at.
+    """
+    marca = _leer_marca(supervisor.id) or supervisor.created_at
+    if marca.tzinfo is None:
+        marca = marca.replace(tzinfo=timezone.utc)
+    return marca
 
 
-def get_disponibilidad_mes(supervisor_id: int, year: int, month: int) -> dict:
+def get_disponibilidad_mes(supervisor_id: int, year: int, month: int,
+                           marca: datetime = None) -> dict:
     """
     Retorna la disponibilidad del mes como dict:
     { "2025-06-10": ["09:00", "10:00", ...], ... }
     Solo incluye slots con disponible=True.
+    Se sirve desde availability_cache cuando el mes está cacheado con la
+    marca vigente del supervisor; si el llamador no la pasa, se lee por PK.
     """
+    if marca is None:
+        marca = marca_disponibilidad(
+            db.session.query(User.id, User.created_at).filter(User.id == supervisor_id).one()
+        )
+    version = marca.isoformat()
+    cacheado = availability_cache.obtener_mes(supervisor_id, year, month, version)
+    if cacheado is not None:
+        return cacheado
+
     from calendar import monthrange
     _, last_day = monthrange(year, month)
     fecha_inicio = date(year, month, 1)
     fecha_fin = date(year, month, last_day)
 
-    slots = Disponibilidad.query.filter(
-        Disponibilidad.supervisor_id == supervisor_id,
-        Disponibilidad.fecha >= fecha_inicio,
-        Disponibilidad.fecha <= fecha_fin,
-        Disponibilidad.disponible == True,
-    ).order_by(Disponibilidad.fecha, Disponibilidad.hora).all()
+    resultado = get_disponibilidad_rango(supervisor_id, fecha_inicio, fecha_fin)
+    availability_cache.guardar_mes(supervisor_id, year, month, resultado, version)
+    return resultado
+
 
+def get_disponibilidad_rango(supervisor_id: int, desde: date, hasta: date,
+                             hora_desde: str = None, hora_hasta: str = None) -> dict:
+    """
+    Disponibilidad entre `desde` y `hasta` (inclusive) con el mismo formato
+    que get_disponibilidad_mes: slots almacenados libres más los generados
+    por reglas semanales que no estén exceptuados ni almacenados.
+    Opcionalmente solo slots que empiezan en [hora_desde, hora_hasta].
+    """
     resultado = {}
-    for s in slots:
-        key = s.fecha.strftime("%Y-%m-%d")
-        resultado.setdefault(key, []).append(s.hora)
+    for _, fecha, hora in _libres(
+        desde, hasta, supervisor_id=supervisor_id, hora_desde=hora_desde, hora_hasta=hora_hasta
+    ):
+        resultado.setdefault(fecha.strftime("%Y-%m-%d"), []).append(hora)
     return resultado
 
 
+def slots_libres_activos(desde: date, hasta: date, dias=None) -> list:
+    """
+    [(supervisor_id, fecha, hora)] libres de todos los supervisores activos,
+    opcionalmente solo en los días [(supervisor_id, fecha)] (slot_index).
+    """
+    return _libres(desde, hasta, dias=dias)
+
+
+def _estados(desde: date, hasta: date, supervisor_id: int = None, dias=None,
+             hora_desde: str = None, hora_hasta: str = None) -> dict:
+    """
+    {(supervisor_id, fecha, hora): disponible} de los slots almacenados.
+    Sin supervisor_id se limita a supervisores activos. La ventana horaria
+    se filtra en SQL sobre la columna TIME (uq_supervisor_fecha_hora).
+    """
+    if _modo_bitmap():
+        return availability_bitmap.estados(
+            desde, hasta, supervisor_id, dias, hora_desde=hora_desde, hora_hasta=hora_hasta
+        )
+    q = db.session.query(
+        Disponibilidad.supervisor_id,
+        Disponibilidad.fecha,
+        Disponibilidad.hora,
+        Disponibilidad.disponible,
+    ).filter(
+        Disponibilidad.fecha >= desde,
+        Disponibilidad.fecha <= hasta,
+    )
+    if supervisor_id is not None:
+        q = q.filter(Disponibilidad.supervisor_id == supervisor_id)
+    else:
+        q = q.join(User, User.id == Disponibilidad.supervisor_id).filter(
+            User.rol == "SUPERVISOR",
+            User.activo == True,
+        )
+    if dias is not None:
+        q = q.filter(tuple_(Disponibilidad.supervisor_id, Disponibilidad.fecha).in_(dias))
+    if hora_desde is not None:
+        q = q.filter(Disponibilidad.hora >= hora_desde)
+    if hora_hasta is not None:
+        q = q.filter(Disponibilidad.hora <= hora_hasta)
+    return {(s, fecha, hora): disponible for s, fecha, hora, disponible in q}
+
+
+def _minutos(hora: str) -> int:
+    horas, minutos = hora.split(":")[:2]
+    return int(horas) * 60 + int(minutos)
+
+
+def _libres(desde: date, hasta: date, supervisor_id: int = None, dias=None,
+            hora_desde: str = None, hora_hasta: str = None) -> list:
+    """
+    Slots libres ordenados por (fecha, hora, supervisor_id). Un slot
+    almacenado, libre u ocupado, tiene prioridad sobre las reglas.
+    La ventana horaria se compara en minutos ("9:00" equivale a "09:00").
+    """
+    estados = _estados(desde, hasta, supervisor_id, dias, hora_desde, hora_hasta)
+    min_desde = _minutos(hora_desde) if hora_desde else 0
+    min_hasta = _minutos(hora_hasta) if hora_hasta else 24 * 60
+    libres = {clave for clave, disponible in estados.items() if disponible}
+
+    if supervisor_id is not None:
+        ids = [supervisor_id]
+    elif dias is not None:
+        dias = set(dias)
+        ids = sorted({s for s, _ in dias})
+    else:
+        ids = None
+    for clave in availability_rules.slots_de_reglas(
+        desde, hasta, ids, solo_activos=supervisor_id is None
+    ):
+        if clave in estados or (dias is not None and clave[:2] not in dias):
+            continue
+        if not min_desde <= _minutos(clave[2]) <= min_hasta:
+            continue
+        libres.add(clave)
+    return sorted(libres, key=lambda c: (c[1], c[2], c[0]))
+
+
+def codificar_bitmask(disponibilidad: dict, desde: date, hasta: date) -> list:
+    """
+    Codifica la disponibilidad como un entero por día desde `desde`:
+    el bit h está activo si el slot "HH:00" de la hora h está libre.
+    """
+    bits = [0] * ((hasta - desde).days + 1)
+    for dia, horas in disponibilidad.items():
+        indice = (date.fromisoformat(dia) - desde).days
+        for hora in horas:
+            bits[indice] |= 1 << int(hora[:2])
+    return bits
+
+
 def get_todos_slots_mes(supervisor_id: int, year: int, month: int) -> list:
     """Retorna TODOS los slots del mes (disponibles e indisponibles)."""
     from calendar import monthrange
     _, last_day = monthrange(year, month)
+    if _modo_bitmap():
+        return availability_bitmap.todos_slots(
+            supervisor_id, date(year, month, 1), date(year, month, last_day)
+        )
     slots = Disponibilidad.query.filter(
         Disponibilidad.supervisor_id == supervisor_id,
         Disponibilidad.fecha >= date(year, month, 1),
@@ -46,81 +274,400 @@ def get_todos_slots_mes(supervisor_id: int, year: int, month: int) -> list:
 
 def slot_disponible(supervisor_id: int, fecha: date, hora: str) -> bool:
     """Verifica si un slot está disponible (sin evaluación activa)."""
-    disp = Disponibilidad.query.filter_by(
-        supervisor_id=supervisor_id,
-        fecha=fecha,
-        hora=hora,
-        disponible=True,
-    ).first()
-    if not disp:
+    libre = _estados(fecha, fecha, supervisor_id, hora_desde=hora, hora_hasta=hora).get(
+        (supervisor_id, fecha, hora)
+    )
+    if libre is None:
+        libre = availability_rules.cubre(supervisor_id, fecha, hora)
+    if not libre:
         return False
 
     # Verificar que no haya evaluación activa (pendiente o confirmada)
-    eval_activa = Evaluacion.query.filter(
-        Evaluacion.supervisor_id == supervisor_id,
-        Evaluacion.fecha == fecha,
-        Evaluacion.hora == hora,
-        Evaluacion.estado.in_(["PENDIENTE", "CONFIRMADO"]),
-    ).first()
-    return eval_activa is None
+    return not db.session.query(_eval_activa(supervisor_id, fecha, hora)).scalar()
 
 
 def bloquear_slot(supervisor_id: int, fecha: date, hora: str) -> None:
     """Marca un slot como no disponible al agendar."""
+    if _modo_bitmap():
+        if availability_bitmap.bloquear(supervisor_id, fecha, hora):
+            _registrar_cambio(supervisor_id, [fecha])
+        return
     disp = Disponibilidad.query.filter_by(
         supervisor_id=supervisor_id, fecha=fecha, hora=hora
     ).first()
     if disp:
         disp.disponible = False
+        _registrar_cambio(supervisor_id, [fecha])
+
+
+def reservar_slot(supervisor_id: int, fecha: date, hora: str, **datos):
+    """
+    Reserva atómicamente un slot y crea la Evaluacion PENDIENTE.
+
+    Un único UPDATE condicional pasa el slot a disponible=False solo si
+    seguía disponible y sin evaluación activa; si no afecta ninguna fila
+    otro solicitante ganó la carrera y se retorna None sin más consultas.
+    La Evaluacion queda en la misma transacción: el llamador hace commit.
+    Un slot generado por una regla se materializa antes del UPDATE.
+    """
+    if availability_rules.cubre(supervisor_id, fecha, hora):
+        _materializar(supervisor_id, fecha, hora)
+    libre = ~_eval_activa(supervisor_id, fecha, hora)
+    duracion = _duracion_slot()
+    if _modo_bitmap():
+        reservado = availability_bitmap.bloquear(supervisor_id, fecha, hora, condicion=libre)
+    else:
+        duracion = db.session.execute(
+            update(Disponibilidad)
+            .where(
+                Disponibilidad.supervisor_id == supervisor_id,
+                Disponibilidad.fecha == fecha,
+                Disponibilidad.hora == hora,
+                Disponibilidad.disponible == True,
+                libre,
+            )
+            .values(disponible=False)
+            .returning(Disponibilidad.duracion_min)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        reservado = duracion is not None
+    if not reservado:
+        return None
+
+    evaluacion = Evaluacion.create(
+        supervisor_id=supervisor_id, fecha=fecha, hora=hora, duracion_min=duracion, **datos
+    )
+    db.session.add(evaluacion)
+    db.session.flush()
+    stats_service.registrar_transicion(None, "PENDIENTE")
+    evaluation_timers.programar_expiracion(evaluacion)
+    _registrar_cambio(supervisor_id, [fecha])
+    return evaluacion
+
+
+def _materializar(supervisor_id: int, fecha: date, hora: str) -> None:
+    """
+    Almacena como libre un slot de regla que aún no tiene fila (sin commit),
+    marcado como origen_regla para que liberar_slot(s) lo borre.
+    """
+    if _modo_bitmap():
+        availability_bitmap.materializar(supervisor_id, fecha, hora)
+        return
+    fila = {
+        "supervisor_id": supervisor_id, "fecha": fecha, "hora": hora,
+        "duracion_min": _duracion_slot(), "disponible": True, "origen_regla": True,
+    }
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        existe = db.session.query(
+            select(Disponibilidad.id).where(
+                Disponibilidad.supervisor_id == supervisor_id,
+                Disponibilidad.fecha == fecha,
+                Disponibilidad.hora == hora,
+            ).exists()
+        ).scalar()
+        if not existe:
+            db.session.execute(insert(Disponibilidad).values(**fila))
+        return
+    db.session.execute(
+        dialect_insert(Disponibilidad).values(**fila).on_conflict_do_nothing(
+            index_elements=["supervisor_id", "fecha", "hora"]
+        )
+    )
 
 
 def liberar_slot(supervisor_id: int, fecha: date, hora: str) -> None:
-    """Libera un slot al rechazar/cancelar una evaluación."""
+    """
+    Libera un slot al rechazar/cancelar una evaluación. Un slot
+    materializado desde una regla se borra: vuelve a decidirlo la regla
+    vigente (que pudo eliminarse o exceptuar ese día).
+    """
+    if _modo_bitmap():
+        availability_bitmap.liberar([(supervisor_id, fecha, hora)])
+        _registrar_cambio(supervisor_id, [fecha])
+        return
     disp = Disponibilidad.query.filter_by(
         supervisor_id=supervisor_id, fecha=fecha, hora=hora
     ).first()
     if disp:
-        disp.disponible = True
+        if disp.origen_regla:
+            db.session.delete(disp)
+        else:
+            disp.disponible = True
+        _registrar_cambio(supervisor_id, [fecha])
+
+
+def liberar_slots(slots: list) -> None:
+    """
+    Libera en lote los slots [(supervisor_id, fecha, hora), ...]: un DELETE
+    de los materializados desde reglas y un único UPDATE del resto.
+    No hace commit.
+    """
+    claves = sorted(set(slots))
+    if not claves:
+        return
+    if _modo_bitmap():
+        availability_bitmap.liberar(claves)
+    else:
+        en_claves = tuple_(
+            Disponibilidad.supervisor_id, Disponibilidad.fecha, Disponibilidad.hora
+        ).in_(claves)
+        db.session.execute(
+            delete(Disponibilidad)
+            .where(en_claves, Disponibilidad.origen_regla == True)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(Disponibilidad)
+            .where(en_claves)
+            .values(disponible=True)
+            .execution_options(synchronize_session=False)
+        )
+    meses = {}
+    for supervisor_id, fecha, _ in claves:
+        meses.setdefault(supervisor_id, []).append(fecha)
+    for supervisor_id, fechas in meses.items():
+        availability_cache.invalidar_meses(supervisor_id, fechas)
+        slot_index.marcar_cambio(supervisor_id, fechas)
+    _marcar_actualizacion(list(meses))
 
 
-def guardar_disponibilidad_bulk(supervisor_id: int, slots: list) -> None:
+def guardar_disponibilidad_bulk(supervisor_id: int, slots: list) -> dict:
     """
     slots = [{"fecha": date, "hora": "HH:MM"}, ...]
-    Inserta o activa los slots. Ignora duplicados.
+    Inserta o activa los slots. Ignora duplicados. Los slots nuevos duran
+    SLOT_DURACION_MIN; los reactivados conservan su duración.
+
+    Procesa todo el lote con un número constante de sentencias:
+    un SELECT para clasificar los slots y un INSERT ... ON CONFLICT
+    (supervisor_id, fecha, hora) DO UPDATE sobre uq_supervisor_fecha_hora.
+    Retorna {"insertados": n, "reactivados": n, "sin_cambios": n}.
     """
-    for s in slots:
-        existing = Disponibilidad.query.filter_by(
-            supervisor_id=supervisor_id,
-            fecha=s["fecha"],
-            hora=s["hora"],
-        ).first()
-        if existing:
-            existing.disponible = True
+    claves = sorted({(s["fecha"], s["hora"]) for s in slots})
+    resultado = {"insertados": 0, "reactivados": 0, "sin_cambios": 0}
+    if not claves:
+        return resultado
+
+    if _modo_bitmap():
+        resultado = availability_bitmap.guardar_bulk(supervisor_id, claves)
+        if resultado["insertados"] or resultado["reactivados"]:
+            _registrar_cambio(supervisor_id, [fecha for fecha, _ in claves])
+            db.session.commit()
+        return resultado
+
+    existentes = {
+        (fecha, hora): disponible
+        for fecha, hora, disponible in db.session.query(
+            Disponibilidad.fecha, Disponibilidad.hora, Disponibilidad.disponible
+        ).filter(
+            Disponibilidad.supervisor_id == supervisor_id,
+            tuple_(Disponibilidad.fecha, Disponibilidad.hora).in_(claves),
+        )
+    }
+    for clave in claves:
+        if clave not in existentes:
+            resultado["insertados"] += 1
+        elif existentes[clave]:
+            resultado["sin_cambios"] += 1
         else:
-            db.session.add(Disponibilidad(
-                supervisor_id=supervisor_id,
-                fecha=s["fecha"],
-                hora=s["hora"],
-                disponible=True,
-            ))
+            resultado["reactivados"] += 1
+
+    if resultado["sin_cambios"] == len(claves):
+        return resultado
+
+    duracion = _duracion_slot()
+    filas = [
+        {
+            "supervisor_id": supervisor_id, "fecha": fecha, "hora": hora,
+            "duracion_min": duracion, "disponible": True,
+        }
+        for fecha, hora in claves
+        if not existentes.get((fecha, hora))
+    ]
+    stmt = _upsert_disponibilidad(filas)
+    if stmt is not None:
+        db.session.execute(stmt)
+    else:
+        # Dialectos sin ON CONFLICT: un UPDATE y un INSERT multi-fila.
+        reactivar = [c for c in claves if existentes.get(c) is False]
+        if reactivar:
+            db.session.execute(
+                update(Disponibilidad)
+                .where(
+                    Disponibilidad.supervisor_id == supervisor_id,
+                    tuple_(Disponibilidad.fecha, Disponibilidad.hora).in_(reactivar),
+                )
+                .values(disponible=True, origen_regla=False)
+            )
+        nuevas = [f for f in filas if (f["fecha"], f["hora"]) not in existentes]
+        if nuevas:
+            db.session.execute(insert(Disponibilidad), nuevas)
+    _registrar_cambio(supervisor_id, [fecha for fecha, _ in claves])
     db.session.commit()
+    return resultado
+
+
+def _upsert_disponibilidad(filas: list):
+    """INSERT ... ON CONFLICT DO UPDATE para PostgreSQL y SQLite (None si no aplica)."""
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(Disponibilidad).values(filas)
+    return stmt.on_conflict_do_update(
+        index_elements=["supervisor_id", "fecha", "hora"],
+        # Publicado explícitamente: deja de depender de la regla que lo generó
+        set_={"disponible": True, "origen_regla": False},
+        where=Disponibilidad.__table__.c.disponible == False,
+    )
 
 
 def eliminar_slot(supervisor_id: int, disponibilidad_id: int) -> bool:
     """Elimina un slot de disponibilidad si no tiene evaluación activa."""
-    disp = Disponibilidad.query.filter_by(
-        id=disponibilidad_id, supervisor_id=supervisor_id
+    if _modo_bitmap():
+        slot = availability_bitmap.slot_por_id(supervisor_id, disponibilidad_id)
+        if not slot:
+            return False
+        fecha, hora = slot
+    else:
+        disp = Disponibilidad.query.filter_by(
+            id=disponibilidad_id, supervisor_id=supervisor_id
+        ).first()
+        if not disp:
+            return False
+        fecha, hora = disp.fecha, disp.hora
+    if db.session.query(_eval_activa(supervisor_id, fecha, hora)).scalar():
+        return False
+    if _modo_bitmap():
+        availability_bitmap.eliminar(supervisor_id, fecha, hora)
+    else:
+        db.session.delete(disp)
+    _registrar_cambio(supervisor_id, [fecha])
+    db.session.commit()
+    return True
+
+
+# ── Reglas semanales y excepciones ────────────────────────────────
+
+def _validar_hora(hora: str) -> str:
+    datetime.strptime(hora, "%H:%M")
+    return hora
+
+
+def _registrar_cambio_regla(regla: ReglaDisponibilidad) -> None:
+    """Invalida los meses (y días del índice) que la regla puede afectar."""
+    hoy = date.today()
+    inicio = max(regla.desde, hoy)
+    fin = regla.hasta or hoy + timedelta(days=366)
+    meses = []
+    mes = inicio.replace(day=1)
+    while mes <= fin:
+        meses.append(mes)
+        mes = (mes + timedelta(days=32)).replace(day=1)
+    availability_cache.invalidar_meses(regla.supervisor_id, meses)
+    fin_indice = min(fin, hoy + timedelta(days=slot_index.indice.dias))
+    slot_index.marcar_cambio(
+        regla.supervisor_id,
+        [inicio + timedelta(days=i) for i in range((fin_indice - inicio).days + 1)],
+    )
+    _marcar_actualizacion([regla.supervisor_id])
+
+
+def get_reglas(supervisor_id: int) -> list:
+    return (
+        ReglaDisponibilidad.query.filter_by(supervisor_id=supervisor_id)
+        .order_by(ReglaDisponibilidad.desde, ReglaDisponibilidad.hora_inicio)
+        .all()
+    )
+
+
+def crear_regla(supervisor_id: int, dias_semana: list, hora_inicio: str,
+                hora_fin: str, desde: date, hasta: date = None) -> ReglaDisponibilidad:
+    """
+    Crea una regla semanal. `dias_semana` usa 0 = lunes ... 6 = domingo.
+    Lanza ValueError si los datos no son consistentes.
+    """
+    mascara = 0
+    for dia in dias_semana:
+        if not 0 <= dia <= 6:
+            raise ValueError("Día de la semana inválido.")
+        mascara |= 1 << dia
+    if not mascara:
+        raise ValueError("Selecciona al menos un día de la semana.")
+    if _validar_hora(hora_inicio) >= _validar_hora(hora_fin):
+        raise ValueError("La hora de inicio debe ser anterior a la de fin.")
+    if hasta is not None and hasta < desde:
+        raise ValueError("La fecha de fin debe ser posterior a la de inicio.")
+
+    regla = ReglaDisponibilidad(
+        supervisor_id=supervisor_id,
+        dias_semana=mascara,
+        hora_inicio=hora_inicio,
+        hora_fin=hora_fin,
+        desde=desde,
+        hasta=hasta,
+    )
+    if not regla.horas():
+        raise ValueError("El rango horario debe cubrir al menos una hora.")
+    db.session.add(regla)
+    _registrar_cambio_regla(regla)
+    db.session.commit()
+    return regla
+
+
+def eliminar_regla(supervisor_id: int, regla_id: int) -> bool:
+    """Elimina una regla; las reservas ya hechas conservan su slot."""
+    regla = ReglaDisponibilidad.query.filter_by(id=regla_id, supervisor_id=supervisor_id).first()
+    if not regla:
+        return False
+    _registrar_cambio_regla(regla)
+    db.session.delete(regla)
+    db.session.commit()
+    return True
+
+
+def get_excepciones(supervisor_id: int, desde: date) -> list:
+    return (
+        ExcepcionDisponibilidad.query.filter(
+            ExcepcionDisponibilidad.supervisor_id == supervisor_id,
+            ExcepcionDisponibilidad.fecha >= desde,
+        )
+        .order_by(ExcepcionDisponibilidad.fecha, ExcepcionDisponibilidad.hora)
+        .all()
+    )
+
+
+def agregar_excepcion(supervisor_id: int, fecha: date, hora: str = None, motivo: str = None) -> bool:
+    """Excluye de las reglas un día completo (hora=None) o un slot. False si ya existía."""
+    if hora is not None:
+        _validar_hora(hora)
+    existe = ExcepcionDisponibilidad.query.filter_by(
+        supervisor_id=supervisor_id, fecha=fecha, hora=hora
     ).first()
-    if not disp:
+    if existe:
         return False
-    eval_activa = Evaluacion.query.filter(
-        Evaluacion.supervisor_id == supervisor_id,
-        Evaluacion.fecha == disp.fecha,
-        Evaluacion.hora == disp.hora,
-        Evaluacion.estado.in_(["PENDIENTE", "CONFIRMADO"]),
+    db.session.add(ExcepcionDisponibilidad(
+        supervisor_id=supervisor_id, fecha=fecha, hora=hora, motivo=motivo
+    ))
+    _registrar_cambio(supervisor_id, [fecha])
+    db.session.commit()
+    return True
+
+
+def eliminar_excepcion(supervisor_id: int, excepcion_id: int) -> bool:
+    excepcion = ExcepcionDisponibilidad.query.filter_by(
+        id=excepcion_id, supervisor_id=supervisor_id
     ).first()
-    if eval_activa:
+    if not excepcion:
         return False
-    db.session.delete(disp)
+    db.session.delete(excepcion)
+    _registrar_cambio(supervisor_id, [excepcion.fecha])
     db.session.commit()
     return True
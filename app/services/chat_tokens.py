@@ -0,0 +1,36 @@
+"""
+app/services/chat_tokens.py
+Tokens de acceso a las salas de chat de evaluaciones (servidor.py).
+
+El token firma (evaluacion_id, email) con SECRET_KEY; la app lo emite
+en los recordatorios y el servidor de chat lo verifica con la misma
+clave, sin consultar la base. No caduca por sí mismo: vale mientras la
+sala esté abierta, y la ventana de la sala (inicio_at - margen hasta
+fin_at + margen) la aplica el servidor con los datos de la evaluación.
+"""
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+SALT = "sala-chat"
+
+
+def _serializador(secret_key: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key, salt=SALT)
+
+
+def emitir_token_sala(evaluacion_id: int, email: str, secret_key: str = None) -> str:
+    """Token para entrar a la sala de `evaluacion_id` como `email`."""
+    if secret_key is None:
+        from flask import current_app
+        secret_key = current_app.config["SECRET_KEY"]
+    return _serializador(secret_key).dumps([evaluacion_id, email.lower()])
+
+
+def leer_token_sala(token: str, secret_key: str) -> tuple[int, str] | None:
+    """(evaluacion_id, email) si la firma es válida; None si no."""
+    try:
+        evaluacion_id, email = _serializador(secret_key).loads(token)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    if not isinstance(evaluacion_id, int) or not isinstance(email, str):
+        return None
+    return evaluacion_id, email
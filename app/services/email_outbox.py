@@ -0,0 +1,262 @@
+"""
+app/services/email_outbox.py
+Cola persistente de correos (tabla email_outbox) y worker de envío.
+
+Los servicios encolan mensajes dentro de su propia transacción; el job
+`procesar_outbox` del scheduler reclama lotes con FOR UPDATE SKIP LOCKED
+(varios procesos pueden trabajar en paralelo) y los entrega con
+`despachar`: EMAIL_OUTBOX_CONCURRENCIA hilos, cada uno con su propia
+conexión SMTP, y como máximo EMAIL_DOMINIO_POR_SEGUNDO envíos por
+segundo a un mismo dominio. El resultado de cada mensaje vuelve al job,
+que marca los entregados, reprograma los fallos con backoff exponencial
+hasta EMAIL_MAX_INTENTOS y, al entregarse el recordatorio del
+solicitante, marca la evaluación con recordatorio_enviado. Los que no
+llegan a enviarse porque la conexión SMTP cae se reprograman sin sumar
+un intento.
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from flask_mail import Message
+from sqlalchemy import exists, func, update
+
+from ..models import EmailOutbox, Evaluacion
+from .. import db, mail
+from .job_metrics import contar
+
+logger = logging.getLogger(__name__)
+
+TIPOS_RECORDATORIO = ("recordatorio_solicitante", "recordatorio_supervisor")
+
+
+def encolar(to: str | list, subject: str, html: str,
+            evaluacion_id: int = None, tipo: str = None) -> EmailOutbox:
+    """Agrega un correo a la cola. No hace commit: lo hace el llamador."""
+    recipients = [to] if isinstance(to, str) else to
+    msg = EmailOutbox(
+        destinatarios=",".join(recipients), asunto=subject, html=html,
+        evaluacion_id=evaluacion_id, tipo=tipo,
+    )
+    db.session.add(msg)
+    return msg
+
+
+def sin_recordatorio_encolado():
+    """Condición: la evaluación aún no tiene recordatorios en el outbox."""
+    return ~exists().where(
+        EmailOutbox.evaluacion_id == Evaluacion.id,
+        EmailOutbox.tipo.in_(TIPOS_RECORDATORIO),
+    )
+
+
+# ── Despacho concurrente ───────────────────────────────────────────
+
+class LimiteDominio:
+    """Espaciado mínimo entre envíos a un mismo dominio (compartido entre hilos)."""
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self._lock = threading.Lock()
+        self._proximo = {}   # dominio -> instante monotónico del próximo envío
+
+    def esperar(self, dominios) -> None:
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max([ahora] + [self._proximo.get(d, ahora) for d in dominios])
+            for d in dominios:
+                self._proximo[d] = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def despachar(app, mensajes: list) -> tuple[dict, Exception | None]:
+    """
+    Envía `mensajes` [(id, asunto, destinatarios, html, dominios)] con
+    hasta EMAIL_OUTBOX_CONCURRENCIA conexiones SMTP en paralelo.
+
+    Retorna ({id: None si se entregó, excepción si falló}, error de
+    conexión o None). Si la sesión SMTP de un carril se cae, el mensaje
+    en curso vuelve a la cola y el carril reconecta una vez; si tampoco
+    puede, termina y deja el resto a los otros carriles. Los mensajes que
+    ningún carril llegó a enviar no figuran en el diccionario.
+    """
+    concurrencia = max(1, min(app.config.get("EMAIL_OUTBOX_CONCURRENCIA", 4), len(mensajes)))
+    limite = LimiteDominio(app.config.get("EMAIL_DOMINIO_POR_SEGUNDO", 0))
+    cola = queue.SimpleQueue()
+    for m in mensajes:
+        cola.put(m)
+    resultados = {}
+
+    def carril():
+        # Cada hilo usa su propia conexión SMTP durante todo el lote
+        with app.app_context():
+            conn = None
+            reconectado = False
+            try:
+                while True:
+                    try:
+                        mensaje = cola.get_nowait()
+                    except queue.Empty:
+                        return
+                    msg_id, asunto, destinatarios, html, dominios = mensaje
+                    if conn is None:
+                        try:
+                            conn = mail.connect().__enter__()
+                        except Exception:
+                            cola.put(mensaje)
+                            raise
+                    limite.esperar(dominios)
+                    try:
+                        conn.send(Message(subject=asunto, recipients=destinatarios, html=html))
+                    except smtplib.SMTPServerDisconnected as exc:
+                        caida = exc
+                    except smtplib.SMTPException as exc:
+                        # Rechazo del mensaje (destinatario, contenido): cuenta como intento
+                        resultados[msg_id] = exc
+                        continue
+                    except OSError as exc:
+                        caida = exc
+                    except Exception as exc:
+                        resultados[msg_id] = exc
+                        continue
+                    else:
+                        resultados[msg_id] = None
+                        reconectado = False
+                        continue
+                    # La sesión se cayó: el mensaje no se da por intentado
+                    cola.put(mensaje)
+                    _cerrar(conn)
+                    conn = None
+                    if reconectado:
+                        raise caida
+                    reconectado = True
+            finally:
+                if conn is not None:
+                    _cerrar(conn)
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="outbox") as pool:
+        futuros = [pool.submit(carril) for _ in range(concurrencia)]
+    errores_conexion = [f.exception() for f in futuros if f.exception()]
+    if errores_conexion:
+        logger.warning(f"[Outbox] {len(errores_conexion)} conexiones SMTP fallaron: {errores_conexion[0]}")
+        return resultados, errores_conexion[0]
+    return resultados, None
+
+
+def _cerrar(conn) -> None:
+    """Cierra la conexión SMTP sin fallar si el servidor ya la cortó."""
+    try:
+        conn.__exit__(None, None, None)
+    except Exception:
+        if conn.host is not None:
+            conn.host.close()
+
+
+def procesar_outbox(app) -> int:
+    """Reclama un lote de correos pendientes y los envía. Retorna enviados."""
+    with app.app_context():
+        ahora = datetime.now(timezone.utc)
+        lote = (
+            EmailOutbox.query.filter(
+                EmailOutbox.estado == "PENDIENTE",
+                EmailOutbox.siguiente_intento_at <= ahora,
+            )
+            .order_by(EmailOutbox.id)
+            .limit(app.config.get("EMAIL_OUTBOX_BATCH_SIZE", 50))
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        contar(leidas=len(lote))
+        if not lote:
+            db.session.rollback()
+            return 0
+
+        resultados, error_conexion = despachar(app, [
+            (m.id, m.asunto, m.lista_destinatarios(), m.html, m.dominios()) for m in lote
+        ])
+
+        enviados = 0
+        recordados = []
+        for msg in lote:
+            if msg.id not in resultados:
+                # Ningún carril pudo enviarlo (conexión SMTP caída): no es un intento
+                _aplazar(app, msg, error_conexion)
+            elif resultados[msg.id] is not None:
+                _programar_reintento(app, msg, resultados[msg.id])
+            else:
+                msg.estado = "ENVIADO"
+                msg.enviado_at = datetime.now(timezone.utc)
+                enviados += 1
+                if msg.tipo == "recordatorio_solicitante" and msg.evaluacion_id:
+                    recordados.append(msg.evaluacion_id)
+        if recordados:
+            db.session.execute(
+                update(Evaluacion)
+                .where(Evaluacion.id.in_(recordados))
+                .values(recordatorio_enviado=True)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        contar(afectadas=enviados, errores=len(lote) - enviados)
+
+        if enviados:
+            logger.info(f"[Outbox] {enviados}/{len(lote)} correos enviados.")
+        return enviados
+
+
+def _aplazar(app, msg: EmailOutbox, exc: Exception) -> None:
+    """Reprograma un correo que no llegó a enviarse sin sumar un intento."""
+    msg.ultimo_error = str(exc)[:1000] if exc else None
+    msg.siguiente_intento_at = datetime.now(timezone.utc) + timedelta(
+        seconds=app.config.get("EMAIL_RETRY_BASE_SECONDS", 30)
+    )
+    logger.warning(f"[Outbox] Correo id={msg.id} sin enviar (conexión SMTP): {exc}")
+
+
+def _programar_reintento(app, msg: EmailOutbox, exc: Exception) -> None:
+    msg.intentos += 1
+    msg.ultimo_error = str(exc)[:1000]
+    if msg.intentos >= app.config.get("EMAIL_MAX_INTENTOS", 5):
+        msg.estado = "FALLIDO"
+        logger.error(f"[Outbox] Correo id={msg.id} descartado tras {msg.intentos} intentos: {exc}")
+        return
+    espera = min(
+        app.config.get("EMAIL_RETRY_BASE_SECONDS", 30) * 2 ** (msg.intentos - 1),
+        app.config.get("EMAIL_RETRY_MAX_SECONDS", 3600),
+    )
+    msg.siguiente_intento_at = datetime.now(timezone.utc) + timedelta(seconds=espera)
+    logger.warning(f"[Outbox] Correo id={msg.id} reintento en {espera}s: {exc}")
+
+
+def estadisticas_outbox() -> dict:
+    """
+    Profundidad de la cola por estado y tasa de envío, leídas de la tabla:
+    son las mismas desde cualquier worker, envíe o no correos.
+    """
+    por_estado = {
+        estado: (total, con_reintentos)
+        for estado, total, con_reintentos in db.session.query(
+            EmailOutbox.estado,
+            func.count(EmailOutbox.id),
+            func.count(EmailOutbox.id).filter(EmailOutbox.intentos > 0),
+        ).group_by(EmailOutbox.estado)
+    }
+    hace_un_minuto = datetime.now(timezone.utc) - timedelta(seconds=60)
+    por_minuto = db.session.query(func.count(EmailOutbox.id)).filter(
+        EmailOutbox.enviado_at >= hace_un_minuto
+    ).scalar()
+    pendientes, reintentando = por_estado.get("PENDIENTE", (0, 0))
+    return {
+        "pendientes": pendientes,
+        "reintentando": reintentando,
+        "enviados": por_estado.get("ENVIADO", (0, 0))[0],
+        "fallidos": por_estado.get("FALLIDO", (0, 0))[0],
+        "envios_ultimo_minuto": por_minuto,
+    }
@@ -0,0 +1,199 @@
+"""
+app/services/evaluation_timers.py
+Temporizadores por evaluación: vencimiento exacto y recordatorio.
+
+Al crear una evaluación se programa un job de un solo disparo en su
+expires_at; al confirmarla se cancela y se programa el recordatorio
+REMINDER_MINUTES_BEFORE antes de inicio_at; al rechazarla se cancela.
+Los jobs viven en un job store SQLAlchemy (tabla apscheduler_temporizadores)
+y sobreviven reinicios.
+
+Todos los procesos arrancan este scheduler en pausa para poder escribir
+en el job store; solo el líder (ver scheduler.py) lo reanuda y ejecuta
+los disparos. Entre disparos el scheduler duerme hasta el próximo
+next_run_time, pero el líder lo despierta en cada latido para ver los
+jobs agregados por otros procesos: en reposo el costo es una consulta
+al job store por latido (SCHEDULER_HEARTBEAT_SECONDS).
+"""
+import atexit
+import logging
+from datetime import datetime, timezone, timedelta
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import db
+from .job_metrics import instrumentar
+
+logger = logging.getLogger(__name__)
+
+TABLA = "apscheduler_temporizadores"
+
+temporizadores = BackgroundScheduler(
+    timezone="UTC",
+    job_defaults={"misfire_grace_time": None, "coalesce": True},
+)
+_app = None
+
+
+def _id_expiracion(evaluacion_id: int) -> str:
+    return f"expira:{evaluacion_id}"
+
+
+def _id_recordatorio(evaluacion_id: int) -> str:
+    return f"recuerda:{evaluacion_id}"
+
+
+def _utc(momento: datetime) -> datetime:
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+# ── Disparos (referenciados por nombre desde el job store) ─────────
+
+def expirar(evaluacion_id: int) -> None:
+    """Cancela la evaluación si sigue PENDIENTE y ya venció."""
+    from .scheduler import _cancelar_pendientes_expiradas
+    instrumentar("timer_expiracion", _cancelar_pendientes_expiradas)(_app, ids=[evaluacion_id])
+
+
+def recordar(evaluacion_id: int) -> None:
+    """Encola el recordatorio si la evaluación sigue CONFIRMADA y no se envió."""
+    from .scheduler import _enviar_recordatorios
+    instrumentar("timer_recordatorio", _enviar_recordatorios)(_app, ids=[evaluacion_id])
+
+
+# ── Programación (se aplica tras el commit) ────────────────────────
+
+def programar_expiracion(evaluacion) -> None:
+    _pendiente(_agregar, _id_expiracion(evaluacion.id), expirar, evaluacion.id,
+               _utc(evaluacion.expires_at))
+
+
+def al_confirmar(evaluacion) -> None:
+    """Cancela el vencimiento y programa el recordatorio."""
+    _pendiente(_quitar, _id_expiracion(evaluacion.id))
+    if evaluacion.inicio_at is None:
+        return
+    minutos = current_app.config.get("REMINDER_MINUTES_BEFORE", 60)
+    momento = _utc(evaluacion.inicio_at) - timedelta(minutes=minutos)
+    _pendiente(_agregar, _id_recordatorio(evaluacion.id), recordar, evaluacion.id,
+               max(momento, datetime.now(timezone.utc)))
+
+
+def al_rechazar(evaluacion) -> None:
+    _pendiente(_quitar, _id_expiracion(evaluacion.id))
+
+
+def _pendiente(accion, *args) -> None:
+    db.session.info.setdefault("temporizadores_pendientes", []).append((accion, args))
+
+
+def _agregar(job_id: str, fn, evaluacion_id: int, momento: datetime) -> None:
+    temporizadores.add_job(
+        fn, trigger="date", run_date=momento, args=[evaluacion_id],
+        id=job_id, replace_existing=True,
+    )
+
+
+def _quitar(job_id: str) -> None:
+    try:
+        temporizadores.remove_job(job_id)
+    except JobLookupError:
+        pass
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_tras_commit(session):
+    acciones = session.info.pop("temporizadores_pendientes", None)
+    if not acciones or not temporizadores.running:
+        return
+    for accion, args in acciones:
+        try:
+            accion(*args)
+        except Exception as exc:
+            # El barrido periódico del líder vuelve a programarlo
+            logger.error(f"[Temporizadores] {accion.__name__}{args[:1]} falló: {exc}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop("temporizadores_pendientes", None)
+
+
+# ── Rehidratación ──────────────────────────────────────────────────
+
+def rehidratar(app) -> int:
+    """
+    Programa los temporizadores que falten según el estado en la base
+    (evaluaciones creadas antes de este mecanismo o cuyo job no se pudo
+    escribir). Retorna cuántos agregó.
+    """
+    with app.app_context():
+        from ..models import Evaluacion
+        from .email_outbox import sin_recordatorio_encolado
+
+        ahora = datetime.now(timezone.utc)
+        minutos = app.config.get("REMINDER_MINUTES_BEFORE", 60)
+        existentes = {job.id for job in temporizadores.get_jobs()}
+        agregados = 0
+
+        pendientes = db.session.query(Evaluacion.id, Evaluacion.expires_at).filter(
+            Evaluacion.estado == "PENDIENTE",
+            Evaluacion.expires_at > ahora,
+        ).all()
+        for evaluacion_id, expires_at in pendientes:
+            if _id_expiracion(evaluacion_id) not in existentes:
+                _agregar(_id_expiracion(evaluacion_id), expirar, evaluacion_id, _utc(expires_at))
+                agregados += 1
+
+        confirmadas = db.session.query(Evaluacion.id, Evaluacion.inicio_at).filter(
+            Evaluacion.estado == "CONFIRMADO",
+            Evaluacion.recordatorio_enviado == False,
+            Evaluacion.inicio_at > ahora,
+            sin_recordatorio_encolado(),
+        ).all()
+        for evaluacion_id, inicio_at in confirmadas:
+            if _id_recordatorio(evaluacion_id) not in existentes:
+                momento = max(_utc(inicio_at) - timedelta(minutes=minutos), ahora)
+                _agregar(_id_recordatorio(evaluacion_id), recordar, evaluacion_id, momento)
+                agregados += 1
+        return agregados
+
+
+# ── Ciclo de vida ──────────────────────────────────────────────────
+
+def init_temporizadores(app) -> None:
+    """Arranca el scheduler de temporizadores en pausa (requiere app context)."""
+    global _app
+    _app = app
+    if temporizadores.running:
+        return
+    temporizadores.add_jobstore(SQLAlchemyJobStore(engine=db.engine, tablename=TABLA))
+    temporizadores.start(paused=True)
+    atexit.register(detener)
+
+
+def reanudar() -> None:
+    if temporizadores.state == STATE_PAUSED:
+        temporizadores.resume()
+
+
+def pausar() -> None:
+    if temporizadores.state == STATE_RUNNING:
+        temporizadores.pause()
+
+
+def despertar() -> None:
+    """Relee el job store para ver temporizadores agregados por otros procesos."""
+    if temporizadores.state == STATE_RUNNING:
+        temporizadores.wakeup()
+
+
+def detener() -> None:
+    if temporizadores.running:
+        temporizadores.shutdown(wait=False)
@@ -0,0 +1,183 @@
+"""
+app/services/job_metrics.py
+Métricas de ejecución de los jobs del scheduler.
+
+Cada job registrado con `instrumentar` deja una fila en job_runs
+(inicio, duración, filas leídas/afectadas, errores) y actualiza
+contadores en proceso que se exponen en /metrics (en run_scheduler.py,
+en SCHEDULER_METRICS_PORT). Los jobs frecuentes pueden omitir la fila
+de las ejecuciones sin trabajo (registrar_vacias=False). Las ejecuciones
+que APScheduler omite (instancia previa aún corriendo o ejecución
+perdida) se registran con estado OMITIDO.
+"""
+import functools
+import logging
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+
+from ..models import JobRun
+from .. import db
+from .metrics import Contador, Histograma, registrar_colector
+
+logger = logging.getLogger(__name__)
+
+# ── Contadores en proceso ──────────────────────────────────────────
+duracion_jobs = Histograma(
+    "evaluacal_job_duration_seconds",
+    "Duración de ejecuciones de jobs del scheduler.",
+    ("job",),
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 600),
+)
+ejecuciones_jobs = Contador(
+    "evaluacal_job_runs_total", "Ejecuciones de jobs por estado.", ("job", "estado")
+)
+filas_jobs = Contador(
+    "evaluacal_job_rows_total", "Filas leídas/afectadas por jobs.", ("job", "tipo")
+)
+registrar_colector(
+    lambda: duracion_jobs.exponer() + ejecuciones_jobs.exponer() + filas_jobs.exponer()
+)
+
+_actual = threading.local()
+_ultima_poda = 0.0
+
+
+def contar(leidas: int = 0, afectadas: int = 0, errores: int = 0) -> None:
+    """Suma contadores a la ejecución en curso (no-op fuera de un job)."""
+    ejecucion = getattr(_actual, "ejecucion", None)
+    if ejecucion is None:
+        return
+    ejecucion["filas_leidas"] += leidas
+    ejecucion["filas_afectadas"] += afectadas
+    ejecucion["errores"] += errores
+
+
+def instrumentar(job_id: str, fn, registrar_vacias: bool = True):
+    """
+    Envuelve un job `fn(app)` para medir y registrar cada ejecución.
+    Con registrar_vacias=False, una ejecución correcta que no leyó filas
+    solo actualiza los contadores en proceso, sin fila en job_runs.
+    """
+
+    @functools.wraps(fn)
+    def envoltura(app, *args, **kwargs):
+        ejecucion = {"filas_leidas": 0, "filas_afectadas": 0, "errores": 0}
+        _actual.ejecucion = ejecucion
+        inicio_at = datetime.now(timezone.utc)
+        inicio = time.perf_counter()
+        estado, detalle = "OK", None
+        try:
+            return fn(app, *args, **kwargs)
+        except Exception as exc:
+            estado, detalle = "ERROR", str(exc)[:500]
+            ejecucion["errores"] += 1
+            raise
+        finally:
+            _actual.ejecucion = None
+            vacia = estado == "OK" and not ejecucion["filas_leidas"]
+            _registrar(
+                app, job_id, inicio_at, time.perf_counter() - inicio, estado, detalle,
+                persistir=registrar_vacias or not vacia, **ejecucion
+            )
+
+    return envoltura
+
+
+def _registrar(app, job_id, inicio_at, duracion, estado, detalle=None,
+               filas_leidas=0, filas_afectadas=0, errores=0, persistir=True) -> None:
+    duracion_jobs.observar(duracion, job_id)
+    ejecuciones_jobs.incrementar(1, job_id, estado)
+    if filas_leidas:
+        filas_jobs.incrementar(filas_leidas, job_id, "leidas")
+    if filas_afectadas:
+        filas_jobs.incrementar(filas_afectadas, job_id, "afectadas")
+    if not persistir:
+        return
+    try:
+        with app.app_context():
+            db.session.add(JobRun(
+                job_id=job_id,
+                inicio_at=inicio_at,
+                duracion_ms=int(duracion * 1000),
+                filas_leidas=filas_leidas,
+                filas_afectadas=filas_afectadas,
+                errores=errores,
+                estado=estado,
+                detalle=detalle,
+            ))
+            _podar(app)
+            db.session.commit()
+    except Exception as exc:
+        logger.error(f"[Jobs] No se pudo registrar la ejecución de {job_id}: {exc}")
+
+
+def _podar(app) -> None:
+    """Borra job_runs más viejos que JOB_RUNS_RETENCION_DIAS (como mucho una vez por hora)."""
+    global _ultima_poda
+    if time.monotonic() - _ultima_poda < 3600:
+        return
+    _ultima_poda = time.monotonic()
+    limite = datetime.now(timezone.utc) - timedelta(days=app.config.get("JOB_RUNS_RETENCION_DIAS", 30))
+    JobRun.query.filter(JobRun.inicio_at < limite).delete(synchronize_session=False)
+
+
+def escuchar_omitidos(scheduler, app) -> None:
+    """Registra como OMITIDO cada ejecución que APScheduler no llegó a correr."""
+
+    def _omitido(evento):
+        motivo = "instancia previa en curso" if evento.code == EVENT_JOB_MAX_INSTANCES else "ejecución perdida"
+        logger.warning(f"[Jobs] {evento.job_id} omitido: {motivo}.")
+        _registrar(app, evento.job_id, datetime.now(timezone.utc), 0.0, "OMITIDO", motivo)
+
+    scheduler.add_listener(_omitido, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+
+# ── Consultas para el panel admin ──────────────────────────────────
+
+def _percentil(valores: list, p: float) -> int:
+    if not valores:
+        return 0
+    k = max(0, min(len(valores) - 1, round(p * (len(valores) - 1))))
+    return valores[k]
+
+
+def resumen_jobs(horas: int = 24) -> list:
+    """Por job: ejecuciones, p50/p95/máx de duración, errores y omitidos en la ventana."""
+    desde = datetime.now(timezone.utc) - timedelta(hours=horas)
+    filas = (
+        db.session.query(JobRun.job_id, JobRun.estado, JobRun.duracion_ms, JobRun.errores,
+                         JobRun.filas_afectadas, JobRun.inicio_at)
+        .filter(JobRun.inicio_at >= desde)
+        .order_by(JobRun.job_id, JobRun.inicio_at)
+        .all()
+    )
+    por_job = {}
+    for job_id, estado, duracion_ms, errores, afectadas, inicio_at in filas:
+        r = por_job.setdefault(job_id, {
+            "job_id": job_id, "ejecuciones": 0, "omitidos": 0, "errores": 0,
+            "filas_afectadas": 0, "duraciones": [], "ultima": None,
+        })
+        r["ultima"] = inicio_at
+        if estado == "OMITIDO":
+            r["omitidos"] += 1
+            continue
+        r["ejecuciones"] += 1
+        r["errores"] += errores
+        r["filas_afectadas"] += afectadas
+        r["duraciones"].append(duracion_ms)
+
+    resumen = []
+    for r in por_job.values():
+        duraciones = sorted(r.pop("duraciones"))
+        r["p50_ms"] = _percentil(duraciones, 0.5)
+        r["p95_ms"] = _percentil(duraciones, 0.95)
+        r["max_ms"] = duraciones[-1] if duraciones else 0
+        resumen.append(r)
+    return resumen
+
+
+def ultimas_ejecuciones(limit: int = 50) -> list:
+    return JobRun.query.order_by(JobRun.inicio_at.desc(), JobRun.id.desc()).limit(limit).all()
@@ -0,0 +1,209 @@
+"""
+app/services/metrics.py
+Instrumentación opcional de requests y SQL (METRICS_ENABLED).
+
+Con la opción activa registra por endpoint un histograma de latencia,
+cantidad y tiempo de sentencias SQL (eventos before/after_cursor_execute),
+loguea las consultas lentas con el endpoint que las originó y expone todo
+en formato Prometheus en /metrics y como cabecera Server-Timing.
+Desactivada no registra ningún hook: el costo es nulo.
+
+Las métricas son por proceso; con varios workers de gunicorn cada uno
+expone las suyas.
+"""
+import logging
+import threading
+import time
+
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+
+from .. import db
+
+logger = logging.getLogger(__name__)
+
+# Límites de los buckets en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_colectores = []
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas, al estilo Prometheus."""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple, buckets: tuple = BUCKETS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self._series = {}    # valores de etiquetas -> [conteos por bucket, suma, total]
+
+    def observar(self, valor: float, *etiquetas) -> None:
+        with _lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def series(self) -> dict:
+        with _lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, (conteos, suma, total) in sorted(self.series().items()):
+            base = _etiquetas(self.etiquetas, valores)
+            for limite, n in zip(self.buckets, conteos):
+                lineas.append(f'{self.nombre}_bucket{{{base},le="{limite}"}} {n}')
+            lineas.append(f'{self.nombre}_bucket{{{base},le="+Inf"}} {total}')
+            lineas.append(f"{self.nombre}_sum{{{base}}} {suma:.6f}")
+            lineas.append(f"{self.nombre}_count{{{base}}} {total}")
+        return lineas
+
+
+class Contador:
+    """Contador monotónico con etiquetas."""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores = {}
+
+    def incrementar(self, valor: float = 1, *etiquetas) -> None:
+        with _lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with _lock:
+            valores = sorted(self._valores.items())
+        for etiquetas, valor in valores:
+            if self.etiquetas:
+                lineas.append(f"{self.nombre}{{{_etiquetas(self.etiquetas, etiquetas)}}} {valor:g}")
+            else:
+                lineas.append(f"{self.nombre} {valor:g}")
+        return lineas
+
+
+def _etiquetas(nombres: tuple, valores: tuple) -> str:
+    return ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores))
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def registrar_colector(fn) -> None:
+    """Agrega una función que retorna líneas extra para /metrics."""
+    _colectores.append(fn)
+
+
+# ── Métricas de requests y SQL ─────────────────────────────────────
+
+latencia = Histograma(
+    "evaluacal_http_request_duration_seconds",
+    "Latencia de requests por endpoint.",
+    ("endpoint", "method", "status"),
+)
+sql_por_request = Histograma(
+    "evaluacal_http_sql_queries",
+    "Sentencias SQL ejecutadas por request.",
+    ("endpoint",),
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+sql_tiempo = Contador(
+    "evaluacal_sql_duration_seconds_total",
+    "Tiempo total en SQL por endpoint.",
+    ("endpoint",),
+)
+sql_lentas = Contador(
+    "evaluacal_sql_slow_queries_total",
+    "Consultas por encima de METRICS_SLOW_QUERY_MS.",
+    ("endpoint",),
+)
+
+_motores = set()   # engines con los eventos SQL ya instalados
+
+
+def init_metrics(app) -> None:
+    """Instala los hooks y /metrics solo si METRICS_ENABLED."""
+    if not app.config.get("METRICS_ENABLED", False):
+        return
+
+    lenta = app.config.get("METRICS_SLOW_QUERY_MS", 200) / 1000
+    server_timing = app.config.get("METRICS_SERVER_TIMING", True)
+    token = app.config.get("METRICS_TOKEN")
+
+    @app.before_request
+    def _iniciar_medicion():
+        g.metrics_inicio = time.perf_counter()
+        g.metrics_sql_n = 0
+        g.metrics_sql_s = 0.0
+
+    @app.after_request
+    def _cerrar_medicion(response):
+        inicio = g.pop("metrics_inicio", None)
+        if inicio is None:
+            return response
+        duracion = time.perf_counter() - inicio
+        endpoint = request.endpoint or "sin_ruta"
+        n, sql_s = g.pop("metrics_sql_n", 0), g.pop("metrics_sql_s", 0.0)
+        latencia.observar(duracion, endpoint, request.method, f"{response.status_code // 100}xx")
+        sql_por_request.observar(n, endpoint)
+        if sql_s:
+            sql_tiempo.incrementar(sql_s, endpoint)
+        if server_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'app;dur={duracion * 1000:.1f}, db;dur={sql_s * 1000:.1f};desc="{n} queries"',
+            )
+        return response
+
+    with app.app_context():
+        _instalar_eventos_sql(db.engine, lenta)
+
+    def metrics():
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        lineas = latencia.exponer() + sql_por_request.exponer()
+        lineas += sql_tiempo.exponer() + sql_lentas.exponer()
+        for colector in _colectores:
+            lineas += colector()
+        return Response("\n".join(lineas) + "\n", mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+
+def _instalar_eventos_sql(engine, lenta: float) -> None:
+    if engine in _motores:
+        return
+    _motores.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get("metrics_inicio")
+        if not pila:
+            return
+        duracion = time.perf_counter() - pila.pop()
+        endpoint = "-"
+        if has_request_context():
+            endpoint = request.endpoint or "sin_ruta"
+            if "metrics_sql_n" in g:
+                g.metrics_sql_n += 1
+                g.metrics_sql_s += duracion
+        if duracion >= lenta:
+            sql_lentas.incrementar(1, endpoint)
+            logger.warning(
+                f"[SQL lenta] {duracion * 1000:.0f} ms endpoint={endpoint}: "
+                f"{' '.join(statement.split())[:500]}"
+            )
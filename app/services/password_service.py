@@ -0,0 +1,166 @@
+"""
+app/services/password_service.py
+Hash y verificación de contraseñas con bcrypt fuera del hilo del request.
+
+El costo es BCRYPT_ROUNDS; al iniciar sesión con un hash de otro costo se
+rehashea de forma transparente. Con PASSWORD_POOL_WORKERS > 0 el trabajo
+de bcrypt corre en un ThreadPoolExecutor acotado por proceso (bcrypt
+suelta el GIL, así que los hilos calculan en paralelo sin hacer fork de
+un proceso que ya corre los hilos de APScheduler), con a lo sumo
+PASSWORD_POOL_MAX_PENDIENTES operaciones en curso. Por encima de ese
+cupo, o si una operación no termina en PASSWORD_POOL_TIMEOUT_SECONDS, se
+lanza PoolSaturado y la ruta responde 503 con Retry-After. Un email
+inexistente se verifica contra un hash ficticio del mismo costo para que
+el tiempo de respuesta no revele si la cuenta existe; ese hash se calcula
+al crear la app (init_passwords), no en el primer login.
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturoVencido
+
+import bcrypt
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+RONDAS_POR_DEFECTO = 12
+
+
+class PoolSaturado(Exception):
+    """Demasiadas operaciones de contraseña en curso en este proceso."""
+
+
+# ── Trabajo de bcrypt (corre en los hilos del pool) ────────────────
+
+def _hashear(password: bytes, rondas: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rondas))
+
+
+def _verificar(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+# ── Pool por proceso ───────────────────────────────────────────────
+
+_lock = threading.Lock()
+_pool = None
+_cupos = None
+_hash_ficticio = {}    # rondas -> hash, calculado en init_passwords
+
+
+def _config(clave: str, defecto):
+    return current_app.config.get(clave, defecto) if has_app_context() else defecto
+
+
+def _rondas() -> int:
+    return _config("BCRYPT_ROUNDS", RONDAS_POR_DEFECTO)
+
+
+def _obtener_pool():
+    """Crea el pool y su cupo la primera vez (después del fork de gunicorn)."""
+    global _pool, _cupos
+    workers = _config("PASSWORD_POOL_WORKERS", 0)
+    if not workers:
+        return None, None
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+            _cupos = threading.BoundedSemaphore(_config("PASSWORD_POOL_MAX_PENDIENTES", 32))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool, _cupos
+
+
+def _descartar_pool(pool) -> None:
+    """Olvida un pool roto para que la próxima operación cree otro."""
+    global _pool, _cupos
+    with _lock:
+        if _pool is pool:
+            _pool, _cupos = None, None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _enviar(pool, cupos, fn, args):
+    if not cupos.acquire(blocking=False):
+        raise PoolSaturado()
+    try:
+        futuro = pool.submit(fn, *args)
+    except Exception:
+        cupos.release()
+        raise
+    futuro.add_done_callback(lambda _: cupos.release())
+    return futuro
+
+
+def _ejecutar(fn, *args):
+    pool, cupos = _obtener_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        futuro = _enviar(pool, cupos, fn, args)
+    except BrokenExecutor:
+        logger.warning("[Auth] Pool de contraseñas roto: se crea otro y se reintenta.")
+        _descartar_pool(pool)
+        pool, cupos = _obtener_pool()
+        futuro = _enviar(pool, cupos, fn, args)
+    try:
+        return futuro.result(timeout=_config("PASSWORD_POOL_TIMEOUT_SECONDS", 10))
+    except FuturoVencido:
+        # La operación sigue ocupando su cupo hasta terminar
+        futuro.cancel()
+        raise PoolSaturado() from None
+
+
+# ── API ────────────────────────────────────────────────────────────
+
+def init_passwords(app) -> None:
+    """Precalcula el hash ficticio para BCRYPT_ROUNDS (en el hilo de arranque)."""
+    rondas = app.config.get("BCRYPT_ROUNDS", RONDAS_POR_DEFECTO)
+    if rondas not in _hash_ficticio:
+        _hash_ficticio[rondas] = _hashear(b"ficticio", rondas)
+
+
+def hashear(password: str) -> str:
+    return _ejecutar(_hashear, password.encode("utf-8"), _rondas()).decode("utf-8")
+
+
+def verificar(password: str, password_hash: str) -> bool:
+    return _ejecutar(_verificar, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+
+def rondas_de(password_hash: str) -> int:
+    """Costo codificado en un hash bcrypt ("$2b$12$...")."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def necesita_rehash(password_hash: str) -> bool:
+    return rondas_de(password_hash) != _rondas()
+
+
+def verificar_ficticio(password: str) -> None:
+    """Gasta lo mismo que una verificación real (email inexistente)."""
+    verificar(password, _hash_ficticio[_rondas()].decode("utf-8"))
+
+
+def autenticar(email: str, password: str):
+    """
+    Usuario activo con ese email y contraseña, o None.
+    Si el hash tiene otro costo que BCRYPT_ROUNDS lo rehashea (sin commit).
+    Puede lanzar PoolSaturado.
+    """
+    from ..models import User
+
+    user = User.query.filter_by(email=email, activo=True).first()
+    if user is None:
+        verificar_ficticio(password)
+        return None
+    if not verificar(password, user.password_hash):
+        return None
+    if necesita_rehash(user.password_hash):
+        logger.info(f"[Auth] Rehash de contraseña de {user.email} a {_rondas()} rondas.")
+        user.password_hash = hashear(password)
+    return user
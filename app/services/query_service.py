@@ -0,0 +1,124 @@
+"""
+app/services/query_service.py
+Consultas de listado de evaluaciones con carga anticipada de relaciones.
+
+Las relaciones Evaluacion→User/Challenge son backrefs lazy: iterar un
+listado y tocar ev.supervisor / ev.challenge dispara un SELECT por fila.
+Estas consultas las cargan en el mismo SELECT (joinedload).
+
+Los listados históricos se paginan por keyset sobre (created_at, id)
+con cursores opacos: cualquier página cuesta lo mismo que la primera.
+"""
+import base64
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+from ..models import Evaluacion
+
+
+def con_relaciones(query, supervisor: bool = True, challenge: bool = True):
+    """Agrega joinedload de supervisor y/o challenge a una consulta de Evaluacion."""
+    opciones = []
+    if supervisor:
+        opciones.append(joinedload(Evaluacion.supervisor))
+    if challenge:
+        opciones.append(joinedload(Evaluacion.challenge))
+    return query.options(*opciones)
+
+
+def evaluaciones_recientes(limit: int = 10) -> list:
+    """Últimas evaluaciones creadas (dashboard admin)."""
+    return (
+        con_relaciones(Evaluacion.query)
+        .order_by(Evaluacion.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def codificar_cursor(evaluacion) -> str:
+    """Cursor opaco que apunta a la posición de `evaluacion` en el listado."""
+    raw = f"{evaluacion.created_at.isoformat()}|{evaluacion.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    """Retorna (created_at, id) o None si el cursor está vacío o es inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, eval_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(eval_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginar(query, cursor: str = None, limit: int = 50):
+    """
+    Aplica paginación keyset descendente por (created_at, id).
+    Retorna (items, siguiente_cursor); siguiente_cursor es None en la última página.
+    """
+    posicion = decodificar_cursor(cursor)
+    if posicion is not None:
+        query = query.filter(tuple_(Evaluacion.created_at, Evaluacion.id) < posicion)
+    items = (
+        query.order_by(Evaluacion.created_at.desc(), Evaluacion.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(items) > limit:
+        items = items[:limit]
+        return items, codificar_cursor(items[-1])
+    return items, None
+
+
+def listar_evaluaciones(estado: str = None, cursor: str = None, limit: int = 100):
+    """Listado global de evaluaciones paginado, opcionalmente filtrado por estado."""
+    q = con_relaciones(Evaluacion.query)
+    if estado:
+        q = q.filter(Evaluacion.estado == estado)
+    return paginar(q, cursor, limit)
+
+
+def pendientes_supervisor(supervisor_id: int) -> list:
+    """Solicitudes PENDIENTE de un supervisor, por fecha y hora."""
+    return (
+        con_relaciones(Evaluacion.query, supervisor=False)
+        .filter(
+            Evaluacion.supervisor_id == supervisor_id,
+            Evaluacion.estado == "PENDIENTE",
+        )
+        .order_by(Evaluacion.fecha, Evaluacion.hora)
+        .all()
+    )
+
+
+def proximas_supervisor(supervisor_id: int, desde, limit: int = 20) -> list:
+    """Evaluaciones CONFIRMADAS de un supervisor a partir de `desde`."""
+    return (
+        con_relaciones(Evaluacion.query, supervisor=False)
+        .filter(
+            Evaluacion.supervisor_id == supervisor_id,
+            Evaluacion.estado == "CONFIRMADO",
+            Evaluacion.fecha >= desde,
+        )
+        .order_by(Evaluacion.fecha, Evaluacion.hora)
+        .limit(limit)
+        .all()
+    )
+
+
+def historial_supervisor(supervisor_id: int, cursor: str = None, limit: int = 50):
+    """Historial paginado de un supervisor, más recientes primero."""
+    q = con_relaciones(Evaluacion.query, supervisor=False).filter(
+        Evaluacion.supervisor_id == supervisor_id
+    )
+    return paginar(q, cursor, limit)
+
+
+def evaluaciones_por_ids(ids) -> list:
+    """Evaluaciones con sus relaciones, para renderizar correos en lote."""
+    if not ids:
+        return []
+    return con_relaciones(Evaluacion.query).filter(Evaluacion.id.in_(ids)).all()
@@ -1,108 +1,282 @@
 """
 app/services/scheduler.py
 Tareas automáticas programadas con APScheduler:
-  · Cancelación de evaluaciones pendientes a las 12 horas.
-  · Recordatorio 1 hora antes de evaluaciones confirmadas.
+  · Cancelación de evaluaciones pendientes a las 12 horas y recordatorio
+    1 hora antes de las confirmadas, con temporizadores exactos por
+    evaluación (evaluation_timers) y un barrido horario de respaldo.
+  · Envío de la cola de correos (email_outbox).
+  · Refresco del snapshot de estadísticas (opcional).
+
+Con varios procesos (gunicorn con N workers, run_scheduler.py) solo el
+líder elegido por scheduler_leader ejecuta los jobs y los temporizadores.
 """
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from sqlalchemy import select, update
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+import atexit
 import logging
 
 logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler(timezone="UTC")
 
 
-def _cancelar_pendientes_expiradas(app):
-    """Cancela evaluaciones PENDIENTE cuyo expires_at ya pasó."""
+def _cancelar_pendientes_expiradas(app, ids=None):
+    """
+    Cancela evaluaciones PENDIENTE cuyo expires_at ya pasó (solo las de
+    `ids` si se indica, como hace el temporizador de cada evaluación).
+
+    Trabaja por lotes de EXPIRY_BATCH_SIZE: un UPDATE que cancela y
+    retorna las filas, otro que libera sus disponibilidades y un commit
+    por lote que incluye los correos encolados en email_outbox.
+    """
     with app.app_context():
         from ..models import Evaluacion
         from .. import db
-        from .email_service import enviar_cancelacion_auto
+        from .availability_service import liberar_slots
+        from .email_service import enviar_cancelacion_auto_lote
+        from .query_service import evaluaciones_por_ids
+        from .stats_service import registrar_transicion
+        from .job_metrics import contar
 
+        tam_lote = app.config.get("EXPIRY_BATCH_SIZE", 500)
+        max_lotes = app.config.get("EXPIRY_MAX_BATCHES_PER_RUN", 10)
         ahora = datetime.now(timezone.utc)
-        expiradas = Evaluacion.query.filter(
-            Evaluacion.estado == "PENDIENTE",
-            Evaluacion.expires_at <= ahora,
-        ).all()
 
-        for ev in expiradas:
-            ev.cancelar_auto()
-            # Liberar disponibilidad
-            from ..models import Disponibilidad
-            disp = Disponibilidad.query.filter_by(
-                supervisor_id=ev.supervisor_id,
-                fecha=ev.fecha,
-                hora=ev.hora,
-            ).first()
-            if disp:
-                disp.disponible = True
+        condiciones = [Evaluacion.estado == "PENDIENTE", Evaluacion.expires_at <= ahora]
+        if ids is not None:
+            condiciones.append(Evaluacion.id.in_(ids))
+
+        for _ in range(max_lotes):
+            ids_expirados = (
+                select(Evaluacion.id)
+                .where(*condiciones)
+                .order_by(Evaluacion.expires_at)
+                .limit(tam_lote)
+                .scalar_subquery()
+            )
+            canceladas = db.session.execute(
+                update(Evaluacion)
+                .where(
+                    Evaluacion.id.in_(ids_expirados),
+                    Evaluacion.estado == "PENDIENTE",
+                )
+                .values(estado="CANCELADO_AUTO")
+                .returning(
+                    Evaluacion.id,
+                    Evaluacion.supervisor_id,
+                    Evaluacion.fecha,
+                    Evaluacion.hora,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not canceladas:
+                break
+            contar(leidas=len(canceladas), afectadas=len(canceladas))
+
+            liberar_slots([(c.supervisor_id, c.fecha, c.hora) for c in canceladas])
+            registrar_transicion("PENDIENTE", "CANCELADO_AUTO", len(canceladas))
+            ids = [c.id for c in canceladas]
+            enviar_cancelacion_auto_lote(evaluaciones_por_ids(ids))
             db.session.commit()
-            try:
-                enviar_cancelacion_auto(ev)
-            except Exception as e:
-                logger.error(f"Error enviando email cancelación auto id={ev.id}: {e}")
-            logger.info(f"Evaluacion id={ev.id} cancelada automáticamente.")
+            logger.info(f"{len(ids)} evaluaciones canceladas automáticamente.")
+            if len(canceladas) < tam_lote:
+                break
 
 
-def _enviar_recordatorios(app):
-    """Envía recordatorio 1 hora antes de evaluaciones CONFIRMADAS."""
+def _enviar_recordatorios(app, ids):
+    """Envía el recordatorio de las evaluaciones `ids` que sigan CONFIRMADAS."""
     with app.app_context():
         from ..models import Evaluacion
         from .. import db
-        from .email_service import enviar_recordatorio
-        from datetime import date as date_type, time as time_type
-        import datetime as dt
+        from .email_outbox import sin_recordatorio_encolado
+        from .email_service import enviar_recordatorio_lote
+        from .query_service import con_relaciones
+        from .job_metrics import contar
 
-        ahora = datetime.now(timezone.utc)
-        ventana_inicio = ahora + timedelta(minutes=55)
-        ventana_fin = ahora + timedelta(minutes=65)
-
-        confirmadas = Evaluacion.query.filter(
+        # recordatorio_enviado lo marca el outbox cuando el correo se entrega
+        confirmadas = con_relaciones(Evaluacion.query).filter(
+            Evaluacion.id.in_(ids),
             Evaluacion.estado == "CONFIRMADO",
             Evaluacion.recordatorio_enviado == False,
+            Evaluacion.inicio_at > datetime.now(timezone.utc),
+            sin_recordatorio_encolado(),
         ).all()
 
-        for ev in confirmadas:
-            # Construir datetime de la evaluación
-            hora_parts = ev.hora.split(":")
-            eval_dt = datetime(
-                ev.fecha.year, ev.fecha.month, ev.fecha.day,
-                int(hora_parts[0]), int(hora_parts[1]),
-                tzinfo=timezone.utc
-            )
-            if ventana_inicio <= eval_dt <= ventana_fin:
-                try:
-                    enviar_recordatorio(ev)
-                    ev.recordatorio_enviado = True
-                    db.session.commit()
-                    logger.info(f"Recordatorio enviado para evaluacion id={ev.id}")
-                except Exception as e:
-                    logger.error(f"Error enviando recordatorio id={ev.id}: {e}")
+        contar(leidas=len(confirmadas))
+        if not confirmadas:
+            return
+        enviar_recordatorio_lote(confirmadas)
+        db.session.commit()
+        contar(afectadas=len(confirmadas))
+        logger.info(f"{len(confirmadas)} recordatorios encolados.")
 
 
-def init_scheduler(app):
-    """Inicializa y arranca el scheduler con la app Flask."""
-    if scheduler.running:
-        return
+def _barrer_temporizadores(app):
+    """
+    Respaldo de los temporizadores: cancela en lote lo que ya venció
+    (p. ej. mientras no había líder) y reprograma los que falten.
+    """
+    from .evaluation_timers import rehidratar
+    from .job_metrics import contar
+
+    _cancelar_pendientes_expiradas(app)
+    contar(afectadas=rehidratar(app))
+
+
+def _refrescar_estadisticas(app):
+    """Recalcula el snapshot de estadísticas del dashboard admin."""
+    with app.app_context():
+        from .stats_service import refrescar_snapshot
+        refrescar_snapshot()
+
+
+def intervalos_jobs(config) -> dict:
+    """
+    {job_id: segundos} de los jobs periódicos del líder según la
+    configuración: es el mismo en cualquier proceso, corra o no los jobs
+    (web workers con SCHEDULER_MODE=ninguno o que no son líderes).
+    """
+    intervalos = {
+        "barrer_temporizadores": config.get("TIMERS_SWEEP_MINUTES", 60) * 60,
+        "procesar_outbox": config.get("EMAIL_OUTBOX_INTERVAL_SECONDS", 15),
+    }
+    if config.get("ADMIN_STATS_SNAPSHOT"):
+        intervalos["refrescar_estadisticas"] = config.get("ADMIN_STATS_REFRESH_MINUTES", 30) * 60
+    return intervalos
+
+
+JOBS_LIDER = (
+    "barrer_temporizadores",
+    "refrescar_estadisticas",
+    "procesar_outbox",
+)
+
+_es_lider = False
+
+
+def es_lider() -> bool:
+    return _es_lider
+
+
+def _agregar_jobs_lider(app):
+    """Registra los jobs que solo corre el proceso líder."""
+    from .job_metrics import instrumentar
 
+    intervalos = intervalos_jobs(app.config)
+
+    # Corre al asumir el liderazgo (rehidrata tras un reinicio) y luego cada hora
+    scheduler.add_job(
+        func=instrumentar("barrer_temporizadores", _barrer_temporizadores),
+        args=[app],
+        trigger=IntervalTrigger(seconds=intervalos["barrer_temporizadores"]),
+        id="barrer_temporizadores",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(timezone.utc),
+        name="Barrido de respaldo de temporizadores",
+    )
+
+    if app.config.get("ADMIN_STATS_SNAPSHOT"):
+        scheduler.add_job(
+            func=instrumentar("refrescar_estadisticas", _refrescar_estadisticas),
+            args=[app],
+            trigger=IntervalTrigger(seconds=intervalos["refrescar_estadisticas"]),
+            id="refrescar_estadisticas",
+            replace_existing=True,
+            name="Refrescar snapshot de estadísticas",
+        )
+
+    from .email_outbox import procesar_outbox
+    # Sin correos en cola no deja fila en job_runs (correría cada 15 s)
     scheduler.add_job(
-        func=_cancelar_pendientes_expiradas,
+        func=instrumentar("procesar_outbox", procesar_outbox, registrar_vacias=False),
         args=[app],
-        trigger=IntervalTrigger(minutes=10),
-        id="cancelar_pendientes",
+        trigger=IntervalTrigger(seconds=intervalos["procesar_outbox"]),
+        id="procesar_outbox",
         replace_existing=True,
-        name="Cancelar evaluaciones pendientes expiradas",
+        max_instances=1,
+        coalesce=True,
+        name="Enviar correos de email_outbox",
     )
 
+
+def _quitar_jobs_lider():
+    for job_id in JOBS_LIDER:
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
+
+
+def _latido(app):
+    """Renueva o disputa el lease y ajusta los jobs al cambiar el liderazgo."""
+    global _es_lider
+    from . import evaluation_timers
+    from .scheduler_leader import IDENTIDAD, renovar_o_tomar
+
+    lider = renovar_o_tomar(app)
+    if lider and not _es_lider:
+        _agregar_jobs_lider(app)
+        evaluation_timers.reanudar()
+        logger.info(f"[Scheduler] {IDENTIDAD} es el líder: jobs activados.")
+    elif not lider and _es_lider:
+        _quitar_jobs_lider()
+        evaluation_timers.pausar()
+        logger.warning(f"[Scheduler] {IDENTIDAD} perdió el liderazgo: jobs desactivados.")
+    elif lider:
+        evaluation_timers.despertar()
+    _es_lider = lider
+
+
+def detener_scheduler(app):
+    """Detiene el scheduler y libera el lease si este proceso era líder."""
+    global _es_lider
+    from .evaluation_timers import detener
+
+    detener()
+    if not scheduler.running:
+        return
+    scheduler.shutdown(wait=False)
+    if _es_lider:
+        from .scheduler_leader import liberar
+        liberar(app)
+        _es_lider = False
+
+
+def init_scheduler(app):
+    """
+    Inicializa y arranca el scheduler con la app Flask.
+
+    SCHEDULER_MODE="lider" (por defecto): el proceso compite por el lease
+    y solo el líder ejecuta los jobs. SCHEDULER_MODE="ninguno": no arranca
+    scheduler (web workers cuando corre run_scheduler.py aparte).
+
+    En ambos modos arranca en pausa el scheduler de temporizadores, para
+    que cualquier proceso pueda programarlos en el job store compartido.
+    """
+    from .evaluation_timers import init_temporizadores
+
+    if scheduler.running:
+        return
+    init_temporizadores(app)
+    if app.config.get("SCHEDULER_MODE", "lider") == "ninguno":
+        logger.info("Scheduler desactivado en este proceso (SCHEDULER_MODE=ninguno).")
+        return
+    from .job_metrics import escuchar_omitidos
+
     scheduler.add_job(
-        func=_enviar_recordatorios,
+        func=_latido,
         args=[app],
-        trigger=IntervalTrigger(minutes=5),
-        id="enviar_recordatorios",
+        trigger=IntervalTrigger(seconds=app.config.get("SCHEDULER_HEARTBEAT_SECONDS", 15)),
+        id="latido_lider",
         replace_existing=True,
-        name="Enviar recordatorios 1h antes",
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(timezone.utc),
+        name="Latido del lease de líder",
     )
 
+    escuchar_omitidos(scheduler, app)
     scheduler.start()
+    atexit.register(detener_scheduler, app)
     logger.info("Scheduler APScheduler iniciado correctamente.")
@@ -0,0 +1,82 @@
+"""
+app/services/scheduler_leader.py
+Elección de líder del scheduler mediante un lease en la base de datos.
+
+Todos los procesos con scheduler compiten por la fila "scheduler" de
+scheduler_lease: la toma quien la encuentre vencida (o ya sea suya) con
+un UPDATE condicional, y el líder la renueva en cada latido. Si el líder
+muere, otro proceso la toma a lo sumo SCHEDULER_LEASE_TTL_SECONDS +
+SCHEDULER_HEARTBEAT_SECONDS después.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..models import SchedulerLease
+from .. import db
+
+logger = logging.getLogger(__name__)
+
+LEASE = "scheduler"
+IDENTIDAD = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def renovar_o_tomar(app) -> bool:
+    """Renueva el lease propio o toma uno vencido. True si este proceso es líder."""
+    ahora = datetime.now(timezone.utc)
+    expira = ahora + timedelta(seconds=app.config.get("SCHEDULER_LEASE_TTL_SECONDS", 45))
+    with app.app_context():
+        try:
+            resultado = db.session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.nombre == LEASE,
+                    or_(SchedulerLease.titular == IDENTIDAD, SchedulerLease.expira_at < ahora),
+                )
+                .values(titular=IDENTIDAD, expira_at=expira, renovado_at=ahora)
+                .execution_options(synchronize_session=False)
+            )
+            if resultado.rowcount == 1:
+                db.session.commit()
+                return True
+            if db.session.get(SchedulerLease, LEASE) is None:
+                db.session.add(SchedulerLease(
+                    nombre=LEASE, titular=IDENTIDAD, expira_at=expira, renovado_at=ahora
+                ))
+                db.session.commit()
+                return True
+            db.session.rollback()
+            return False
+        except IntegrityError:
+            # Otro proceso insertó la fila primero
+            db.session.rollback()
+            return False
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            logger.error(f"[Scheduler] No se pudo renovar el lease: {exc}")
+            return False
+
+
+def liberar(app) -> None:
+    """Vence el lease propio para que otro proceso lo tome sin esperar el TTL."""
+    with app.app_context():
+        try:
+            db.session.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.nombre == LEASE, SchedulerLease.titular == IDENTIDAD)
+                .values(expira_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+
+
+def lider_actual():
+    """Fila del lease (titular y vencimiento) para diagnóstico."""
+    return db.session.get(SchedulerLease, LEASE)
@@ -0,0 +1,231 @@
+"""
+app/services/slot_index.py
+Índice en memoria de slots libres de todos los supervisores activos.
+
+Mantiene una lista ordenada por (fecha, hora, supervisor_id) para
+responder "primeros N slots libres" sin consultar supervisor por
+supervisor. Las escrituras de availability_service marcan como sucios
+los días afectados (tras el commit) y se recargan en la siguiente
+búsqueda con una sola consulta. Cada SLOT_INDEX_TTL segundos el índice
+se reconstruye completo para recoger cambios hechos por otros workers;
+la reconstrucción consulta la base fuera del lock y reemplaza las listas
+al terminar.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import db
+
+
+def _minutos(hora: str) -> int:
+    horas, minutos = hora.split(":")
+    return int(horas) * 60 + int(minutos)
+
+
+def _hora(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _hoy() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class IndiceSlotsLibres:
+    """
+    Lista ordenada de (ordinal_fecha, minutos, supervisor_id) libres.
+
+    Las consultas a la base (reconstrucción y recarga de días sucios) se
+    hacen fuera del lock y de a un hilo por vez (_actualizando); mientras
+    tanto las búsquedas siguen sirviendo la versión anterior y solo
+    esperan si el índice todavía no se construyó nunca.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listo = threading.Condition(self._lock)
+        self._ordenados = []
+        self._por_dia = {}          # (supervisor_id, ordinal) -> [claves]
+        self._sucios = set()        # (supervisor_id, fecha)
+        self._construido_en = None
+        self._horizonte = None
+        self._actualizando = False
+        self._generacion = 0        # sube con cada invalidar()
+        self.ttl = 300
+        self.dias = 90
+
+    def configurar(self, ttl: int, dias: int) -> None:
+        self.ttl = ttl
+        self.dias = dias
+        self.invalidar()
+
+    def invalidar(self) -> None:
+        """Fuerza una reconstrucción completa en la próxima búsqueda."""
+        with self._lock:
+            self._construido_en = None
+            self._generacion += 1
+
+    def marcar_sucios(self, dias) -> None:
+        with self._lock:
+            self._sucios.update(dias)
+
+    # ── Mantenimiento ──────────────────────────────────────────────
+    def _libres(self, desde, hasta, dias=None) -> list:
+        """(supervisor_id, fecha, hora) libres de supervisores activos."""
+        from .availability_service import slots_libres_activos
+        return slots_libres_activos(desde, hasta, dias=dias)
+
+    @staticmethod
+    def _agregar(ordenados, por_dia, supervisor_id, fecha, hora) -> None:
+        clave = (fecha.toordinal(), _minutos(hora), supervisor_id)
+        insort(ordenados, clave)
+        por_dia.setdefault((supervisor_id, clave[0]), []).append(clave)
+
+    def _construir(self):
+        """Lee todos los libres del horizonte (sin lock)."""
+        horizonte = _hoy() + timedelta(days=self.dias)
+        filas = self._libres(desde=_hoy(), hasta=horizonte)
+        claves = sorted(
+            (fecha.toordinal(), _minutos(hora), supervisor_id)
+            for supervisor_id, fecha, hora in filas
+        )
+        por_dia = {}
+        for clave in claves:
+            por_dia.setdefault((clave[2], clave[0]), []).append(clave)
+        return claves, por_dia, horizonte
+
+    def _reconstruir(self, generacion: int) -> None:
+        construido_en = time.monotonic()
+        with self._lock:
+            # Lo marcado hasta aquí ya está confirmado: lo ve la consulta
+            self._sucios.clear()
+        claves, por_dia, horizonte = self._construir()
+        with self._lock:
+            self._ordenados, self._por_dia, self._horizonte = claves, por_dia, horizonte
+            if generacion == self._generacion:
+                self._construido_en = construido_en
+
+    def _refrescar_sucios(self, dias: set) -> None:
+        filas = self._libres(
+            min(f for _, f in dias), max(f for _, f in dias), dias=sorted(dias)
+        )
+        with self._lock:
+            # Copias: las búsquedas en curso recorren las listas anteriores
+            ordenados, por_dia = list(self._ordenados), dict(self._por_dia)
+            for supervisor_id, fecha in dias:
+                for clave in por_dia.pop((supervisor_id, fecha.toordinal()), []):
+                    i = bisect_left(ordenados, clave)
+                    if i < len(ordenados) and ordenados[i] == clave:
+                        del ordenados[i]
+            for supervisor_id, fecha, hora in filas:
+                self._agregar(ordenados, por_dia, supervisor_id, fecha, hora)
+            self._ordenados, self._por_dia = ordenados, por_dia
+
+    def _tarea_pendiente(self):
+        """Con el lock tomado: qué actualización corresponde, si alguna."""
+        vencido = (
+            self._construido_en is None
+            or time.monotonic() - self._construido_en > self.ttl
+            or self._horizonte < _hoy() + timedelta(days=self.dias)
+        )
+        if vencido:
+            return "reconstruir", self._generacion
+        dias = {(s, f) for s, f in self._sucios if f <= self._horizonte}
+        self._sucios.clear()
+        if dias:
+            return "sucios", dias
+        return None
+
+    def _asegurar_vigente(self) -> None:
+        with self._lock:
+            while self._actualizando and self._horizonte is None:
+                self._listo.wait()      # primera construcción en curso
+            if self._actualizando:
+                return                  # otro hilo actualiza: servir lo que hay
+            tarea = self._tarea_pendiente()
+            if tarea is None:
+                return
+            self._actualizando = True
+        try:
+            tipo, dato = tarea
+            if tipo == "reconstruir":
+                self._reconstruir(dato)
+            else:
+                self._refrescar_sucios(dato)
+        except Exception:
+            if tarea[0] == "sucios":
+                self.marcar_sucios(tarea[1])
+            raise
+        finally:
+            with self._lock:
+                self._actualizando = False
+                self._listo.notify_all()
+
+    # ── Búsqueda ───────────────────────────────────────────────────
+    def buscar(self, n: int, desde: date = None, hasta: date = None,
+               hora_desde: str = None, hora_hasta: str = None) -> list:
+        """
+        Primeros `n` slots libres como [(fecha, "HH:MM", supervisor_id)],
+        opcionalmente acotados por rango de fechas y ventana horaria.
+        Fecha y hora de los slots son UTC, como Evaluacion.inicio_at.
+        """
+        ahora = datetime.now(timezone.utc)
+        hoy = ahora.date()
+        desde = max(desde or hoy, hoy)
+        min_desde = _minutos(hora_desde) if hora_desde else 0
+        min_hasta = _minutos(hora_hasta) if hora_hasta else 24 * 60
+
+        self._asegurar_vigente()
+        with self._lock:
+            ordenados, horizonte = self._ordenados, self._horizonte
+        hasta = min(hasta or horizonte, horizonte)
+        ord_hasta = hasta.toordinal()
+        ord_hoy = hoy.toordinal()
+        min_ahora = ahora.hour * 60 + ahora.minute
+
+        resultado = []
+        i = bisect_left(ordenados, (desde.toordinal(), min_desde, 0))
+        while i < len(ordenados) and len(resultado) < n:
+            ordinal, minutos, supervisor_id = ordenados[i]
+            i += 1
+            if ordinal > ord_hasta:
+                break
+            if not (min_desde <= minutos <= min_hasta):
+                continue
+            if ordinal == ord_hoy and minutos <= min_ahora:
+                continue
+            resultado.append((date.fromordinal(ordinal), _hora(minutos), supervisor_id))
+        return resultado
+
+
+indice = IndiceSlotsLibres()
+
+
+def init_indice(app) -> None:
+    indice.configurar(
+        ttl=app.config.get("SLOT_INDEX_TTL", 300),
+        dias=app.config.get("SLOT_INDEX_DIAS", 90),
+    )
+
+
+def marcar_cambio(supervisor_id: int, fechas) -> None:
+    """Registra días modificados; se aplican al índice tras el commit."""
+    db.session.info.setdefault("slot_index_pendientes", set()).update(
+        (supervisor_id, f) for f in fechas
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_tras_commit(session):
+    dias = session.info.pop("slot_index_pendientes", None)
+    if dias:
+        indice.marcar_sucios(dias)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop("slot_index_pendientes", None)
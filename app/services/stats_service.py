@@ -0,0 +1,123 @@
+"""
+app/services/stats_service.py
+Estadísticas del dashboard administrador.
+
+Modo directo: un único SELECT ... GROUP BY estado con los conteos de
+supervisores y challenges como subconsultas escalares.
+Modo snapshot (ADMIN_STATS_SNAPSHOT=True): los conteos por estado se
+leen de estadisticas_evaluaciones, que se ajusta en cada transición de
+estado y el scheduler recalcula periódicamente para corregir desvíos.
+"""
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from ..models import User, Challenge, Evaluacion, EstadisticaEvaluacion
+from ..models.evaluacion import ESTADOS
+from .. import db
+
+
+def _conteos_globales():
+    supervisores = (
+        select(func.count(User.id))
+        .where(User.rol == "SUPERVISOR", User.activo == True)
+        .scalar_subquery()
+    )
+    challenges = (
+        select(func.count(Challenge.id))
+        .where(Challenge.activo == True)
+        .scalar_subquery()
+    )
+    return supervisores, challenges
+
+
+def _armar(por_estado: dict, supervisores: int, challenges: int) -> dict:
+    return {
+        "supervisores": supervisores,
+        "challenges": challenges,
+        "evaluaciones": sum(por_estado.values()),
+        "pendientes": por_estado.get("PENDIENTE", 0),
+        "confirmadas": por_estado.get("CONFIRMADO", 0),
+        "rechazadas": por_estado.get("RECHAZADO", 0),
+        "canceladas": por_estado.get("CANCELADO_AUTO", 0),
+    }
+
+
+def _consultar(columna_estado, columna_total, fuente, agrupar: bool) -> dict:
+    supervisores, challenges = _conteos_globales()
+    q = db.session.query(columna_estado, columna_total, supervisores, challenges).select_from(fuente)
+    if agrupar:
+        q = q.group_by(columna_estado)
+    filas = q.all()
+    if filas:
+        sup, chal = filas[0][2], filas[0][3]
+    else:
+        sup, chal = db.session.query(supervisores, challenges).one()
+    return _armar({estado: total for estado, total, _, _ in filas}, sup, chal)
+
+
+def calcular_estadisticas() -> dict:
+    """Conteos del dashboard en una sola consulta sobre evaluaciones."""
+    return _consultar(
+        Evaluacion.estado, func.count(Evaluacion.id), Evaluacion, agrupar=True
+    )
+
+
+def estadisticas_dashboard() -> dict:
+    """Estadísticas para admin.dashboard según ADMIN_STATS_SNAPSHOT."""
+    if not current_app.config.get("ADMIN_STATS_SNAPSHOT"):
+        return calcular_estadisticas()
+    if EstadisticaEvaluacion.query.first() is None:
+        refrescar_snapshot()
+    return _consultar(
+        EstadisticaEvaluacion.estado,
+        EstadisticaEvaluacion.total,
+        EstadisticaEvaluacion,
+        agrupar=False,
+    )
+
+
+def registrar_transicion(anterior: str | None, nuevo: str, n: int = 1) -> None:
+    """
+    Ajusta el snapshot cuando `n` evaluaciones pasan de `anterior` a
+    `nuevo` (anterior=None para altas). No hace commit.
+    """
+    if not current_app.config.get("ADMIN_STATS_SNAPSHOT") or n <= 0:
+        return
+    ahora = datetime.now(timezone.utc)
+    for estado, delta in ((anterior, -n), (nuevo, n)):
+        if estado is None:
+            continue
+        db.session.execute(
+            update(EstadisticaEvaluacion)
+            .where(EstadisticaEvaluacion.estado == estado)
+            .values(total=EstadisticaEvaluacion.total + delta, actualizado_at=ahora)
+        )
+
+
+def refrescar_snapshot() -> None:
+    """
+    Recalcula el snapshot completo (job del scheduler).
+
+    Primero bloquea las filas del snapshot (FOR UPDATE; SQLite serializa
+    las escrituras) y después recuenta y actualiza en una sola sentencia:
+    una transición que ya ajustó su fila termina antes del recuento y
+    queda contada, y una que aún no lo hizo espera y aplica su delta
+    sobre el total nuevo. Ninguna se pierde.
+    """
+    ahora = datetime.now(timezone.utc)
+    existentes = set(db.session.scalars(
+        select(EstadisticaEvaluacion.estado).with_for_update()
+    ))
+    faltantes = [estado for estado in ESTADOS if estado not in existentes]
+    if faltantes:
+        db.session.execute(
+            insert(EstadisticaEvaluacion),
+            [{"estado": estado, "total": 0, "actualizado_at": ahora} for estado in faltantes],
+        )
+    conteo = (
+        select(func.count(Evaluacion.id))
+        .where(Evaluacion.estado == EstadisticaEvaluacion.estado)
+        .scalar_subquery()
+    )
+    db.session.execute(update(EstadisticaEvaluacion).values(total=conteo, actualizado_at=ahora))
+    db.session.commit()
@@ -0,0 +1,116 @@
+"""
+app/services/user_cache.py
+Usuario de la sesión para Flask-Login sin un SELECT por request.
+
+load_user retorna un UsuarioSesion inmutable (id, nombre, email, rol,
+activo) guardado en una caché por proceso con TTL USER_CACHE_TTL. Las
+rutas que modifican un usuario llaman a `invalidar`; los demás workers
+ven el cambio al vencer el TTL.
+
+Con USER_SESSION_SNAPSHOT el snapshot viaja además en la cookie de
+sesión (firmada con SECRET_KEY) y se relee solo cuando tiene más de
+USER_CACHE_TTL segundos.
+"""
+import threading
+import time
+from dataclasses import astuple, dataclass
+
+from flask import current_app, session
+from flask_login import UserMixin
+
+from .. import db
+
+CLAVE_SESION = "_usuario"
+
+
+@dataclass(frozen=True)
+class UsuarioSesion(UserMixin):
+    id: int
+    nombre: str
+    email: str
+    rol: str
+    activo: bool
+
+    @classmethod
+    def desde_modelo(cls, user) -> "UsuarioSesion":
+        return cls(user.id, user.nombre, user.email, user.rol, user.activo)
+
+    @property
+    def is_active(self) -> bool:
+        return self.activo
+
+    def is_admin(self) -> bool:
+        return self.rol == "ADMIN"
+
+    def is_supervisor(self) -> bool:
+        return self.rol == "SUPERVISOR"
+
+
+class CacheUsuarios:
+    """Diccionario id -> (vence_en, UsuarioSesion) acotado a max_entradas."""
+
+    def __init__(self, max_entradas: int = 4096):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = {}
+
+    def obtener(self, user_id: int):
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+        if entrada is None or entrada[0] < time.monotonic():
+            return None
+        return entrada[1]
+
+    def guardar(self, usuario: UsuarioSesion, ttl: float) -> None:
+        with self._lock:
+            if len(self._entradas) >= self.max_entradas:
+                self._entradas.clear()
+            self._entradas[usuario.id] = (time.monotonic() + ttl, usuario)
+
+    def descartar(self, user_id: int = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(user_id, None)
+
+
+cache = CacheUsuarios()
+
+
+def _desde_sesion(user_id: int, ttl: float):
+    datos = session.get(CLAVE_SESION)
+    if not datos or datos[0] != user_id or time.time() - datos[-1] > ttl:
+        return None
+    return UsuarioSesion(*datos[:-1])
+
+
+def _leer(user_id: int, ttl: float):
+    from ..models import User
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    usuario = UsuarioSesion.desde_modelo(user)
+    cache.guardar(usuario, ttl)
+    return usuario
+
+
+def cargar_usuario(user_id: int):
+    """user_loader: snapshot del usuario activo o None."""
+    ttl = current_app.config.get("USER_CACHE_TTL", 60)
+    en_sesion = current_app.config.get("USER_SESSION_SNAPSHOT", False)
+
+    usuario = _desde_sesion(user_id, ttl) if en_sesion else None
+    if usuario is None:
+        usuario = cache.obtener(user_id) or _leer(user_id, ttl)
+        if usuario is None:
+            return None
+        if en_sesion:
+            session[CLAVE_SESION] = [*astuple(usuario), time.time()]
+    return usuario if usuario.activo else None
+
+
+def invalidar(user_id: int = None) -> None:
+    """Descarta el snapshot cacheado de un usuario (o de todos)."""
+    cache.descartar(user_id)
@@ -21,9 +21,72 @@ class Config:
     MAIL_PASSWORD = "h z b y t t m z u g u y l w a a"
     MAIL_DEFAULT_SENDER = "EvaluaCalender <montypohl20@gmail.com>"
 
+    # Almacenamiento de disponibilidad: "filas" (Disponibilidad, una fila por
+    # slot) o "bitmap" (DisponibilidadDia, una fila por día; solo slots en punto)
+    AVAILABILITY_STORAGE = os.environ.get("AVAILABILITY_STORAGE", "filas")
+    SLOT_DURACION_MIN = 60           # duración de slots nuevos y evaluaciones
+
+    # Snapshot de estadísticas del dashboard admin
+    ADMIN_STATS_SNAPSHOT = False
+    ADMIN_STATS_REFRESH_MINUTES = 30
+
+    # Índice en memoria de slots libres (búsqueda entre supervisores)
+    SLOT_INDEX_TTL = 300
+    SLOT_INDEX_DIAS = 90
+
+    # API de disponibilidad por rango
+    DISPONIBILIDAD_RANGO_MAX_DIAS = 93
+
+    # Cola de correos salientes (email_outbox)
+    EMAIL_OUTBOX_INTERVAL_SECONDS = 15
+    EMAIL_OUTBOX_BATCH_SIZE = 50
+    EMAIL_OUTBOX_CONCURRENCIA = 4       # conexiones SMTP en paralelo por lote
+    EMAIL_DOMINIO_POR_SEGUNDO = 10      # envíos/s a un mismo dominio (0 = sin límite)
+    EMAIL_MAX_INTENTOS = 5
+    EMAIL_RETRY_BASE_SECONDS = 30
+    EMAIL_RETRY_MAX_SECONDS = 3600
+
+    # Instrumentación de requests/SQL (/metrics y Server-Timing)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+    METRICS_SLOW_QUERY_MS = 200
+    METRICS_SERVER_TIMING = True
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")   # Bearer opcional para /metrics
+    # Puerto donde run_scheduler.py expone /metrics (contadores de jobs); 0 = no
+    SCHEDULER_METRICS_PORT = int(os.environ.get("SCHEDULER_METRICS_PORT", "0"))
+
+    # Scheduler: "lider" (los procesos eligen un líder que corre los jobs)
+    # o "ninguno" (este proceso no corre jobs; ver run_scheduler.py)
+    SCHEDULER_MODE = os.environ.get("SCHEDULER_MODE", "lider")
+    SCHEDULER_LEASE_TTL_SECONDS = 45
+    SCHEDULER_HEARTBEAT_SECONDS = 15
+
+    # Contraseñas: costo bcrypt y pool de hilos para hashear/verificar
+    # (PASSWORD_POOL_WORKERS=0 lo hace en el hilo del request)
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+    PASSWORD_POOL_WORKERS = int(os.environ.get("PASSWORD_POOL_WORKERS", "2"))
+    PASSWORD_POOL_MAX_PENDIENTES = 32   # por encima, 503 con Retry-After
+    PASSWORD_POOL_TIMEOUT_SECONDS = 10
+    PASSWORD_RETRY_AFTER_SECONDS = 2
+
+    # Usuario de la sesión (Flask-Login): caché por proceso y, opcionalmente,
+    # snapshot firmado en la cookie de sesión
+    USER_CACHE_TTL = 60
+    USER_SESSION_SNAPSHOT = os.environ.get("USER_SESSION_SNAPSHOT", "0") == "1"
+
+    # Historial de ejecuciones de jobs (job_runs)
+    JOB_RUNS_RETENCION_DIAS = 30
+
     BASE_URL = "http://localhost:5000"
     EVAL_EXPIRY_HOURS = 12
     REMINDER_MINUTES_BEFORE = 60
+    EXPIRY_BATCH_SIZE = 500          # evaluaciones canceladas por lote
+    EXPIRY_MAX_BATCHES_PER_RUN = 10  # acota la duración de cada ejecución
+    TIMERS_SWEEP_MINUTES = 60        # barrido de respaldo de los temporizadores
+
+    # Caché de disponibilidad mensual (redis://... para compartir entre workers)
+    AVAILABILITY_CACHE_URL = os.environ.get("AVAILABILITY_CACHE_URL")
+    AVAILABILITY_CACHE_TTL = 300
+    AVAILABILITY_CACHE_MAX_ENTRIES = 1024
 
 
 class DevelopmentConfig(Config):
@@ -6,8 +6,121 @@ Uso:
     python create_db.py
 """
 import os
+from datetime import timedelta
+
+# Script de una sola vez: sin scheduler ni competir por el lease del líder
+os.environ["SCHEDULER_MODE"] = "ninguno"
+
+from sqlalchemy import inspect, text
 from app import create_app, db
-from app.models import User, Challenge
+from app.models import User, Challenge, Evaluacion, DisponibilidadDia, VersionDisponibilidad
+from app.services import availability_bitmap
+
+
+def _agregar_columnas_faltantes():
+    """ALTER TABLE ... ADD COLUMN para columnas nuevas en tablas existentes."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existentes = {c["name"] for c in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existentes:
+                continue
+            tipo = col.type.compile(dialect=db.engine.dialect)
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {tipo}"
+            if col.server_default is not None:
+                ddl += f" DEFAULT {col.server_default.arg}"
+            with db.engine.begin() as conn:
+                conn.execute(text(ddl))
+            print(f"➕ Columna {table.name}.{col.name} agregada.")
+
+
+# Columnas "HH:MM" que pasaron de VARCHAR(5) a TIME
+COLUMNAS_HORA = (
+    ("disponibilidades", "hora"),
+    ("evaluaciones", "hora"),
+    ("reglas_disponibilidad", "hora_inicio"),
+    ("reglas_disponibilidad", "hora_fin"),
+    ("excepciones_disponibilidad", "hora"),
+)
+
+
+def _migrar_horas_a_time():
+    """
+    Convierte las columnas de hora en texto a TIME.
+    PostgreSQL cambia el tipo con USING; SQLite no altera tipos, así que
+    se reescriben los valores al formato de texto que usa su tipo TIME.
+    """
+    inspector = inspect(db.engine)
+    dialecto = db.engine.dialect.name
+    for tabla, columna in COLUMNAS_HORA:
+        if not inspector.has_table(tabla):
+            continue
+        tipo = next(c["type"] for c in inspector.get_columns(tabla) if c["name"] == columna)
+        if dialecto == "postgresql":
+            if tipo.python_type is str:
+                ddl = f"ALTER TABLE {tabla} ALTER COLUMN {columna} TYPE TIME USING {columna}::time"
+                with db.engine.begin() as conn:
+                    conn.execute(text(ddl))
+                print(f"🕒 {tabla}.{columna} convertida a TIME.")
+        elif dialecto == "sqlite":
+            with db.engine.begin() as conn:
+                n = conn.execute(
+                    text(
+                        f"UPDATE {tabla} SET {columna} = {columna} || :sufijo "
+                        f"WHERE length({columna}) = 5"
+                    ),
+                    {"sufijo": ":00.000000"},
+                ).rowcount
+            if n:
+                print(f"🕒 {n} valores de {tabla}.{columna} convertidos a TIME.")
+
+
+def _backfill_inicio_at(tam_lote: int = 1000):
+    """Completa Evaluacion.inicio_at / fin_at en filas creadas antes de las columnas."""
+    total = 0
+    while True:
+        lote = Evaluacion.query.filter(
+            (Evaluacion.inicio_at.is_(None)) | (Evaluacion.fin_at.is_(None))
+        ).limit(tam_lote).all()
+        if not lote:
+            break
+        for ev in lote:
+            ev.inicio_at = Evaluacion.calcular_inicio(ev.fecha, ev.hora)
+            ev.fin_at = ev.inicio_at + timedelta(minutes=ev.duracion_min or 60)
+        db.session.commit()
+        total += len(lote)
+    if total:
+        print(f"🕒 inicio_at/fin_at calculados para {total} evaluaciones.")
+
+
+def _migrar_marcas_disponibilidad():
+    """Copia users.disponibilidad_actualizada_at (columna antigua) a versiones_disponibilidad."""
+    columnas = {c["name"] for c in inspect(db.engine).get_columns("users")}
+    if "disponibilidad_actualizada_at" not in columnas:
+        return
+    if VersionDisponibilidad.query.first() is not None:
+        return
+    with db.engine.begin() as conn:
+        n = conn.execute(text(
+            "INSERT INTO versiones_disponibilidad (supervisor_id, actualizada_at) "
+            "SELECT id, disponibilidad_actualizada_at FROM users "
+            "WHERE disponibilidad_actualizada_at IS NOT NULL"
+        )).rowcount
+    if n:
+        print(f"🏷️  Marcas de disponibilidad migradas: {n} supervisores.")
+
+
+def _migrar_disponibilidad_bitmap(app):
+    """En modo bitmap, vuelca disponibilidades a disponibilidad_dias si está vacía."""
+    if app.config.get("AVAILABILITY_STORAGE", "filas") != "bitmap":
+        return
+    if DisponibilidadDia.query.first() is not None:
+        return
+    dias = availability_bitmap.migrar_desde_filas()
+    if dias:
+        print(f"🧮 Disponibilidad migrada a bitmap: {dias} días.")
 
 
 def create_database():
@@ -16,8 +129,19 @@ def create_database():
     with app.app_context():
         print("📦 Creando tablas...")
         db.create_all()
+        _agregar_columnas_faltantes()
+        _migrar_horas_a_time()
         print("✅ Tablas creadas.")
 
+        # ── Índices nuevos sobre tablas existentes ─────────────────
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        print("✅ Índices verificados.")
+        _backfill_inicio_at()
+        _migrar_marcas_disponibilidad()
+        _migrar_disponibilidad_bitmap(app)
+
         # ── Admin por defecto ──────────────────────────────────────
         if not User.query.filter_by(email="admin@evaluacalender.com").first():
             admin = User(
@@ -0,0 +1,60 @@
+"""
+run_scheduler.py
+Proceso dedicado al scheduler (jobs fuera de los web workers).
+
+Uso:
+    python run_scheduler.py
+
+Los web workers pueden correr con SCHEDULER_MODE=ninguno; si no, compiten
+por el mismo lease y solo uno ejecuta los jobs.
+
+Los contadores de jobs viven en este proceso: con METRICS_ENABLED=1 y
+SCHEDULER_METRICS_PORT se exponen en http://<host>:<puerto>/metrics.
+"""
+import logging
+import os
+import signal
+import threading
+
+os.environ["SCHEDULER_MODE"] = "lider"
+
+from app import create_app
+from app.services.scheduler import detener_scheduler
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+app = create_app(os.environ.get("FLASK_ENV", "production"))
+_detener = threading.Event()
+
+
+def _salir(signum, frame):
+    _detener.set()
+
+
+def _servir_metricas(app):
+    """Sirve solo /metrics de este proceso en SCHEDULER_METRICS_PORT."""
+    puerto = app.config.get("SCHEDULER_METRICS_PORT")
+    if not puerto or not app.config.get("METRICS_ENABLED"):
+        return None
+    from werkzeug.exceptions import NotFound
+    from werkzeug.serving import make_server
+
+    def solo_metricas(environ, start_response):
+        if environ.get("PATH_INFO") != "/metrics":
+            return NotFound()(environ, start_response)
+        return app.wsgi_app(environ, start_response)
+
+    servidor = make_server("0.0.0.0", puerto, solo_metricas, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name="metrics", daemon=True).start()
+    logging.getLogger(__name__).info(f"/metrics del scheduler en el puerto {puerto}.")
+    return servidor
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _salir)
+    signal.signal(signal.SIGINT, _salir)
+    servidor_metricas = _servir_metricas(app)
+    _detener.wait()
+    if servidor_metricas is not None:
+        servidor_metricas.shutdown()
+    detener_scheduler(app)
@@ -0,0 +1,89 @@
+"""
+scripts/_bench.py
+Utilidades comunes de los benchmarks (scripts/bench_*.py).
+
+Cada benchmark crea sus tablas desde cero: por defecto en una base SQLite
+de un directorio temporal, o en BENCH_DATABASE_URL si se indica (p. ej.
+una base PostgreSQL descartable; sus tablas se borran). Nunca usa
+DATABASE_URL, para no tocar la base de la aplicación por error.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+def preparar_entorno() -> str:
+    """Fija el entorno antes de importar la app (config lo lee al importarse)."""
+    url = os.environ.get("BENCH_DATABASE_URL") or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='evaluacalender-bench-'), 'bench.db')}"
+    )
+    os.environ["DATABASE_URL"] = url
+    os.environ["SCHEDULER_MODE"] = "ninguno"
+    os.environ.setdefault("PASSWORD_POOL_WORKERS", "0")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    return url
+
+
+def crear_app(**config):
+    """App con tablas vacías y su app context activo."""
+    url = preparar_entorno()
+    from app import create_app, db
+
+    app = create_app("development")
+    app.config.update(MAIL_SUPPRESS_SEND=True, **config)
+    app.extensions["mail"].suppress = True
+    app.app_context().push()
+    db.drop_all()
+    db.create_all()
+    print(f"Base: {url.split('@')[-1]}")
+    return app
+
+
+@contextmanager
+def contar_sentencias():
+    """Lista que recibe una entrada por sentencia SQL ejecutada en el bloque."""
+    from sqlalchemy import event
+    from app import db
+
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(db.engine, "after_cursor_execute", contar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, "after_cursor_execute", contar)
+
+
+def cronometrar(fn, *args, **kwargs):
+    """(segundos, resultado) de una llamada."""
+    inicio = time.perf_counter()
+    resultado = fn(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+
+def percentil(muestras: list, p: float) -> float:
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+
+def ms(segundos: float) -> str:
+    return f"{segundos * 1000:.2f}"
+
+
+def tabla(encabezados: list, filas: list) -> None:
+    """Imprime filas alineadas por columna."""
+    filas = [[str(c) for c in fila] for fila in filas]
+    anchos = [max(len(str(e)), *(len(f[i]) for f in filas)) for i, e in enumerate(encabezados)]
+    print("  ".join(str(e).rjust(a) for e, a in zip(encabezados, anchos)))
+    print("  ".join("-" * a for a in anchos))
+    for fila in filas:
+        print("  ".join(c.rjust(a) for c, a in zip(fila, anchos)))
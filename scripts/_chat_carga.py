@@ -0,0 +1,164 @@
+"""
+scripts/_chat_carga.py
+Arnés de carga del servidor de chat para los benchmarks bench_chat_*.py.
+
+Levanta servidor.py (modo asyncio) en un subproceso, conecta N clientes
+asyncio desde este proceso y mide cuánto tarda cada trama de broadcast
+en llegar a cada cliente. Las tramas de medición llevan el instante de
+envío (perf_counter_ns, común a los procesos de la máquina).
+"""
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from _bench import RAIZ
+from servidor import DecodificadorTramas, TAM_LECTURA, codificar
+
+PREFIJO = b"bench "
+
+
+def subir_limite_archivos(necesarios: int) -> int:
+    """Sube el límite blando de descriptores (lo hereda el servidor); retorna el vigente."""
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando < necesarios:
+        tope = necesarios if duro == resource.RLIM_INFINITY else min(necesarios, duro)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (tope, duro))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Servidor:
+    """servidor.py en un subproceso, sin base de salas (solo "general")."""
+
+    def __init__(self, *opciones):
+        self.puerto = _puerto_libre()
+        entorno = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+        self.proceso = subprocess.Popen(
+            [sys.executable, "servidor.py", "--modo", "asyncio", "--host", "127.0.0.1",
+             "--puerto", str(self.puerto), *opciones],
+            cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL,
+        )
+        limite = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.puerto), timeout=1).close()
+                return
+            except OSError:
+                if self.proceso.poll() is not None or time.monotonic() > limite:
+                    raise RuntimeError("el servidor de chat no arrancó")
+                time.sleep(0.1)
+
+    def rss(self) -> int:
+        """Memoria residente del servidor en bytes (Linux)."""
+        with open(f"/proc/{self.proceso.pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) * 1024
+        return 0
+
+    def cerrar(self) -> None:
+        self.proceso.terminate()
+        self.proceso.wait(10)
+
+
+class ClienteCarga:
+    """Conexión de prueba que cuenta las tramas de medición y sus latencias."""
+
+    __slots__ = ("reader", "writer", "recibidas", "latencias", "cerrado", "respuesta", "tarea")
+
+    def __init__(self, reader, writer, latencias):
+        self.reader = reader
+        self.writer = writer
+        self.latencias = latencias      # lista compartida por todos los clientes
+        self.recibidas = 0
+        self.cerrado = False
+        self.respuesta = None
+        self.tarea = asyncio.create_task(self._leer())
+
+    async def _leer(self):
+        decodificador = DecodificadorTramas()
+        try:
+            while datos := await self.reader.read(TAM_LECTURA):
+                for trama in decodificador.alimentar(datos):
+                    if trama.startswith(PREFIJO):
+                        enviado = int(trama[len(PREFIJO):].split(b" ", 1)[0])
+                        self.latencias.append(time.perf_counter_ns() - enviado)
+                        self.recibidas += 1
+                    elif trama.startswith(b"[SISTEMA] en "):
+                        self.respuesta = trama.decode("utf-8")
+        except ConnectionError:
+            pass
+        self.cerrado = True
+
+    def enviar(self, texto: bytes) -> None:
+        self.writer.write(codificar(texto))
+
+
+def trama_medicion(relleno: int = 0) -> bytes:
+    return PREFIJO + str(time.perf_counter_ns()).encode() + b" " + b"x" * relleno
+
+
+class Carga:
+    """N clientes conectados a un servidor."""
+
+    def __init__(self, puerto: int):
+        self.puerto = puerto
+        self.clientes = []
+        self.latencias = []
+
+    async def conectar(self, n: int, paralelo: int = 200) -> None:
+        cupo = asyncio.Semaphore(paralelo)
+
+        async def uno(i):
+            async with cupo:
+                reader, writer = await asyncio.open_connection("127.0.0.1", self.puerto)
+                cliente = ClienteCarga(reader, writer, self.latencias)
+                cliente.enviar(f"cliente{i}".encode())
+                await writer.drain()
+                return cliente
+
+        self.clientes += await asyncio.gather(*(uno(len(self.clientes) + i) for i in range(n)))
+
+    async def esperar_presentes(self, n: int, timeout: float = 300) -> None:
+        """Espera a que la sala tenga n presentes (según /quien)."""
+        consultor = self.clientes[0]
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            consultor.respuesta = None
+            consultor.enviar(b"/quien")
+            while consultor.respuesta is None and time.monotonic() < limite:
+                await asyncio.sleep(0.05)
+            nombres = (consultor.respuesta or ": ").split(": ", 1)[1]
+            if len(nombres.split(", ")) >= n:
+                return
+            await asyncio.sleep(0.2)
+        raise TimeoutError(f"la sala no llegó a {n} presentes")
+
+    def entregadas(self) -> int:
+        return sum(c.recibidas for c in self.clientes)
+
+    def desconectados(self) -> int:
+        return sum(c.cerrado for c in self.clientes)
+
+    async def esperar_entregas(self, esperadas: int, timeout: float = 120) -> bool:
+        limite = time.monotonic() + timeout
+        while self.entregadas() < esperadas:
+            if time.monotonic() > limite:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def cerrar(self) -> None:
+        for cliente in self.clientes:
+            cliente.writer.close()
+            cliente.tarea.cancel()
+        await asyncio.gather(*(c.tarea for c in self.clientes), return_exceptions=True)
@@ -0,0 +1,119 @@
+"""
+scripts/bench_bitmap.py
+Almacenamiento de disponibilidad en filas (una por slot) contra bitmap
+(una fila por día): tamaño de tabla e índices, migración con
+migrar_desde_filas y latencia de lectura de un mes y de slot_disponible.
+
+Uso:
+    python scripts/bench_bitmap.py [--supervisores N] [--dias N] [--lecturas N]
+"""
+import argparse
+import random
+import statistics
+from datetime import date, timedelta
+
+from _bench import contar_sentencias, crear_app, cronometrar, ms, percentil, tabla
+
+HORAS = [f"{h:02d}:00" for h in range(8, 18)]
+LOTE = 50_000
+
+
+def poblar(supervisores: int, dias: int) -> list:
+    """Slots horarios (HORAS) en filas desde el 1 de enero de 2030; ~10% bloqueados."""
+    from app import db
+    from app.models import Disponibilidad, User
+
+    db.session.execute(User.__table__.insert(), [
+        {"nombre": f"Supervisor {i}", "email": f"sup{i}@example.com", "password_hash": "x",
+         "rol": "SUPERVISOR", "activo": True}
+        for i in range(supervisores)
+    ])
+    ids = [u for (u,) in db.session.query(User.id)]
+    azar = random.Random(7)
+    inicio = date(2030, 1, 1)
+    filas = (
+        {"supervisor_id": s, "fecha": inicio + timedelta(days=d), "hora": h,
+         "disponible": azar.random() >= 0.1, "duracion_min": 60}
+        for s in ids for d in range(dias) for h in HORAS
+    )
+    while lote := [f for _, f in zip(range(LOTE), filas)]:
+        db.session.execute(Disponibilidad.__table__.insert(), lote)
+        db.session.commit()
+    return ids
+
+
+def tamanos(tabla_nombre: str) -> tuple:
+    """(bytes de la tabla, bytes de sus índices)."""
+    from sqlalchemy import text
+    from app import db
+
+    if db.engine.dialect.name == "postgresql":
+        # VACUUM no corre dentro de una transacción
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"VACUUM ANALYZE {tabla_nombre}"))
+        return db.session.execute(
+            text("SELECT pg_relation_size(:t), pg_indexes_size(:t)"), {"t": tabla_nombre}
+        ).one()
+    paginas = dict(db.session.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all())
+    indices = db.session.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"),
+        {"t": tabla_nombre},
+    ).scalars()
+    return paginas.get(tabla_nombre, 0), sum(paginas.get(i, 0) for i in indices)
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--supervisores", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--lecturas", type=int, default=300)
+    args = parser.parse_args()
+
+    app = crear_app()
+    from app import db
+    from app.models import Disponibilidad, DisponibilidadDia
+    from app.services import availability_bitmap, get_disponibilidad_rango, slot_disponible
+
+    segundos, ids = cronometrar(poblar, args.supervisores, args.dias)
+    filas_slot = Disponibilidad.query.count()
+    print(f"Datos: {filas_slot:,} slots en filas en {segundos:.1f} s")
+    segundos, dias = cronometrar(availability_bitmap.migrar_desde_filas)
+    print(f"migrar_desde_filas: {dias:,} días en {segundos:.1f} s")
+    db.session.commit()
+
+    filas = []
+    for modo, tabla_nombre, modelo in (
+        ("filas", Disponibilidad.__tablename__, Disponibilidad),
+        ("bitmap", DisponibilidadDia.__tablename__, DisponibilidadDia),
+    ):
+        app.config["AVAILABILITY_STORAGE"] = modo
+        datos, indices = tamanos(tabla_nombre)
+        azar = random.Random(3)
+        meses, slots, sentencias_mes = [], [], 0
+        for _ in range(args.lecturas):
+            s = azar.choice(ids)
+            mes = date(2030, azar.randint(1, max(1, min(12, args.dias // 31))), 1)
+            fin = (mes + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            db.session.expunge_all()
+            with contar_sentencias() as sentencias:
+                meses.append(cronometrar(get_disponibilidad_rango, s, mes, fin)[0])
+            sentencias_mes = len(sentencias)
+            dia = mes + timedelta(days=azar.randrange(28))
+            slots.append(cronometrar(slot_disponible, s, dia, azar.choice(HORAS))[0])
+        filas.append([
+            modo, f"{modelo.query.count():,}", _mb(datos), _mb(indices), sentencias_mes,
+            ms(percentil(meses, 50)), ms(percentil(meses, 99)), ms(statistics.median(slots)),
+        ])
+    tabla(
+        ["modo", "filas", "MB tabla", "MB índices", "sql mes",
+         "mes ms p50", "mes ms p99", "slot_disponible ms"],
+        filas,
+    )
+
+
+if __name__ == "__main__":
+    main()
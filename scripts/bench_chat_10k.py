@@ -0,0 +1,80 @@
+"""
+scripts/bench_chat_10k.py
+Prueba de carga del servidor de chat en modo asyncio: abre 10.000
+conexiones locales a la misma sala, mide la memoria del servidor por
+conexión y la latencia de broadcast (p50/p99) hasta cada cliente.
+
+El servidor corre con --sin-avisos: con avisos de entrada, llenar una
+sala de N clientes cuesta ~N²/2 tramas (50 millones con 10.000).
+Cada conexión usa un descriptor en este proceso y otro en el servidor.
+
+Uso:
+    python scripts/bench_chat_10k.py [--clientes N] [--broadcasts N] [--intervalo S]
+"""
+import argparse
+import asyncio
+import time
+
+from _bench import percentil, tabla
+from _chat_carga import Carga, Servidor, subir_limite_archivos, trama_medicion
+
+
+async def medir(args) -> None:
+    servidor = Servidor("--sin-avisos", "--cola-max", str(args.cola_max))
+    carga = Carga(servidor.puerto)
+    try:
+        base = servidor.rss()
+        inicio = time.perf_counter()
+        await carga.conectar(args.clientes)
+        await carga.esperar_presentes(args.clientes)
+        conexion = time.perf_counter() - inicio
+        await asyncio.sleep(1)
+        por_conexion = (servidor.rss() - base) / args.clientes
+
+        emisor = carga.clientes[0]
+        receptores = args.clientes - 1
+        tiempos_ultimo = []
+        for i in range(args.broadcasts):
+            antes = carga.entregadas()
+            enviado = time.perf_counter()
+            emisor.enviar(trama_medicion(args.tam_mensaje))
+            await emisor.writer.drain()
+            completo = await carga.esperar_entregas(antes + receptores)
+            tiempos_ultimo.append(time.perf_counter() - enviado if completo else float("inf"))
+            await asyncio.sleep(args.intervalo)
+
+        latencias = [ns / 1e6 for ns in carga.latencias]
+        print(f"{args.clientes:,} conexiones en {conexion:.1f} s; "
+              f"servidor: {por_conexion / 1024:.1f} KiB por conexión "
+              f"({servidor.rss() / 1024 / 1024:.0f} MiB en total); "
+              f"desconectados: {carga.desconectados()}")
+        tabla(
+            ["broadcasts", "entregas", "ms p50", "ms p99", "ms máx", "ms último cliente (p50)"],
+            [[
+                args.broadcasts, f"{len(latencias):,}",
+                f"{percentil(latencias, 50):.1f}", f"{percentil(latencias, 99):.1f}",
+                f"{max(latencias):.1f}", f"{percentil(tiempos_ultimo, 50) * 1000:.1f}",
+            ]],
+        )
+    finally:
+        await carga.cerrar()
+        servidor.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clientes", type=int, default=10_000)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--intervalo", type=float, default=0.2, help="segundos entre broadcasts")
+    parser.add_argument("--tam-mensaje", type=int, default=100, help="bytes de relleno por mensaje")
+    parser.add_argument("--cola-max", type=int, default=256)
+    args = parser.parse_args()
+
+    limite = subir_limite_archivos(args.clientes + 256)
+    if limite < args.clientes + 64:
+        parser.error(f"el límite de descriptores es {limite}; suba ulimit -n o baje --clientes")
+    asyncio.run(medir(args))
+
+
+if __name__ == "__main__":
+    main()
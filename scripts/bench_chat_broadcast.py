@@ -0,0 +1,63 @@
+"""
+scripts/bench_chat_broadcast.py
+Mensajes por segundo del servidor de chat (modo asyncio) con 100, 1.000
+y 5.000 clientes en la misma sala: un emisor envía --mensajes tramas
+seguidas y se mide hasta que todos los demás clientes reciben todas.
+
+Uso:
+    python scripts/bench_chat_broadcast.py [--clientes 100 1000 5000] [--mensajes N]
+"""
+import argparse
+import asyncio
+import time
+
+from _bench import percentil, tabla
+from _chat_carga import Carga, Servidor, subir_limite_archivos, trama_medicion
+
+
+async def medir(clientes: int, args) -> list:
+    # La cola del servidor debe admitir la ráfaga entera: no se mide el corte de lentos
+    servidor = Servidor("--sin-avisos", "--cola-max", str(args.mensajes + 64))
+    carga = Carga(servidor.puerto)
+    try:
+        await carga.conectar(clientes)
+        await carga.esperar_presentes(clientes)
+        emisor = carga.clientes[0]
+        esperadas = args.mensajes * (clientes - 1)
+
+        inicio = time.perf_counter()
+        for _ in range(args.mensajes):
+            emisor.enviar(trama_medicion(args.tam_mensaje))
+        await emisor.writer.drain()
+        completo = await carga.esperar_entregas(esperadas, timeout=300)
+        segundos = time.perf_counter() - inicio
+
+        latencias = [ns / 1e6 for ns in carga.latencias]
+        return [
+            f"{clientes:,}", args.mensajes, f"{carga.entregadas():,}" + ("" if completo else " (incompleto)"),
+            f"{segundos:.2f}", f"{args.mensajes / segundos:,.0f}", f"{carga.entregadas() / segundos:,.0f}",
+            f"{percentil(latencias, 50):.0f}", f"{percentil(latencias, 99):.0f}", carga.desconectados(),
+        ]
+    finally:
+        await carga.cerrar()
+        servidor.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clientes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--mensajes", type=int, default=200)
+    parser.add_argument("--tam-mensaje", type=int, default=100, help="bytes de relleno por mensaje")
+    args = parser.parse_args()
+
+    subir_limite_archivos(max(args.clientes) + 256)
+    filas = [asyncio.run(medir(n, args)) for n in args.clientes]
+    tabla(
+        ["clientes", "mensajes", "entregas", "s", "mensajes/s", "entregas/s",
+         "ms p50", "ms p99", "desconectados"],
+        filas,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+scripts/bench_dashboard_stats.py
+Latencia de las estadísticas del dashboard admin sobre evaluaciones
+sintéticas (1M filas por defecto): los siete COUNT(*) anteriores, la
+consulta agregada única y el snapshot (ADMIN_STATS_SNAPSHOT).
+
+Uso:
+    python scripts/bench_dashboard_stats.py [--filas N] [--repeticiones N]
+"""
+import argparse
+import random
+import statistics
+from datetime import date, datetime, timedelta, timezone
+
+from _bench import contar_sentencias, crear_app, cronometrar, ms, tabla
+
+SUPERVISORES = 200
+CHALLENGES = 20
+LOTE = 50_000
+PESOS_ESTADO = {"PENDIENTE": 5, "CONFIRMADO": 50, "RECHAZADO": 15, "CANCELADO_AUTO": 30}
+
+
+def poblar(filas: int) -> None:
+    """SUPERVISORES, CHALLENGES y `filas` evaluaciones con estados al azar."""
+    from app import db
+    from app.models import Challenge, Evaluacion, User
+
+    db.session.execute(User.__table__.insert(), [
+        {"nombre": f"Supervisor {i}", "email": f"sup{i}@example.com", "password_hash": "x",
+         "rol": "SUPERVISOR", "activo": True}
+        for i in range(SUPERVISORES)
+    ])
+    db.session.execute(Challenge.__table__.insert(), [
+        {"nombre": f"Challenge {i}", "activo": True} for i in range(CHALLENGES)
+    ])
+    supervisor_ids = [u for (u,) in db.session.query(User.id)]
+    challenge_ids = [c for (c,) in db.session.query(Challenge.id)]
+
+    azar = random.Random(7)
+    estados = azar.choices(list(PESOS_ESTADO), weights=list(PESOS_ESTADO.values()), k=filas)
+    creada = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for desde in range(0, filas, LOTE):
+        db.session.execute(Evaluacion.__table__.insert(), [
+            {
+                "supervisor_id": azar.choice(supervisor_ids),
+                "challenge_id": azar.choice(challenge_ids),
+                "nombre_solicitante": "Solicitante",
+                "email_solicitante": f"s{i}@example.com",
+                "fecha": date(2025, 1, 1) + timedelta(days=i % 365),
+                "hora": f"{8 + i % 12:02d}:00",
+                "estado": estados[i],
+                "created_at": creada + timedelta(seconds=i),
+                "recordatorio_enviado": False,
+            }
+            for i in range(desde, min(desde + LOTE, filas))
+        ])
+        db.session.commit()
+        print(f"  {min(desde + LOTE, filas):,} evaluaciones", end="\r")
+    print()
+
+
+def conteos_anteriores() -> dict:
+    """admin.dashboard antes de la consulta agregada: siete COUNT(*)."""
+    from app.models import Challenge, Evaluacion, User
+
+    return {
+        "supervisores": User.query.filter_by(rol="SUPERVISOR", activo=True).count(),
+        "challenges": Challenge.query.filter_by(activo=True).count(),
+        "evaluaciones": Evaluacion.query.count(),
+        "pendientes": Evaluacion.query.filter_by(estado="PENDIENTE").count(),
+        "confirmadas": Evaluacion.query.filter_by(estado="CONFIRMADO").count(),
+        "rechazadas": Evaluacion.query.filter_by(estado="RECHAZADO").count(),
+        "canceladas": Evaluacion.query.filter_by(estado="CANCELADO_AUTO").count(),
+    }
+
+
+def _medir(fn, repeticiones: int):
+    fn()    # calentamiento (caché de páginas de la base)
+    tiempos = []
+    for _ in range(repeticiones):
+        with contar_sentencias() as sentencias:
+            segundos, resultado = cronometrar(fn)
+        tiempos.append(segundos)
+    return len(sentencias), ms(statistics.median(tiempos)), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    app = crear_app()
+    from app.services import stats_service
+
+    cronometrado, _ = cronometrar(poblar, args.filas)
+    print(f"Datos sintéticos: {args.filas:,} evaluaciones en {cronometrado:.1f} s")
+
+    filas = []
+    esperado = None
+    for nombre, snapshot, fn in (
+        ("7 x COUNT(*) (anterior)", False, conteos_anteriores),
+        ("GROUP BY estado", False, stats_service.estadisticas_dashboard),
+        ("snapshot", True, stats_service.estadisticas_dashboard),
+    ):
+        app.config["ADMIN_STATS_SNAPSHOT"] = snapshot
+        sentencias, mediana, resultado = _medir(fn, args.repeticiones)
+        esperado = esperado or resultado
+        filas.append([nombre, sentencias, mediana, "sí" if resultado == esperado else "NO"])
+
+    segundos, _ = cronometrar(stats_service.refrescar_snapshot)
+    filas.append(["refrescar_snapshot (job)", "-", ms(segundos), "-"])
+    tabla(["estadísticas", "sql", "ms mediana", "mismos conteos"], filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+scripts/bench_disponibilidad_bulk.py
+Sentencias SQL y latencia de guardar_disponibilidad_bulk para 10, 100 y
+1.000 slots, contra el guardado anterior de un SELECT por slot.
+
+Uso:
+    python scripts/bench_disponibilidad_bulk.py [--repeticiones N]
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_disponibilidad_bulk.py
+"""
+import argparse
+import statistics
+from datetime import date, timedelta
+
+from _bench import contar_sentencias, crear_app, cronometrar, ms, tabla
+
+TAMANOS = (10, 100, 1000)
+
+
+def _slots(n: int) -> list:
+    """n slots horarios (08:00-19:00) desde el 1 de enero de 2030."""
+    horas = [f"{h:02d}:00" for h in range(8, 20)]
+    inicio = date(2030, 1, 1)
+    return [
+        {"fecha": inicio + timedelta(days=i // len(horas)), "hora": horas[i % len(horas)]}
+        for i in range(n)
+    ]
+
+
+def guardar_por_slot(supervisor_id: int, slots: list) -> None:
+    """El guardado anterior: un SELECT ... first() por slot."""
+    from app import db
+    from app.models import Disponibilidad
+
+    for s in slots:
+        existente = Disponibilidad.query.filter_by(
+            supervisor_id=supervisor_id, fecha=s["fecha"], hora=s["hora"]
+        ).first()
+        if existente:
+            existente.disponible = True
+        else:
+            db.session.add(Disponibilidad(
+                supervisor_id=supervisor_id, fecha=s["fecha"], hora=s["hora"], disponible=True,
+            ))
+    db.session.commit()
+
+
+def _medir(guardar, supervisor_id: int, slots: list, repeticiones: int):
+    """(sentencias, ms mediana) de guardar en vacío y de volver a guardar lo mismo."""
+    from app import db
+    from app.models import Disponibilidad
+
+    vacio, repetido = [], []
+    for _ in range(repeticiones):
+        Disponibilidad.query.filter_by(supervisor_id=supervisor_id).delete()
+        db.session.commit()
+        db.session.expunge_all()
+        with contar_sentencias() as primera:
+            vacio.append(cronometrar(guardar, supervisor_id, slots)[0])
+        db.session.expunge_all()
+        with contar_sentencias() as segunda:
+            repetido.append(cronometrar(guardar, supervisor_id, slots)[0])
+    return (
+        len(primera), ms(statistics.median(vacio)),
+        len(segunda), ms(statistics.median(repetido)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    crear_app()
+    from app import db
+    from app.models import User
+    from app.services import guardar_disponibilidad_bulk
+
+    supervisor = User(nombre="Bench", email="bench@example.com", rol="SUPERVISOR", password_hash="x")
+    db.session.add(supervisor)
+    db.session.commit()
+    supervisor_id = supervisor.id
+
+    filas = []
+    for n in TAMANOS:
+        slots = _slots(n)
+        for nombre, guardar in (("por slot", guardar_por_slot), ("bulk", guardar_disponibilidad_bulk)):
+            filas.append([n, nombre, *_medir(guardar, supervisor_id, slots, args.repeticiones)])
+    tabla(["slots", "modo", "sql nuevo", "ms nuevo", "sql repetido", "ms repetido"], filas)
+
+
+if __name__ == "__main__":
+    main()
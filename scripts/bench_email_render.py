@@ -0,0 +1,91 @@
+"""
+scripts/bench_email_render.py
+Renders por segundo de los correos: la plantilla Jinja precompilada
+(renderizar y renderizar_lote) contra el f-string + str.format anterior
+y contra compilar la plantilla en cada envío (render_template_string).
+
+Uso:
+    python scripts/bench_email_render.py [--mensajes N]
+"""
+import argparse
+import os
+from datetime import date
+from types import SimpleNamespace
+
+from _bench import RAIZ, crear_app, cronometrar, tabla
+
+
+def _base_anterior() -> str:
+    """El _BASE de antes: el mismo HTML, como plantilla de str.format."""
+    with open(os.path.join(RAIZ, "app", "templates", "emails", "base.html"), encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace("{", "{{").replace("}", "}}")
+    return html.replace("{{% block content %}}{{% endblock %}}", "{content}")
+
+
+def renderizar_anterior(base: str, evaluacion) -> str:
+    """Cuerpo de enviar_confirmacion antes de las plantillas precompiladas."""
+    content = f"""
+    <h2>Evaluación confirmada 🎉</h2>
+    <p>Hola <strong>{evaluacion.nombre_solicitante}</strong>, tu evaluación ha sido <strong>confirmada</strong>.</p>
+    <div class="detail-box">
+      <div class="detail-row"><span class="label">Supervisor: </span><span class="value">{evaluacion.supervisor.nombre}</span></div>
+      <div class="detail-row"><span class="label">Challenge: </span><span class="value">{evaluacion.challenge.nombre}</span></div>
+      <div class="detail-row"><span class="label">Fecha: </span><span class="value">{evaluacion.fecha.strftime('%d/%m/%Y')}</span></div>
+      <div class="detail-row"><span class="label">Hora: </span><span class="value">{evaluacion.hora} (duración: 1 hora)</span></div>
+      <div class="detail-row"><span class="label">Estado: </span><span class="value"><span class="badge badge-confirmado">CONFIRMADO</span></span></div>
+    </div>
+    <p>¡Mucho éxito en tu evaluación! Recibirás un recordatorio 1 hora antes.</p>
+    """
+    return base.format(content=content)
+
+
+def _evaluaciones(n: int) -> list:
+    supervisor = SimpleNamespace(nombre="Supervisor <Bench>", email="supervisor@example.com")
+    challenge = SimpleNamespace(nombre="Challenge & Co")
+    return [
+        SimpleNamespace(
+            id=i, nombre_solicitante=f"Solicitante {i}", email_solicitante=f"s{i}@example.com",
+            supervisor=supervisor, challenge=challenge, fecha=date(2030, 1, 7), hora="09:00",
+        )
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensajes", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = crear_app()
+    from app.services.email_service import precargar_plantillas, renderizar, renderizar_lote
+
+    precargar_plantillas(app)
+    evaluaciones = _evaluaciones(args.mensajes)
+    base = _base_anterior()
+    with open(os.path.join(RAIZ, "app", "templates", "emails", "confirmacion.html"), encoding="utf-8") as f:
+        fuente = f.read()
+
+    def compilar_cada_vez(ev):
+        return app.jinja_env.from_string(fuente).render(evaluacion=ev)
+
+    modos = (
+        ("f-string + str.format", lambda: [renderizar_anterior(base, ev) for ev in evaluaciones]),
+        ("render_template_string", lambda: [compilar_cada_vez(ev) for ev in evaluaciones]),
+        ("renderizar", lambda: [renderizar("confirmacion", ev) for ev in evaluaciones]),
+        ("renderizar_lote", lambda: renderizar_lote("confirmacion", evaluaciones)),
+    )
+    filas = []
+    for nombre, fn in modos:
+        fn()    # calentamiento
+        segundos, htmls = cronometrar(fn)
+        filas.append([
+            nombre, f"{len(htmls) / segundos:,.0f}", f"{segundos / len(htmls) * 1e6:.1f}",
+            "sí" if "&lt;Bench&gt;" in htmls[0] else "no",
+        ])
+    print(f"{args.mensajes} correos de confirmación")
+    tabla(["modo", "renders/s", "µs/render", "escapa HTML"], filas)
+
+
+if __name__ == "__main__":
+    main()
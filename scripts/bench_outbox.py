@@ -0,0 +1,95 @@
+"""
+scripts/bench_outbox.py
+Throughput de procesar_outbox contra un servidor SMTP local (sumidero)
+que tarda --latencia-ms en aceptar cada mensaje, con distintas
+concurrencias y con el límite por dominio.
+
+Uso:
+    python scripts/bench_outbox.py [--mensajes N] [--latencia-ms N] [--dominios N]
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+from _bench import crear_app, cronometrar, tabla
+
+
+class Sumidero(socketserver.ThreadingTCPServer):
+    """SMTP mínimo que descarta los mensajes tras `latencia` segundos."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latencia: float):
+        super().__init__(("127.0.0.1", 0), ManejadorSumidero)
+        self.latencia = latencia
+        self.recibidos = 0
+        self.lock = threading.Lock()
+
+
+class ManejadorSumidero(socketserver.StreamRequestHandler):
+    def responder(self, linea: str) -> None:
+        self.wfile.write(linea.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.responder("220 sumidero")
+        while linea := self.rfile.readline():
+            comando = linea[:4].upper()
+            if comando == b"DATA":
+                self.responder("354 fin con <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(self.server.latencia)
+                with self.server.lock:
+                    self.server.recibidos += 1
+            elif comando == b"QUIT":
+                self.responder("221 adios")
+                return
+            self.responder("250 ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mensajes", type=int, default=500)
+    parser.add_argument("--latencia-ms", type=float, default=20)
+    parser.add_argument("--dominios", type=int, default=10)
+    args = parser.parse_args()
+
+    sumidero = Sumidero(args.latencia_ms / 1000)
+    threading.Thread(target=sumidero.serve_forever, daemon=True).start()
+
+    app = crear_app(EMAIL_OUTBOX_BATCH_SIZE=args.mensajes)
+    estado = app.extensions["mail"]
+    estado.server, estado.port = sumidero.server_address
+    estado.use_tls = estado.use_ssl = estado.suppress = False
+    estado.username = estado.password = None
+    estado.debug = 0     # MAIL_DEBUG sigue a DEBUG en desarrollo
+
+    from app import db
+    from app.models import EmailOutbox
+    from app.services.email_outbox import encolar, procesar_outbox
+
+    html = "<p>" + "Recordatorio de evaluación. " * 40 + "</p>"
+    filas = []
+    for concurrencia, por_dominio in ((1, 0), (2, 0), (4, 0), (8, 0), (4, 10)):
+        EmailOutbox.query.delete()
+        for i in range(args.mensajes):
+            encolar(f"s{i}@dominio{i % args.dominios}.example", "Recordatorio", html)
+        db.session.commit()
+        app.config.update(EMAIL_OUTBOX_CONCURRENCIA=concurrencia, EMAIL_DOMINIO_POR_SEGUNDO=por_dominio)
+
+        antes = sumidero.recibidos
+        segundos, enviados = cronometrar(procesar_outbox, app)
+        filas.append([
+            concurrencia, por_dominio or "-", enviados, sumidero.recibidos - antes,
+            f"{segundos:.2f}", f"{enviados / segundos:.0f}",
+        ])
+    print(f"{args.mensajes} mensajes a {args.dominios} dominios; "
+          f"el sumidero tarda {args.latencia_ms:g} ms por mensaje")
+    tabla(["conexiones", "máx/s por dominio", "enviados", "recibidos", "s", "mensajes/s"], filas)
+    sumidero.shutdown()
+
+
+if __name__ == "__main__":
+    main()
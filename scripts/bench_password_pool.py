@@ -0,0 +1,80 @@
+"""
+scripts/bench_password_pool.py
+Verificaciones bcrypt por segundo, latencia y rechazos (PoolSaturado, que
+la ruta convierte en 503) con N hilos de request concurrentes, en el hilo
+del request (PASSWORD_POOL_WORKERS=0) y con el pool de hilos acotado.
+
+Uso:
+    python scripts/bench_password_pool.py [--rondas N] [--por-hilo N]
+"""
+import argparse
+import os
+import threading
+import time
+
+from _bench import crear_app, ms, percentil, tabla
+
+CONCURRENCIAS = (1, 8, 64)
+WORKERS = (0, 2, 4)
+
+
+def _correr(app, concurrencia: int, por_hilo: int, password_hash: str) -> tuple:
+    from app.services import password_service
+    from app.services.password_service import PoolSaturado
+
+    latencias, rechazos = [], []
+    barrera = threading.Barrier(concurrencia)
+
+    def request():
+        with app.app_context():
+            barrera.wait()
+            for _ in range(por_hilo):
+                inicio = time.perf_counter()
+                try:
+                    password_service.verificar("secreta", password_hash)
+                except PoolSaturado:
+                    rechazos.append(1)
+                else:
+                    latencias.append(time.perf_counter() - inicio)
+
+    hilos = [threading.Thread(target=request) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return time.perf_counter() - inicio, latencias, len(rechazos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rondas", type=int, default=10)
+    parser.add_argument("--por-hilo", type=int, default=4, help="verificaciones por hilo")
+    parser.add_argument("--max-pendientes", type=int, default=32)
+    args = parser.parse_args()
+
+    app = crear_app(BCRYPT_ROUNDS=args.rondas, PASSWORD_POOL_MAX_PENDIENTES=args.max_pendientes)
+    from app.services import password_service
+
+    password_hash = password_service.hashear("secreta")
+    filas = []
+    for workers in WORKERS:
+        app.config["PASSWORD_POOL_WORKERS"] = workers
+        for concurrencia in CONCURRENCIAS:
+            segundos, latencias, rechazos = _correr(app, concurrencia, args.por_hilo, password_hash)
+            filas.append([
+                workers or "en el request", concurrencia, len(latencias), rechazos,
+                f"{len(latencias) / segundos:.1f}",
+                ms(percentil(latencias, 50)) if latencias else "-",
+                ms(percentil(latencias, 99)) if latencias else "-",
+            ])
+        if password_service._pool is not None:
+            password_service._descartar_pool(password_service._pool)
+
+    print(f"bcrypt {args.rondas} rondas, {os.cpu_count()} CPU, "
+          f"PASSWORD_POOL_MAX_PENDIENTES={args.max_pendientes}")
+    tabla(["workers", "hilos", "verificadas", "503", "por s", "ms p50", "ms p99"], filas)
+
+
+if __name__ == "__main__":
+    main()
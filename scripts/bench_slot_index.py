@@ -0,0 +1,139 @@
+"""
+scripts/bench_slot_index.py
+Búsqueda de los primeros N slots libres entre supervisores con el índice
+en memoria (slot_index) contra una consulta por supervisor, con 1.000
+supervisores x 90 días de slots horarios por defecto.
+
+Uso:
+    python scripts/bench_slot_index.py [--supervisores N] [--dias N] [--busquedas N]
+"""
+import argparse
+import heapq
+import random
+from datetime import date, timedelta
+
+from _bench import contar_sentencias, crear_app, cronometrar, ms, percentil, tabla
+
+HORAS = [f"{h:02d}:00" for h in range(8, 18)]
+LOTE = 50_000
+
+
+def poblar(supervisores: int, dias: int) -> None:
+    """Slots horarios (HORAS) desde mañana; ~10% ya bloqueados."""
+    from app import db
+    from app.models import Disponibilidad, User
+
+    db.session.execute(User.__table__.insert(), [
+        {"nombre": f"Supervisor {i}", "email": f"sup{i}@example.com", "password_hash": "x",
+         "rol": "SUPERVISOR", "activo": True}
+        for i in range(supervisores)
+    ])
+    ids = [u for (u,) in db.session.query(User.id)]
+    azar = random.Random(7)
+    manana = date.today() + timedelta(days=1)
+    filas = (
+        {"supervisor_id": s, "fecha": manana + timedelta(days=d), "hora": h,
+         "disponible": azar.random() >= 0.1, "duracion_min": 60}
+        for s in ids for d in range(dias) for h in HORAS
+    )
+    total = 0
+    while lote := [f for _, f in zip(range(LOTE), filas)]:
+        db.session.execute(Disponibilidad.__table__.insert(), lote)
+        db.session.commit()
+        total += len(lote)
+        print(f"  {total:,} slots", end="\r")
+    print()
+
+
+def buscar_por_supervisor(n: int, desde: date, hasta: date, hora_desde=None, hora_hasta=None) -> list:
+    """Sin índice: los libres de cada supervisor, uno por uno, y luego mezclar."""
+    from app.models import User
+    from app.services.availability_service import _libres
+
+    ids = [u for (u,) in User.query.with_entities(User.id).filter_by(rol="SUPERVISOR", activo=True)]
+    por_supervisor = [
+        [(fecha, hora, s) for s, fecha, hora in _libres(desde, hasta, s, None, hora_desde, hora_hasta)]
+        for s in ids
+    ]
+    return list(heapq.merge(*por_supervisor))[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--supervisores", type=int, default=1000)
+    parser.add_argument("--dias", type=int, default=90)
+    parser.add_argument("--busquedas", type=int, default=1000)
+    parser.add_argument("--n", type=int, default=10)
+    args = parser.parse_args()
+
+    crear_app(SLOT_INDEX_DIAS=args.dias)
+    from app import db
+    from app.models import Disponibilidad
+    from app.services import bloquear_slot, liberar_slot
+    from app.services.slot_index import indice
+
+    segundos, _ = cronometrar(poblar, args.supervisores, args.dias)
+    print(f"Datos: {args.supervisores:,} supervisores x {args.dias} días x {len(HORAS)} slots "
+          f"en {segundos:.1f} s")
+    indice.configurar(ttl=3600, dias=args.dias)
+    hoy = date.today()
+    hasta = hoy + timedelta(days=args.dias)
+    azar = random.Random(11)
+
+    def filtros():
+        desde = hoy + timedelta(days=azar.randrange(args.dias))
+        hora_desde = azar.choice(HORAS[:5])
+        return desde, desde + timedelta(days=14), hora_desde, HORAS[-1]
+
+    filas = []
+    with contar_sentencias() as sentencias:
+        segundos, _ = cronometrar(indice.buscar, args.n)
+    filas.append(["construir índice (1a búsqueda)", len(sentencias), ms(segundos), "-"])
+
+    tiempos = []
+    with contar_sentencias() as sentencias:
+        for _ in range(args.busquedas):
+            tiempos.append(cronometrar(indice.buscar, args.n, *filtros())[0])
+    filas.append([
+        f"buscar con índice (x{args.busquedas})", len(sentencias),
+        ms(percentil(tiempos, 50)), ms(percentil(tiempos, 99)),
+    ])
+
+    # Bloquear el primer slot libre y buscar de nuevo: solo se recarga ese día
+    supervisor_id, fecha, hora = (
+        db.session.query(Disponibilidad.supervisor_id, Disponibilidad.fecha, Disponibilidad.hora)
+        .filter_by(disponible=True)
+        .order_by(Disponibilidad.fecha, Disponibilidad.hora)
+        .first()
+    )
+    tiempos = []
+    with contar_sentencias() as sentencias:
+        for _ in range(20):
+            bloquear_slot(supervisor_id, fecha, hora)
+            db.session.commit()
+            tiempos.append(cronometrar(indice.buscar, args.n)[0])
+            liberar_slot(supervisor_id, fecha, hora)
+            db.session.commit()
+    filas.append([
+        "bloquear + buscar + liberar (x20)", len(sentencias) // 20,
+        ms(percentil(tiempos, 50)), ms(percentil(tiempos, 99)),
+    ])
+
+    tiempos = []
+    with contar_sentencias() as sentencias:
+        for _ in range(3):
+            tiempos.append(cronometrar(buscar_por_supervisor, args.n, *filtros())[0])
+    filas.append([
+        "buscar supervisor por supervisor (x3)", len(sentencias) // 3,
+        ms(percentil(tiempos, 50)), ms(max(tiempos)),
+    ])
+
+    primeros = indice.buscar(args.n, hoy, hasta)
+    iguales = primeros == buscar_por_supervisor(args.n, hoy, hasta)
+    print(f"Slots en el índice: {len(indice._ordenados):,}; mismo resultado que sin índice: "
+          f"{'sí' if iguales else 'NO'}")
+    tabla(["operación", "sql", "ms p50", "ms p99/máx"], filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,135 @@
+import argparse
+import asyncio
+import os
 import socket
+import struct
 import threading
+import time
+from datetime import datetime, timedelta, timezone
 
+from config.settings import Config
+
+
+HOST = "localhost"
+PUERTO = 9999
+
+# Protocolo: cada mensaje viaja como [longitud u32 big-endian][payload utf-8]
+CABECERA = struct.Struct("!I")
+MAX_TRAMA = 1024 * 1024
+TAM_LECTURA = 64 * 1024
+# Buffer inicial del decodificador en modo asyncio: crece (duplicándose)
+# solo si llega una trama más grande, y así 10.000 conexiones ociosas no
+# reservan 64 KiB cada una
+TAM_BUFFER_CLIENTE = 4 * 1024
+
+# Modo asyncio: mensajes que pueden quedar pendientes por cliente antes de
+# considerarlo lento y desconectarlo, y segundos que puede tardar un envío
+COLA_MAX = 256
+ESCRITURA_TIMEOUT = 10
+
+
+# ── Tramas ─────────────────────────────────────────────────────────
+
+class TramaInvalida(Exception):
+    pass
+
+
+def codificar(payload):
+    """Trama lista para enviar; se codifica una vez y se comparte entre destinatarios."""
+    if len(payload) > MAX_TRAMA:
+        raise TramaInvalida(f"mensaje de {len(payload)} bytes (máximo {MAX_TRAMA})")
+    return CABECERA.pack(len(payload)) + payload
+
+
+class DecodificadorTramas:
+    """
+    Decodificador incremental de tramas sobre un bytearray reutilizable.
+
+    Los datos se escriben en espacio() (recv_into) o se copian con
+    alimentar(); las tramas completas se extraen recorriendo un memoryview
+    sin recortar el buffer, que solo se compacta cuando se llena.
+    """
+
+    def __init__(self, max_trama=MAX_TRAMA, tam_buffer=TAM_LECTURA):
+        self.max_trama = max_trama
+        self._buffer = bytearray(tam_buffer)
+        self._vista = memoryview(self._buffer)
+        self._inicio = 0    # primer byte sin consumir
+        self._fin = 0       # fin de los datos recibidos
+
+    def espacio(self):
+        """Zona libre del buffer donde escribir lo próximo que llegue."""
+        if self._fin == len(self._buffer):
+            pendientes = self._fin - self._inicio
+            if self._inicio:
+                self._vista[:pendientes] = self._vista[self._inicio:self._fin]
+            else:
+                # Una sola trama más grande que el buffer: duplicarlo
+                nuevo = bytearray(2 * len(self._buffer))
+                nuevo[:pendientes] = self._vista[:pendientes]
+                self._buffer = nuevo
+                self._vista = memoryview(nuevo)
+            self._inicio, self._fin = 0, pendientes
+        return self._vista[self._fin:]
+
+    def avanzar(self, n):
+        """Registra n bytes escritos en espacio() y retorna las tramas completas."""
+        self._fin += n
+        return self._extraer()
+
+    def alimentar(self, datos):
+        tramas = []
+        datos = memoryview(datos)
+        while datos:
+            libre = self.espacio()
+            n = min(len(libre), len(datos))
+            libre[:n] = datos[:n]
+            datos = datos[n:]
+            tramas += self.avanzar(n)
+        return tramas
+
+    def _extraer(self):
+        tramas = []
+        while self._fin - self._inicio >= CABECERA.size:
+            (largo,) = CABECERA.unpack_from(self._vista, self._inicio)
+            if largo > self.max_trama:
+                raise TramaInvalida(f"trama de {largo} bytes (máximo {self.max_trama})")
+            desde = self._inicio + CABECERA.size
+            if self._fin - desde < largo:
+                break
+            tramas.append(bytes(self._vista[desde:desde + largo]))
+            self._inicio = desde + largo
+        if self._inicio == self._fin:
+            self._inicio = self._fin = 0
+        return tramas
+
+
+def recibir_trama(conn, decodificador, pendientes):
+    """Bloquea hasta tener una trama completa (modo hilos). None si se cerró."""
+    while not pendientes:
+        n = conn.recv_into(decodificador.espacio())
+        if not n:
+            return None
+        pendientes.extend(decodificador.avanzar(n))
+    return pendientes.pop(0)
+
+
+# ── Modo hilos (un hilo por cliente) ───────────────────────────────
 
 clientes = []
+clientes_lock = threading.Lock()
 
 
 def broadcast(mensaje, remitente):
 
-    for cliente in clientes:
-        if cliente != remitente:
-            try:
-                cliente.send(mensaje)
-            except:
+    trama = codificar(mensaje)
+    with clientes_lock:
+        destinos = [c for c in clientes if c != remitente]
+    for cliente in destinos:
+        try:
+            cliente.sendall(trama)
+        except:
+            with clientes_lock:
                 if cliente in clientes:
                     clientes.remove(cliente)
 
@@ -19,8 +137,10 @@ def broadcast(mensaje, remitente):
 def manejar_clientes(conn, addr):
 
     print(f"[HILO] manejando cliente {addr}")
+    decodificador = DecodificadorTramas()
+    pendientes = []
     try:
-        nombre = conn.recv(1024).decode("utf-8")
+        nombre = recibir_trama(conn, decodificador, pendientes).decode("utf-8")
     except:
         nombre = "Usuario desconocido"
 
@@ -30,8 +150,8 @@ def manejar_clientes(conn, addr):
     broadcast(mensaje_conexion, conn)
     while True:
         try:
-            mensaje = conn.recv(1024)
-            if not mensaje:
+            mensaje = recibir_trama(conn, decodificador, pendientes)
+            if mensaje is None:
                 break
 
             print(f'Mensaje de {addr}: {mensaje.decode("utf-8")}')
@@ -42,46 +162,429 @@ def manejar_clientes(conn, addr):
             break
 
     print(f"Cliente {addr} desconectado")
-    if conn in clientes:
-        clientes.remove(conn)
+    with clientes_lock:
+        if conn in clientes:
+            clientes.remove(conn)
     conn.close()
 
 
-# SOL_SOCKET  es como si fuera una libreria donde esta SO_REUSEADDR
-# el uno simboliza el True
-# SOCK_STREAM protocolo de envio de datos
-server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-server_socket.bind(("localhost", 9999))
-server_socket.listen(5)
+def servir_con_hilos(host, puerto):
 
-server_socket.settimeout(1)
+    # SOL_SOCKET  es como si fuera una libreria donde esta SO_REUSEADDR
+    # el uno simboliza el True
+    # SOCK_STREAM protocolo de envio de datos
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind((host, puerto))
+    server_socket.listen(5)
 
-print("Servidor esperando conexion")
+    server_socket.settimeout(1)
 
-try:
+    print("Servidor esperando conexion")
 
-    while True:
+    try:
+
+        while True:
+            try:
+                conn, addr = server_socket.accept()
+                with clientes_lock:
+                    clientes.append(conn)
+                    total = len(clientes)
+
+                print(f"Nuevo cliente: {addr}. Total: {total}")
+                # iniciar hilo para recibir
+
+                hilo = threading.Thread(target=manejar_clientes, args=(conn, addr))
+                hilo.daemon = True
+                hilo.start()
+            except socket.timeout:
+                continue
+
+    except KeyboardInterrupt:
+        print("\nCerrando servidor")
+        with clientes_lock:
+            for cliente in clientes:
+                try:
+                    cliente.close()
+                except:
+                    pass
+        server_socket.close()
+        print("servidor cerrado")
+
+
+# ── Salas de evaluaciones (modo asyncio) ───────────────────────────
+
+SALA_GENERAL = "general"
+TTL_SALAS = 30          # segundos entre recargas del mapa de salas
+MARGEN_SALA_MIN = 15    # minutos antes/después del slot en que la sala está abierta
+CONSULTAS_POR_MINUTO = 10   # salas fuera del mapa que cada IP puede hacer consultar
+MAX_SALAS_AUSENTES = 1024   # salas consultadas que no existen, recordadas hasta la recarga
+
+
+class AutorizadorSalas:
+    """
+    Caché sala -> emails autorizados, leída de la base de reservas.
+
+    Cada evaluación CONFIRMADA es una sala ("<id>") abierta para su
+    solicitante y su supervisor desde MARGEN_SALA_MIN antes de inicio_at
+    hasta MARGEN_SALA_MIN después de fin_at. Para entrar hace falta el
+    token que la app firma con SECRET_KEY (app/services/chat_tokens.py)
+    para esa evaluación y ese email; el token no caduca por su cuenta,
+    su validez es la ventana de la sala.
+
+    El mapa se recarga completo cada TTL_SALAS segundos (así se ven las
+    confirmaciones, rechazos y cancelaciones) y, ante una sala que no
+    está, se consulta solo esa evaluación: como mucho
+    CONSULTAS_POR_MINUTO veces por IP, y las que no existen se recuerdan
+    (hasta MAX_SALAS_AUSENTES) sin volver a consultarlas hasta la
+    siguiente recarga. Ningún mensaje consulta la base.
+    """
+
+    def __init__(self, database_url, secret_key, ttl=TTL_SALAS, margen_min=MARGEN_SALA_MIN,
+                 consultas_por_minuto=CONSULTAS_POR_MINUTO):
+        from sqlalchemy import create_engine
+
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self.secret_key = secret_key
+        self.ttl = ttl
+        self.margen = timedelta(minutes=margen_min)
+        self.consultas_por_minuto = consultas_por_minuto
+        self._salas = {}        # sala -> (emails, abre, cierra)
+        self._ausentes = {}     # salas consultadas que no existen
+        self._cargado_en = None
+        self._ventana = None    # minuto en curso del límite de consultas
+        self._consultas = {}    # IP -> consultas en la ventana
+
+    def _consulta(self):
+        from sqlalchemy import func, select
+        from app.models import Evaluacion, User
+
+        evaluaciones, usuarios = Evaluacion.__table__, User.__table__
+        return (
+            select(
+                evaluaciones.c.id,
+                func.lower(evaluaciones.c.email_solicitante),
+                func.lower(usuarios.c.email),
+                evaluaciones.c.inicio_at,
+                evaluaciones.c.fin_at,
+            )
+            .join(usuarios, usuarios.c.id == evaluaciones.c.supervisor_id)
+            .where(
+                evaluaciones.c.estado == "CONFIRMADO",
+                evaluaciones.c.inicio_at.isnot(None),
+                evaluaciones.c.fin_at.isnot(None),
+            )
+        )
+
+    def _cargar(self, evaluacion_id=None):
+        from app.models import Evaluacion
+
+        evaluaciones = Evaluacion.__table__
+        consulta = self._consulta()
+        if evaluacion_id is None:
+            consulta = consulta.where(evaluaciones.c.fin_at >= datetime.now(timezone.utc) - self.margen)
+        else:
+            consulta = consulta.where(evaluaciones.c.id == evaluacion_id)
+        with self.engine.connect() as conn:
+            filas = conn.execute(consulta).all()
+        return {
+            str(id_): (frozenset((solicitante, supervisor)), _utc(inicio) - self.margen, _utc(fin) + self.margen)
+            for id_, solicitante, supervisor, inicio, fin in filas
+        }
+
+    async def refrescar(self):
+        self._salas = await asyncio.to_thread(self._cargar)
+        self._ausentes = {}
+        self._cargado_en = time.monotonic()
+
+    def vencido(self):
+        return self._cargado_en is None or time.monotonic() - self._cargado_en > self.ttl
+
+    def leer_token(self, sala, token):
+        """Email que el token autoriza en `sala`; None si es inválido o es de otra."""
+        from app.services.chat_tokens import leer_token_sala
+
+        if not token:
+            return None
+        datos = leer_token_sala(token, self.secret_key)
+        if datos is None or str(datos[0]) != sala:
+            return None
+        return datos[1]
+
+    def permite(self, sala, email):
+        """Consulta solo la caché; None si la sala aún no está cargada."""
+        if sala not in self._salas:
+            return None
+        if not email:
+            return False
+        emails, abre, cierra = self._salas[sala]
+        return email.lower() in emails and abre <= datetime.now(timezone.utc) <= cierra
+
+    def _puede_consultar(self, origen):
+        """Ventana fija de un minuto con como mucho consultas_por_minuto por origen."""
+        ventana = int(time.monotonic() // 60)
+        if ventana != self._ventana:
+            self._ventana, self._consultas = ventana, {}
+        hechas = self._consultas.get(origen, 0)
+        if hechas >= self.consultas_por_minuto:
+            return False
+        self._consultas[origen] = hechas + 1
+        return True
+
+    async def autorizado(self, sala, email, origen=None):
+        if self.vencido():
+            await self.refrescar()
+        permitido = self.permite(sala, email)
+        if permitido is None:
+            if not sala.isdigit() or sala in self._ausentes or not self._puede_consultar(origen):
+                return False
+            self._salas.update(await asyncio.to_thread(self._cargar, int(sala)))
+            if sala not in self._salas:
+                if len(self._ausentes) >= MAX_SALAS_AUSENTES:
+                    del self._ausentes[next(iter(self._ausentes))]
+                self._ausentes[sala] = True
+                return False
+            permitido = self.permite(sala, email)
+        return permitido
+
+
+def _utc(momento):
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+# ── Modo asyncio (un solo hilo, escrituras encoladas) ──────────────
+
+class Cliente:
+    """Conexión de un cliente con su cola de salida acotada."""
+
+    __slots__ = ("addr", "writer", "cola", "tarea", "nombre", "email", "sala")
+
+    def __init__(self, addr, writer, cola_max):
+        self.addr = addr
+        self.writer = writer
+        self.cola = asyncio.Queue(maxsize=cola_max)
+        self.tarea = None
+        self.nombre = None
+        self.email = None
+        self.sala = None
+
+
+class ServidorChat:
+    """
+    Servidor de chat sobre asyncio con salas.
+
+    Cada cliente está en una sala (al conectarse, "general"); salas es el
+    índice sala -> conexiones, así que un mensaje cuesta lo que mide su
+    sala y no el servidor entero. Comandos (tramas que empiezan con "/"):
+        /unirse <sala> [token]   cambia de sala; las de evaluaciones piden el
+                                 token del recordatorio
+        /quien                   lista los presentes en la sala actual
+        /salir                   vuelve a "general"
+
+    broadcast nunca bloquea: codifica la trama una vez y deja los mismos
+    bytes en la cola de cada destinatario; una tarea por cliente escribe
+    de una vez todo lo acumulado (writelines). Si la cola de un cliente se
+    llena o un envío tarda más de escritura_timeout, el cliente se
+    desconecta y el resto no se entera.
+
+    Con avisos=False no se anuncia a la sala quién entra o sale: en una
+    sala de N clientes cada aviso es una trama para los otros N-1, así
+    que llenarla cuesta del orden de N²/2 tramas.
+    """
+
+    def __init__(self, cola_max=COLA_MAX, escritura_timeout=ESCRITURA_TIMEOUT, autorizador=None,
+                 avisos=True):
+        self.cola_max = cola_max
+        self.escritura_timeout = escritura_timeout
+        self.autorizador = autorizador
+        self.avisos = avisos
+        self.salas = {}     # sala -> set de Cliente
+
+    def broadcast(self, mensaje, remitente=None, sala=None):
+        """Envía a la sala indicada (por defecto, la del remitente)."""
+        sala = sala if sala is not None else remitente.sala
+        trama = codificar(mensaje)
+        for cliente in list(self.salas.get(sala, ())):
+            if cliente is remitente:
+                continue
+            try:
+                cliente.cola.put_nowait(trama)
+            except asyncio.QueueFull:
+                print(f"Cliente {cliente.addr} no consume sus mensajes: desconectado")
+                self.desconectar(cliente)
+
+    def responder(self, cliente, texto):
         try:
-            conn, addr = server_socket.accept()
-            clientes.append(conn)
+            cliente.cola.put_nowait(codificar(texto.encode("utf-8")))
+        except asyncio.QueueFull:
+            self.desconectar(cliente)
+
+    def entrar(self, cliente, sala):
+        self._dejar_sala(cliente)
+        cliente.sala = sala
+        self.salas.setdefault(sala, set()).add(cliente)
+        if self.avisos:
+            self.broadcast(f"[SISTEMA] se ha unido al chat \n{cliente.nombre}".encode("utf-8"), cliente)
+
+    def _dejar_sala(self, cliente):
+        miembros = self.salas.get(cliente.sala)
+        if miembros is None or cliente not in miembros:
+            return
+        miembros.discard(cliente)
+        if miembros and self.avisos:
+            self.broadcast(f"[SISTEMA] salió del chat \n{cliente.nombre}".encode("utf-8"), cliente)
+        elif not miembros:
+            del self.salas[cliente.sala]
 
-            print(f"Nuevo cliente: {addr}. Total: {len(clientes)}")
-            # iniciar hilo para recibir
+    def presentes(self, sala):
+        return sorted(c.nombre for c in self.salas.get(sala, ()))
 
-            hilo = threading.Thread(target=manejar_clientes, args=(conn, addr))
-            hilo.daemon = True
-            hilo.start()
-        except socket.timeout:
-            continue
+    def desconectar(self, cliente):
+        if cliente.sala is None:
+            return
+        self._dejar_sala(cliente)
+        cliente.sala = None
+        if cliente.tarea is not None and cliente.tarea is not asyncio.current_task():
+            cliente.tarea.cancel()
+        cliente.writer.close()
 
+    async def _comando(self, cliente, texto):
+        partes = texto.split()
+        if partes[0] == "/quien":
+            self.responder(cliente, f"[SISTEMA] en {cliente.sala}: {', '.join(self.presentes(cliente.sala))}")
+        elif partes[0] == "/salir":
+            self.entrar(cliente, SALA_GENERAL)
+        elif partes[0] == "/unirse" and len(partes) >= 2:
+            sala, token = partes[1], (partes[2] if len(partes) > 2 else None)
+            if sala != SALA_GENERAL:
+                email = self.autorizador.leer_token(sala, token) if self.autorizador else None
+                if email is None or not await self.autorizador.autorizado(sala, email, cliente.addr[0]):
+                    self.responder(cliente, f"[SISTEMA] sin acceso a la sala {sala}")
+                    return
+                cliente.email = email
+            self.entrar(cliente, sala)
+            self.responder(cliente, f"[SISTEMA] en {sala}: {', '.join(self.presentes(sala))}")
+        else:
+            self.responder(cliente, "[SISTEMA] comandos: /unirse <sala> [token], /quien, /salir")
 
-except KeyboardInterrupt:
-    print("\nCerrando servidor")
-    for cliente in clientes:
+    async def _recibido(self, cliente, mensaje):
+        if mensaje.startswith(b"/"):
+            await self._comando(cliente, mensaje.decode("utf-8", errors="replace"))
+        else:
+            self.broadcast(mensaje, cliente)
+
+    async def _revisar_salas(self):
+        """Recarga el mapa de salas y expulsa a quien ya no tenga acceso."""
+        while True:
+            await asyncio.sleep(self.autorizador.ttl)
+            try:
+                await self.autorizador.refrescar()
+            except Exception as exc:
+                print(f"No se pudo recargar el mapa de salas: {exc}")
+                continue
+            for sala in [s for s in self.salas if s != SALA_GENERAL]:
+                for cliente in list(self.salas.get(sala, ())):
+                    if not self.autorizador.permite(sala, cliente.email):
+                        self.responder(cliente, f"[SISTEMA] la sala {sala} se cerró")
+                        self.entrar(cliente, SALA_GENERAL)
+
+    async def _escribir(self, cliente):
         try:
-            cliente.close()
-        except:
+            while True:
+                lote = [await cliente.cola.get()]
+                while not cliente.cola.empty():
+                    lote.append(cliente.cola.get_nowait())
+                cliente.writer.writelines(lote)
+                await asyncio.wait_for(cliente.writer.drain(), self.escritura_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.desconectar(cliente)
+
+    async def manejar_cliente(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        cliente = Cliente(addr, writer, self.cola_max)
+        decodificador = DecodificadorTramas(tam_buffer=TAM_BUFFER_CLIENTE)
+        pendientes = []
+        try:
+            while not pendientes:
+                datos = await reader.read(TAM_LECTURA)
+                if not datos:
+                    writer.close()
+                    return
+                pendientes = decodificador.alimentar(datos)
+            cliente.nombre = pendientes.pop(0).decode("utf-8", errors="replace")
+        except (ConnectionError, TramaInvalida):
+            writer.close()
+            return
+
+        cliente.tarea = asyncio.create_task(self._escribir(cliente))
+        self.entrar(cliente, SALA_GENERAL)
+        try:
+            for mensaje in pendientes:
+                await self._recibido(cliente, mensaje)
+            while cliente.sala is not None:
+                datos = await reader.read(TAM_LECTURA)
+                if not datos:
+                    break
+                for mensaje in decodificador.alimentar(datos):
+                    await self._recibido(cliente, mensaje)
+                # read() no cede el loop si ya hay datos: dejar escribir a los demás
+                await asyncio.sleep(0)
+        except TramaInvalida as exc:
+            print(f"Cliente {addr} envió una trama inválida: {exc}")
+        except ConnectionError:
             pass
-    server_socket.close()
-    print("servidor cerrado")
+        finally:
+            self.desconectar(cliente)
+
+    async def servir(self, host, puerto, backlog=1024):
+        servidor = await asyncio.start_server(
+            self.manejar_cliente, host, puerto, backlog=backlog, reuse_address=True
+        )
+        print(f"Servidor asyncio esperando conexion en {host}:{puerto}")
+        if self.autorizador is not None:
+            await self.autorizador.refrescar()
+            asyncio.create_task(self._revisar_salas())
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def servir_con_asyncio(host, puerto, cola_max=COLA_MAX, escritura_timeout=ESCRITURA_TIMEOUT,
+                       database_url=None, ttl_salas=TTL_SALAS, secret_key=Config.SECRET_KEY,
+                       avisos=True):
+    autorizador = AutorizadorSalas(database_url, secret_key, ttl_salas) if database_url else None
+    chat = ServidorChat(cola_max, escritura_timeout, autorizador, avisos)
+    try:
+        asyncio.run(chat.servir(host, puerto))
+    except KeyboardInterrupt:
+        print("\nservidor cerrado")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de chat")
+    parser.add_argument("--modo", choices=("asyncio", "hilos"), default="asyncio")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--cola-max", type=int, default=COLA_MAX)
+    parser.add_argument("--escritura-timeout", type=float, default=ESCRITURA_TIMEOUT)
+    parser.add_argument(
+        "--database-url", default=os.environ.get("DATABASE_URL"),
+        help="base de reservas para las salas de evaluaciones (sin ella solo hay 'general')",
+    )
+    parser.add_argument("--ttl-salas", type=float, default=TTL_SALAS)
+    parser.add_argument(
+        "--sin-avisos", action="store_true",
+        help="no anunciar entradas y salidas (salas muy grandes, pruebas de carga)",
+    )
+    parser.add_argument(
+        "--secret-key", default=os.environ.get("SECRET_KEY", Config.SECRET_KEY),
+        help="clave con la que la app firma los tokens de sala (SECRET_KEY)",
+    )
+    args = parser.parse_args()
+
+    if args.modo == "hilos":
+        servir_con_hilos(args.host, args.puerto)
+    else:
+        servir_con_asyncio(
+            args.host, args.puerto, args.cola_max, args.escritura_timeout,
+            args.database_url, args.ttl_salas, args.secret_key, not args.sin_avisos,
+        )
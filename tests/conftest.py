@@ -0,0 +1,119 @@
+"""
+tests/conftest.py
+Fixtures compartidas: la app sobre una base SQLite en un archivo temporal.
+
+Las variables de entorno se fijan antes de importar la app porque
+config.settings las lee al importarse. Sin scheduler en el proceso de
+pruebas y con bcrypt al costo mínimo, en el hilo del test.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="evaluacalender-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRECTORIO, 'test.db')}"
+os.environ["SCHEDULER_MODE"] = "ninguno"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Challenge, User
+from app.services import availability_cache, slot_index, user_cache
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app("development")
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, MAIL_SUPPRESS_SEND=True)
+    app.extensions["mail"].suppress = True
+    return app
+
+
+@pytest.fixture(autouse=True)
+def base(app):
+    """Tablas vacías y cachés de proceso limpias en cada test."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        availability_cache.set_backend(availability_cache.MemoryBackend())
+        slot_index.indice.invalidar()
+        user_cache.invalidar()
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def supervisor():
+    user = User(nombre="Supervisor", email="supervisor@example.com", rol="SUPERVISOR")
+    user.set_password("12345678")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def admin():
+    user = User(nombre="Admin", email="admin@example.com", rol="ADMIN")
+    user.set_password("12345678")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def challenge():
+    challenge = Challenge(nombre="Challenge", activo=True)
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+@pytest.fixture
+def sesion(client):
+    """Inicia sesión como `user` sin pasar por el login (ni por bcrypt)."""
+    def iniciar(user):
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user.id)
+            sess["_fresh"] = True
+    return iniciar
+
+
+@pytest.fixture
+def presupuesto_sql(app):
+    """
+    Falla si el bloque ejecuta más de `maximo` sentencias SQL:
+
+        with presupuesto_sql(3):
+            client.get("/admin/evaluaciones")
+
+    Al entrar vacía el identity map de la sesión (que el test client
+    comparte con el test) para que el bloque pague sus propias cargas,
+    como un request nuevo.
+    """
+    @contextmanager
+    def presupuesto(maximo: int):
+        db.session.expunge_all()
+        sentencias = []
+
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(" ".join(statement.split()))
+
+        event.listen(db.engine, "after_cursor_execute", contar)
+        try:
+            yield sentencias
+        finally:
+            event.remove(db.engine, "after_cursor_execute", contar)
+        assert len(sentencias) <= maximo, (
+            f"{len(sentencias)} sentencias SQL (presupuesto {maximo}):\n"
+            + "\n".join(s[:200] for s in sentencias)
+        )
+
+    return presupuesto
@@ -0,0 +1,69 @@
+"""
+tests/test_disponibilidad_cache.py
+La caché mensual de disponibilidad y los ETag del calendario ante
+escrituras hechas por otro proceso (que no invalida la caché de este).
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import create_engine, event, text
+
+from app import db
+from app.services import guardar_disponibilidad_bulk, reservar_slot
+
+FECHA = date(2030, 1, 7)
+
+
+def _escribir_desde_otro_proceso(app, supervisor_id: int) -> None:
+    """Ocupa los slots y actualiza la marca con otra conexión, sin tocar la caché."""
+    engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE disponibilidades SET disponible = :no"), {"no": False})
+        conn.execute(
+            text(
+                "UPDATE versiones_disponibilidad SET actualizada_at = :marca "
+                "WHERE supervisor_id = :id"
+            ),
+            {"marca": datetime(2031, 1, 1, tzinfo=timezone.utc), "id": supervisor_id},
+        )
+    engine.dispose()
+    db.session.expire_all()
+
+
+def test_etag_y_cuerpo_cambian_juntos(app, client, supervisor):
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": "09:00"}])
+    url = f"/api/disponibilidad/{supervisor.id}?year=2030&month=1"
+
+    primera = client.get(url)
+    assert primera.get_json() == {"2030-01-07": ["09:00"]}
+
+    _escribir_desde_otro_proceso(app, supervisor.id)
+    segunda = client.get(url, headers={"If-None-Match": primera.headers["ETag"]})
+
+    assert segunda.status_code == 200
+    assert segunda.headers["ETag"] != primera.headers["ETag"]
+    assert segunda.get_json() == {}
+    assert client.get(url, headers={"If-None-Match": segunda.headers["ETag"]}).status_code == 304
+
+
+def test_reserva_no_escribe_la_fila_del_usuario(app, client, supervisor, challenge):
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": "09:00"}])
+    url = f"/api/disponibilidad/{supervisor.id}?year=2030&month=1"
+    etag = client.get(url).headers["ETag"]
+
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(" ".join(statement.split()).lower())
+
+    event.listen(db.engine, "after_cursor_execute", contar)
+    try:
+        reservar_slot(supervisor.id, FECHA, "09:00", challenge_id=challenge.id,
+                      nombre="Solicitante", email="solicitante@example.com", telefono="")
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "after_cursor_execute", contar)
+
+    assert not [s for s in sentencias if s.startswith("update users")]
+    respuesta = client.get(url, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {}
@@ -0,0 +1,102 @@
+"""
+tests/test_email_outbox.py
+Despacho del outbox contra un servidor SMTP local que corta sesiones.
+"""
+import socketserver
+import threading
+
+import pytest
+
+from app import db
+from app.models import EmailOutbox
+from app.services.email_outbox import encolar, procesar_outbox
+
+
+class ServidorSMTP(socketserver.ThreadingTCPServer):
+    """SMTP mínimo que corta la conexión tras `por_conexion` mensajes."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, por_conexion: int):
+        super().__init__(("127.0.0.1", 0), ManejadorSMTP)
+        self.por_conexion = por_conexion
+        self.recibidos = 0
+        self.lock = threading.Lock()
+
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+    def responder(self, linea: str) -> None:
+        self.wfile.write(linea.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.responder("220 prueba")
+        enviados = 0
+        while linea := self.rfile.readline():
+            comando = linea[:4].upper()
+            if comando == b"MAIL" and enviados >= self.server.por_conexion:
+                return      # sesión cortada a mitad del lote
+            if comando == b"DATA":
+                self.responder("354 fin con <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                enviados += 1
+                with self.server.lock:
+                    self.server.recibidos += 1
+            if comando == b"QUIT":
+                self.responder("221 adios")
+                return
+            self.responder("250 ok")
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    def iniciar(por_conexion: int = 1000, puerto: int = None):
+        servidor = ServidorSMTP(por_conexion)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        estado = app.extensions["mail"]
+        monkeypatch.setattr(estado, "server", "127.0.0.1")
+        monkeypatch.setattr(estado, "port", puerto or servidor.server_address[1])
+        monkeypatch.setattr(estado, "use_tls", False)
+        monkeypatch.setattr(estado, "use_ssl", False)
+        monkeypatch.setattr(estado, "username", None)
+        monkeypatch.setattr(estado, "suppress", False)
+        servidores.append(servidor)
+        return servidor
+
+    servidores = []
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _encolar(n: int) -> None:
+    for i in range(n):
+        encolar(f"destino{i}@example.com", f"Asunto {i}", "<p>Hola</p>")
+    db.session.commit()
+
+
+def test_reconecta_si_la_sesion_se_corta(app, monkeypatch, smtp):
+    monkeypatch.setitem(app.config, "EMAIL_OUTBOX_CONCURRENCIA", 2)
+    monkeypatch.setitem(app.config, "EMAIL_DOMINIO_POR_SEGUNDO", 0)
+    servidor = smtp(por_conexion=3)
+    _encolar(20)
+
+    assert procesar_outbox(app) == 20
+    assert servidor.recibidos == 20
+    assert {(m.estado, m.intentos) for m in EmailOutbox.query} == {("ENVIADO", 0)}
+
+
+def test_sin_conexion_no_consume_intentos(app, smtp):
+    servidor = smtp()
+    puerto_cerrado = servidor.server_address[1]
+    servidor.shutdown()
+    servidor.server_close()
+    smtp(puerto=puerto_cerrado)     # apunta el correo a un puerto sin servidor
+    _encolar(5)
+
+    assert procesar_outbox(app) == 0
+    filas = EmailOutbox.query.all()
+    assert {(m.estado, m.intentos) for m in filas} == {("PENDIENTE", 0)}
+    assert all(m.ultimo_error for m in filas)
@@ -0,0 +1,72 @@
+"""
+tests/test_estadisticas.py
+Snapshot de conteos por estado (ADMIN_STATS_SNAPSHOT): el recálculo del
+scheduler no pierde las transiciones que confirman mientras corre.
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app import db
+from app.models import EstadisticaEvaluacion, Evaluacion
+from app.services import stats_service
+
+
+@pytest.fixture
+def snapshot(app, monkeypatch, supervisor, challenge):
+    monkeypatch.setitem(app.config, "ADMIN_STATS_SNAPSHOT", True)
+    for i in range(3):
+        db.session.add(Evaluacion.create(
+            supervisor_id=supervisor.id, challenge_id=challenge.id, nombre=f"Solicitante {i}",
+            email=f"solicitante{i}@example.com", telefono="",
+            fecha=date.today() + timedelta(days=1), hora=f"{9 + i:02d}:00",
+        ))
+    db.session.commit()
+    stats_service.refrescar_snapshot()
+
+
+def _totales() -> dict:
+    db.session.expire_all()
+    return {e.estado: e.total for e in EstadisticaEvaluacion.query}
+
+
+def test_refresco_recalcula_desde_evaluaciones(snapshot):
+    db.session.execute(text("UPDATE estadisticas_evaluaciones SET total = 99"))
+    db.session.commit()
+    stats_service.refrescar_snapshot()
+    assert _totales()["PENDIENTE"] == 3
+    assert _totales()["CONFIRMADO"] == 0
+
+
+def test_transicion_durante_el_refresco(app, snapshot):
+    engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+    hecho = []
+
+    def transicion_concurrente(conn, cursor, statement, parameters, context, executemany):
+        # Otro worker confirma y ajusta el snapshot tras las lecturas del refresco,
+        # justo antes de su primera escritura
+        if hecho or statement.lstrip().upper().startswith("SELECT"):
+            return
+        hecho.append(statement)
+        with engine.begin() as otra:
+            otra.execute(text(
+                "UPDATE evaluaciones SET estado = 'CONFIRMADO' "
+                "WHERE id = (SELECT min(id) FROM evaluaciones)"
+            ))
+            otra.execute(text(
+                "UPDATE estadisticas_evaluaciones SET total = total + "
+                "CASE estado WHEN 'CONFIRMADO' THEN 1 ELSE -1 END "
+                "WHERE estado IN ('PENDIENTE', 'CONFIRMADO')"
+            ))
+
+    event.listen(db.engine, "before_cursor_execute", transicion_concurrente)
+    try:
+        stats_service.refrescar_snapshot()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", transicion_concurrente)
+        engine.dispose()
+
+    assert hecho
+    assert _totales()["PENDIENTE"] == 2
+    assert _totales()["CONFIRMADO"] == 1
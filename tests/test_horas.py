@@ -0,0 +1,78 @@
+"""
+tests/test_horas.py
+Validación de "HH:MM" en las rutas y duración de los slots nuevos.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import Disponibilidad, Evaluacion
+from app.services import crear_regla, guardar_disponibilidad_bulk, reservar_slot
+
+FECHA = date(2030, 1, 7)    # lunes
+
+
+@pytest.mark.parametrize("hora", ["abc", "25:00", "9", ""])
+def test_agendar_hora_invalida(client, supervisor, challenge, hora):
+    respuesta = client.post("/agendar", data={
+        "supervisor_id": supervisor.id,
+        "challenge_id": challenge.id,
+        "fecha": FECHA.isoformat(),
+        "hora": hora,
+        "nombre": "Solicitante",
+        "email": "solicitante@example.com",
+    })
+    assert respuesta.status_code == 302
+    assert Evaluacion.query.count() == 0
+
+
+def test_guardar_disponibilidad_omite_horas_invalidas(client, sesion, supervisor):
+    sesion(supervisor)
+    respuesta = client.post("/supervisor/disponibilidad/guardar", json={"slots": [
+        {"fecha": FECHA.isoformat(), "hora": "09:00"},
+        {"fecha": FECHA.isoformat(), "hora": "25:00"},
+        {"fecha": FECHA.isoformat(), "hora": "abc"},
+        {"fecha": FECHA.isoformat(), "hora": 9},
+        {"fecha": FECHA.isoformat(), "hora": "9:30"},
+    ]})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["guardados"] == 2
+    horas = sorted(h for (h,) in Disponibilidad.query.with_entities(Disponibilidad.hora))
+    assert horas == ["09:00", "09:30"]
+
+
+def test_slots_nuevos_usan_slot_duracion_min(app, monkeypatch, supervisor, challenge):
+    monkeypatch.setitem(app.config, "SLOT_DURACION_MIN", 30)
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": "09:00"}])
+    crear_regla(supervisor.id, [FECHA.weekday()], "10:00", "11:00", desde=FECHA)
+    for hora in ("09:00", "10:00"):
+        evaluacion = reservar_slot(
+            supervisor.id, FECHA, hora, challenge_id=challenge.id,
+            nombre="Solicitante", email="solicitante@example.com", telefono="",
+        )
+        assert evaluacion.duracion_min == 30
+        assert evaluacion.fin_at - evaluacion.inicio_at == timedelta(minutes=30)
+    assert {d for (d,) in Disponibilidad.query.with_entities(Disponibilidad.duracion_min)} == {30}
+
+
+@pytest.mark.parametrize("almacenamiento", ["filas", "bitmap"])
+def test_rango_con_hora_sin_cero_inicial(app, client, monkeypatch, supervisor, almacenamiento):
+    monkeypatch.setitem(app.config, "AVAILABILITY_STORAGE", almacenamiento)
+    guardar_disponibilidad_bulk(supervisor.id, [
+        {"fecha": FECHA, "hora": hora} for hora in ("08:00", "09:00", "13:00")
+    ])
+    crear_regla(supervisor.id, [FECHA.weekday()], "10:00", "13:00", desde=FECHA)
+
+    def horas(**ventana):
+        respuesta = client.get(
+            f"/api/disponibilidad/{supervisor.id}/rango",
+            query_string={"from": FECHA.isoformat(), "to": FECHA.isoformat(), **ventana},
+        )
+        assert respuesta.status_code == 200
+        return respuesta.get_json().get(FECHA.isoformat(), [])
+
+    esperado = ["09:00", "10:00", "11:00", "12:00", "13:00"]
+    assert horas(hora_desde="09:00") == esperado
+    assert horas(hora_desde="9:00") == esperado
+    assert horas(hora_desde="9:30", hora_hasta="12:00") == ["10:00", "11:00", "12:00"]
+    assert horas(hora_desde="8:00", hora_hasta="9:00") == ["08:00", "09:00"]
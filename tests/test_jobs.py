@@ -0,0 +1,34 @@
+"""
+tests/test_jobs.py
+Historial de jobs (job_runs) y panel /admin/jobs.
+"""
+from app import db
+from app.models import JobRun
+from app.services.email_outbox import encolar, procesar_outbox
+from app.services.job_metrics import instrumentar
+
+
+def test_outbox_sin_correos_no_deja_fila(app):
+    job = instrumentar("procesar_outbox", procesar_outbox, registrar_vacias=False)
+    job(app)
+    job(app)
+    assert JobRun.query.count() == 0
+
+    encolar("solicitante@example.com", "Asunto", "<p>Hola</p>")
+    db.session.commit()
+    job(app)
+    ejecucion = JobRun.query.one()
+    assert (ejecucion.job_id, ejecucion.filas_leidas, ejecucion.filas_afectadas) == ("procesar_outbox", 1, 1)
+
+
+def test_panel_muestra_intervalos_sin_scheduler_local(app, client, sesion, admin):
+    # El proceso de pruebas corre con SCHEDULER_MODE=ninguno: no hay jobs locales
+    db.session.add(JobRun(job_id="procesar_outbox", duracion_ms=12_000, filas_leidas=1))
+    db.session.commit()
+    sesion(admin)
+
+    html = client.get("/admin/jobs").get_data(as_text=True)
+
+    intervalo = app.config["EMAIL_OUTBOX_INTERVAL_SECONDS"]
+    assert f"{intervalo} s" in html
+    assert "p95 supera la mitad del intervalo" in html
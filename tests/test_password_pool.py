@@ -0,0 +1,65 @@
+"""
+tests/test_password_pool.py
+Pool de hilos de bcrypt: cupo, timeout como 503 y recuperación de un
+pool roto.
+"""
+import threading
+
+import pytest
+
+from app.services import password_service
+from app.services.password_service import PoolSaturado
+
+
+@pytest.fixture
+def pool(app, monkeypatch):
+    """Pool de un hilo y un cupo, con timeout corto; se descarta al terminar."""
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_WORKERS", 1)
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_MAX_PENDIENTES", 1)
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_TIMEOUT_SECONDS", 0.05)
+    yield
+    if password_service._pool is not None:
+        password_service._descartar_pool(password_service._pool)
+
+
+def test_timeout_es_saturacion(pool):
+    soltar = threading.Event()
+
+    with pytest.raises(PoolSaturado):
+        password_service._ejecutar(soltar.wait)
+    # La operación vencida sigue ocupando el único cupo hasta terminar
+    with pytest.raises(PoolSaturado):
+        password_service._ejecutar(soltar.wait)
+
+    soltar.set()
+    password_service._pool.submit(lambda: None).result()
+    assert password_service.verificar("secreta", password_service.hashear("secreta"))
+
+
+def test_pool_roto_se_recrea(pool):
+    password_service.hashear("secreta")
+    roto = password_service._pool
+    roto._broken = "hilo caído"     # lo que deja un initializer fallido
+
+    assert password_service.verificar("secreta", password_service.hashear("secreta"))
+    assert password_service._pool is not roto
+
+
+def test_login_responde_503_si_bcrypt_no_termina(app, client, supervisor, pool, monkeypatch):
+    soltar = threading.Event()
+    monkeypatch.setattr(password_service, "_verificar", lambda *args: soltar.wait())
+
+    respuesta = client.post("/auth/login", data={"email": supervisor.email, "password": "12345678"})
+    soltar.set()
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"]
+
+
+def test_hash_ficticio_precalculado(app, monkeypatch):
+    assert password_service.rondas_de(
+        password_service._hash_ficticio[app.config["BCRYPT_ROUNDS"]].decode("utf-8")
+    ) == app.config["BCRYPT_ROUNDS"]
+    llamadas = []
+    monkeypatch.setattr(password_service, "_hashear", lambda *args: llamadas.append(args))
+    password_service.verificar_ficticio("secreta")
+    assert llamadas == []
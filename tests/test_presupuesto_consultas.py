@@ -0,0 +1,70 @@
+"""
+tests/test_presupuesto_consultas.py
+Presupuesto de sentencias SQL de los listados de evaluaciones: el número
+de consultas no debe crecer con las filas (N+1 sobre supervisor/challenge).
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models import Challenge, Evaluacion, User
+
+SUPERVISORES = 4
+CHALLENGES = 3
+EVALUACIONES = 60
+
+
+@pytest.fixture
+def evaluaciones(supervisor):
+    """EVALUACIONES evaluaciones repartidas entre supervisores, challenges y estados."""
+    supervisores = [supervisor]
+    for i in range(1, SUPERVISORES):
+        otro = User(nombre=f"Supervisor {i}", email=f"supervisor{i}@example.com",
+                    rol="SUPERVISOR", password_hash="-")
+        supervisores.append(otro)
+    challenges = [Challenge(nombre=f"Challenge {i}", activo=True) for i in range(CHALLENGES)]
+    db.session.add_all(supervisores[1:] + challenges)
+    db.session.flush()
+
+    estados = ("PENDIENTE", "CONFIRMADO", "RECHAZADO", "CANCELADO_AUTO")
+    inicio = date.today() + timedelta(days=1)
+    for i in range(EVALUACIONES):
+        evaluacion = Evaluacion.create(
+            supervisor_id=supervisores[i % SUPERVISORES].id,
+            challenge_id=challenges[i % CHALLENGES].id,
+            nombre=f"Solicitante {i}",
+            email=f"solicitante{i}@example.com",
+            telefono="",
+            fecha=inicio + timedelta(days=i // 8),
+            hora=f"{9 + i % 8:02d}:00",
+        )
+        evaluacion.estado = estados[i % len(estados)]
+        db.session.add(evaluacion)
+    db.session.commit()
+
+
+@pytest.mark.parametrize("url, maximo", [
+    # usuario de la sesión + estadísticas + listado
+    ("/admin/", 3),
+    ("/admin/evaluaciones", 2),
+    ("/admin/evaluaciones?estado=PENDIENTE", 2),
+    ("/admin/api/evaluaciones?limit=200", 2),
+])
+def test_listados_admin(client, sesion, presupuesto_sql, admin, evaluaciones, url, maximo):
+    sesion(admin)
+    with presupuesto_sql(maximo):
+        respuesta = client.get(url)
+    assert respuesta.status_code == 200
+
+
+@pytest.mark.parametrize("url, maximo", [
+    # usuario de la sesión + pendientes + próximas
+    ("/supervisor/dashboard", 3),
+    ("/supervisor/historial", 2),
+])
+def test_listados_supervisor(client, sesion, presupuesto_sql, supervisor, evaluaciones, url, maximo):
+    sesion(supervisor)
+    with presupuesto_sql(maximo):
+        respuesta = client.get(url)
+    assert respuesta.status_code == 200
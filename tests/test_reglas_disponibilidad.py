@@ -0,0 +1,76 @@
+"""
+tests/test_reglas_disponibilidad.py
+Slots generados por reglas semanales que se reservan y luego se liberan:
+al liberarse vuelven a depender de la regla vigente y sus excepciones.
+"""
+from datetime import date
+
+import pytest
+
+from app import db
+from app.services import (
+    agregar_excepcion,
+    crear_regla,
+    eliminar_regla,
+    get_disponibilidad_mes,
+    guardar_disponibilidad_bulk,
+    liberar_slot,
+    liberar_slots,
+    reservar_slot,
+)
+
+FECHA = date(2030, 1, 7)    # lunes
+HORA = "09:00"
+
+
+@pytest.fixture(params=["filas", "bitmap"])
+def almacenamiento(request, app, monkeypatch):
+    monkeypatch.setitem(app.config, "AVAILABILITY_STORAGE", request.param)
+    return request.param
+
+
+def _reservar_y_liberar(supervisor, challenge, en_lote: bool):
+    evaluacion = reservar_slot(
+        supervisor.id, FECHA, HORA,
+        challenge_id=challenge.id, nombre="Solicitante",
+        email="solicitante@example.com", telefono="",
+    )
+    assert evaluacion is not None
+    db.session.commit()
+    evaluacion.rechazar()
+    if en_lote:
+        liberar_slots([(supervisor.id, FECHA, HORA)])
+    else:
+        liberar_slot(supervisor.id, FECHA, HORA)
+    db.session.commit()
+
+
+def _mes(supervisor):
+    return get_disponibilidad_mes(supervisor.id, FECHA.year, FECHA.month).get(FECHA.isoformat(), [])
+
+
+@pytest.mark.parametrize("en_lote", [False, True])
+def test_slot_de_regla_liberado_sigue_a_la_regla(almacenamiento, supervisor, challenge, en_lote):
+    regla = crear_regla(supervisor.id, [FECHA.weekday()], HORA, "10:00", desde=FECHA)
+    _reservar_y_liberar(supervisor, challenge, en_lote)
+    assert _mes(supervisor) == [HORA]
+
+    eliminar_regla(supervisor.id, regla.id)
+    agregar_excepcion(supervisor.id, FECHA)
+    assert _mes(supervisor) == []
+
+
+def test_excepcion_tras_liberar_slot_de_regla(almacenamiento, supervisor, challenge):
+    crear_regla(supervisor.id, [FECHA.weekday()], HORA, "10:00", desde=FECHA)
+    _reservar_y_liberar(supervisor, challenge, en_lote=False)
+    agregar_excepcion(supervisor.id, FECHA, HORA)
+    assert _mes(supervisor) == []
+
+
+def test_slot_publicado_se_conserva_al_liberarse(almacenamiento, supervisor, challenge):
+    regla = crear_regla(supervisor.id, [FECHA.weekday()], HORA, "10:00", desde=FECHA)
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": HORA}])
+    _reservar_y_liberar(supervisor, challenge, en_lote=False)
+
+    eliminar_regla(supervisor.id, regla.id)
+    assert _mes(supervisor) == [HORA]
@@ -0,0 +1,76 @@
+"""
+tests/test_reserva_concurrente.py
+reservar_slot bajo concurrencia: N hilos compiten por el mismo slot y
+exactamente uno obtiene la evaluación.
+"""
+import threading
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Disponibilidad, Evaluacion
+from app.services import crear_regla, guardar_disponibilidad_bulk, reservar_slot
+
+HILOS = 30
+FECHA = date(2030, 1, 7)    # lunes
+HORA = "09:00"
+
+
+def _competir(app, supervisor_id: int, challenge_id: int):
+    """Lanza HILOS reservas simultáneas del mismo slot; retorna (ganadores, errores)."""
+    barrera = threading.Barrier(HILOS)
+    ganadores, errores = [], []
+
+    def reservar(i):
+        with app.app_context():
+            barrera.wait()
+            try:
+                evaluacion = reservar_slot(
+                    supervisor_id, FECHA, HORA,
+                    challenge_id=challenge_id,
+                    nombre=f"Solicitante {i}",
+                    email=f"solicitante{i}@example.com",
+                    telefono="",
+                )
+                if evaluacion is None:
+                    db.session.rollback()
+                else:
+                    db.session.commit()
+                    ganadores.append(i)
+            except Exception as exc:
+                db.session.rollback()
+                errores.append(exc)
+            finally:
+                db.session.remove()
+
+    hilos = [threading.Thread(target=reservar, args=(i,)) for i in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return ganadores, errores
+
+
+@pytest.mark.parametrize("origen", ["fila", "regla"])
+def test_un_solo_ganador_por_slot(app, supervisor, challenge, origen):
+    if origen == "fila":
+        guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": HORA}])
+    else:
+        crear_regla(supervisor.id, [FECHA.weekday()], HORA, "10:00", desde=FECHA)
+    supervisor_id, challenge_id = supervisor.id, challenge.id
+    db.session.remove()
+
+    ganadores, errores = _competir(app, supervisor_id, challenge_id)
+
+    assert errores == []
+    assert len(ganadores) == 1
+    activas = Evaluacion.query.filter(
+        Evaluacion.supervisor_id == supervisor_id,
+        Evaluacion.fecha == FECHA,
+        Evaluacion.hora == HORA,
+        Evaluacion.estado.in_(["PENDIENTE", "CONFIRMADO"]),
+    ).count()
+    assert activas == 1
+    slot = Disponibilidad.query.filter_by(supervisor_id=supervisor_id, fecha=FECHA, hora=HORA).one()
+    assert slot.disponible is False
@@ -0,0 +1,103 @@
+"""
+tests/test_salas_chat.py
+Autorización de las salas de evaluaciones del servidor de chat:
+token firmado por la app y consultas acotadas para salas desconocidas.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from itsdangerous import TimestampSigner
+
+from app import db
+from app.models import Evaluacion
+from app.services.chat_tokens import emitir_token_sala
+from servidor import MAX_SALAS_AUSENTES, AutorizadorSalas
+
+SOLICITANTE = "solicitante@example.com"
+
+
+@pytest.fixture
+def evaluacion(supervisor, challenge):
+    inicio = datetime.now(timezone.utc).replace(microsecond=0)
+    ev = Evaluacion(
+        supervisor_id=supervisor.id, challenge_id=challenge.id,
+        nombre_solicitante="Solicitante", email_solicitante=SOLICITANTE,
+        fecha=inicio.date(), hora=inicio.strftime("%H:00"),
+        inicio_at=inicio, fin_at=inicio + timedelta(hours=1), estado="CONFIRMADO",
+    )
+    db.session.add(ev)
+    db.session.commit()
+    return ev
+
+
+@pytest.fixture
+def autorizador(app):
+    autorizador = AutorizadorSalas(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config["SECRET_KEY"], consultas_por_minuto=3
+    )
+    yield autorizador
+    autorizador.engine.dispose()
+
+
+def _entrar(autorizador, sala, token, origen="127.0.0.1"):
+    email = autorizador.leer_token(sala, token)
+    return email is not None and asyncio.run(autorizador.autorizado(sala, email, origen))
+
+
+def test_token_de_la_app_abre_la_sala(app, autorizador, evaluacion, supervisor):
+    sala = str(evaluacion.id)
+    assert _entrar(autorizador, sala, emitir_token_sala(evaluacion.id, SOLICITANTE))
+    assert _entrar(autorizador, sala, emitir_token_sala(evaluacion.id, supervisor.email))
+
+
+def test_token_invalido_o_ajeno(app, autorizador, evaluacion):
+    sala = str(evaluacion.id)
+    assert not _entrar(autorizador, sala, None)
+    assert not _entrar(autorizador, sala, SOLICITANTE)     # el email solo ya no basta
+    assert not _entrar(autorizador, sala, emitir_token_sala(evaluacion.id, SOLICITANTE, "otra-clave"))
+    assert not _entrar(autorizador, sala, emitir_token_sala(evaluacion.id, "otro@example.com"))
+    assert not _entrar(autorizador, sala, emitir_token_sala(evaluacion.id + 1, SOLICITANTE))
+
+
+def test_token_vale_lo_que_la_ventana_de_la_sala(app, autorizador, evaluacion, monkeypatch):
+    # Emitido hace un día: la evaluación sigue en curso y la sala abierta
+    ahora = time.time()
+    monkeypatch.setattr(TimestampSigner, "get_timestamp", lambda self: int(ahora) - 86400)
+    token = emitir_token_sala(evaluacion.id, SOLICITANTE)
+    monkeypatch.undo()
+    sala = str(evaluacion.id)
+    assert _entrar(autorizador, sala, token)
+
+    # Pasado fin_at + margen el mismo token ya no abre la sala
+    evaluacion.inicio_at -= timedelta(days=1)
+    evaluacion.fin_at -= timedelta(days=1)
+    db.session.commit()
+    asyncio.run(autorizador.refrescar())
+    assert autorizador.leer_token(sala, token) == SOLICITANTE
+    assert not _entrar(autorizador, sala, token)
+
+
+def test_salas_desconocidas_acotadas(app, autorizador, monkeypatch):
+    asyncio.run(autorizador.refrescar())
+    cargar, consultas = autorizador._cargar, []
+
+    def contar(evaluacion_id=None):
+        consultas.append(evaluacion_id)
+        return cargar(evaluacion_id)
+
+    monkeypatch.setattr(autorizador, "_cargar", contar)
+    for sala in range(1000, 1010):
+        assert not asyncio.run(autorizador.autorizado(str(sala), SOLICITANTE, "10.0.0.1"))
+    assert len(consultas) == 3      # consultas_por_minuto para esa IP
+
+    # Otra IP tiene su propio cupo, y las ausentes no se vuelven a consultar
+    assert not asyncio.run(autorizador.autorizado("1000", SOLICITANTE, "10.0.0.2"))
+    assert len(consultas) == 3
+    assert not autorizador._salas
+
+    autorizador.consultas_por_minuto = 10 * MAX_SALAS_AUSENTES
+    for sala in range(2000, 2000 + 2 * MAX_SALAS_AUSENTES):
+        asyncio.run(autorizador.autorizado(str(sala), SOLICITANTE, "10.0.0.3"))
+    assert len(autorizador._ausentes) == MAX_SALAS_AUSENTES
@@ -0,0 +1,54 @@
+"""
+tests/test_scheduler_lease.py
+Lease del líder del scheduler: toma tras el vencimiento, renovación por
+el titular y la carrera de dos procesos insertando la fila a la vez.
+"""
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import SchedulerLease
+from app.services import scheduler_leader
+from app.services.scheduler_leader import IDENTIDAD, LEASE, renovar_o_tomar
+
+
+def _lease_ajeno(expira_en: timedelta) -> None:
+    ahora = datetime.now(timezone.utc)
+    db.session.add(SchedulerLease(
+        nombre=LEASE, titular="otro-proceso", expira_at=ahora + expira_en, renovado_at=ahora,
+    ))
+    db.session.commit()
+
+
+def _lease() -> SchedulerLease:
+    db.session.expire_all()
+    return db.session.get(SchedulerLease, LEASE)
+
+
+def test_toma_el_lease_vencido(app):
+    _lease_ajeno(timedelta(seconds=-1))
+    assert renovar_o_tomar(app)
+    assert _lease().titular == IDENTIDAD
+
+
+def test_no_toma_el_lease_vigente(app):
+    _lease_ajeno(timedelta(seconds=30))
+    assert not renovar_o_tomar(app)
+    assert _lease().titular == "otro-proceso"
+
+
+def test_el_titular_renueva(app):
+    assert renovar_o_tomar(app)
+    primera = _lease().expira_at
+    assert renovar_o_tomar(app)
+    lease = _lease()
+    assert lease.titular == IDENTIDAD
+    assert lease.expira_at >= primera
+
+
+def test_insercion_concurrente(app, monkeypatch):
+    # Otro proceso insertó la fila entre el UPDATE y la lectura de este
+    _lease_ajeno(timedelta(seconds=30))
+    monkeypatch.setattr(scheduler_leader.db.session, "get", lambda *args, **kwargs: None)
+    assert not renovar_o_tomar(app)
+    monkeypatch.undo()
+    assert _lease().titular == "otro-proceso"
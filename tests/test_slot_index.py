@@ -0,0 +1,39 @@
+"""
+tests/test_slot_index.py
+Índice de primeros slots libres: reconstrucción fuera del lock.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.services.slot_index import IndiceSlotsLibres
+
+
+def test_busqueda_no_espera_reconstruccion_en_curso():
+    manana = datetime.now(timezone.utc).date() + timedelta(days=1)
+    indice = IndiceSlotsLibres()
+    liberar, en_consulta = threading.Event(), threading.Event()
+    consultas = []
+
+    def libres(desde, hasta, dias=None):
+        consultas.append(desde)
+        if len(consultas) > 1:
+            en_consulta.set()
+            liberar.wait(5)
+        return [(1, manana, "09:00")]
+
+    indice._libres = libres
+    assert indice.buscar(5) == [(manana, "09:00", 1)]
+
+    indice.invalidar()
+    lento = threading.Thread(target=indice.buscar, args=(5,))
+    lento.start()
+    assert en_consulta.wait(5)
+    # Mientras el otro hilo consulta, se sirve la versión anterior sin repetir la consulta
+    inicio = time.monotonic()
+    assert indice.buscar(5) == [(manana, "09:00", 1)]
+    assert time.monotonic() - inicio < 1
+    assert len(consultas) == 2
+    liberar.set()
+    lento.join(5)
+    assert indice._construido_en is not None
@@ -0,0 +1,96 @@
+"""
+tests/test_temporizadores.py
+Temporizadores por evaluación (vencimiento y recordatorio) en el job
+store compartido: se programan tras el commit, se descartan con el
+rollback y rehidratar completa los que falten.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import Evaluacion
+from app.services import evaluation_timers, guardar_disponibilidad_bulk, reservar_slot
+
+FECHA = date.today() + timedelta(days=7)
+
+
+@pytest.fixture(autouse=True)
+def temporizadores(app):
+    """El scheduler de temporizadores (en pausa) sin jobs de otros tests."""
+    assert evaluation_timers.temporizadores.running
+    evaluation_timers.temporizadores.remove_all_jobs()
+    yield evaluation_timers.temporizadores
+    evaluation_timers.temporizadores.remove_all_jobs()
+
+
+def _jobs(temporizadores) -> dict:
+    return {job.id: job.next_run_time for job in temporizadores.get_jobs()}
+
+
+def _reservar(supervisor, challenge) -> Evaluacion:
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": "09:00"}])
+    evaluacion = reservar_slot(supervisor.id, FECHA, "09:00", challenge_id=challenge.id,
+                               nombre="Solicitante", email="solicitante@example.com",
+                               telefono="")
+    db.session.commit()
+    return evaluacion
+
+
+def test_reserva_programa_el_vencimiento(temporizadores, supervisor, challenge):
+    evaluacion = _reservar(supervisor, challenge)
+    expira = evaluacion.expires_at.replace(tzinfo=timezone.utc)
+    assert _jobs(temporizadores) == {f"expira:{evaluacion.id}": expira}
+
+
+def test_confirmar_cambia_vencimiento_por_recordatorio(app, client, sesion, temporizadores,
+                                                       supervisor, challenge):
+    evaluacion = _reservar(supervisor, challenge)
+    sesion(supervisor)
+    client.post(f"/supervisor/evaluacion/{evaluacion.id}/confirmar")
+
+    minutos = app.config["REMINDER_MINUTES_BEFORE"]
+    inicio = db.session.get(Evaluacion, evaluacion.id).inicio_at.replace(tzinfo=timezone.utc)
+    assert _jobs(temporizadores) == {
+        f"recuerda:{evaluacion.id}": inicio - timedelta(minutes=minutos),
+    }
+
+
+def test_rechazar_cancela_el_vencimiento(client, sesion, temporizadores, supervisor, challenge):
+    evaluacion = _reservar(supervisor, challenge)
+    sesion(supervisor)
+    client.post(f"/supervisor/evaluacion/{evaluacion.id}/rechazar")
+    assert _jobs(temporizadores) == {}
+
+
+def test_rollback_descarta_las_acciones(temporizadores, supervisor, challenge):
+    guardar_disponibilidad_bulk(supervisor.id, [{"fecha": FECHA, "hora": "09:00"}])
+    db.session.commit()
+    reservar_slot(supervisor.id, FECHA, "09:00", challenge_id=challenge.id,
+                  nombre="Solicitante", email="solicitante@example.com", telefono="")
+    db.session.rollback()
+    db.session.commit()
+    assert _jobs(temporizadores) == {}
+    assert "temporizadores_pendientes" not in db.session.info
+
+
+def test_rehidratar_agrega_solo_los_que_faltan(app, temporizadores, supervisor, challenge):
+    pendiente = _reservar(supervisor, challenge)
+    temporizadores.remove_all_jobs()
+
+    confirmada = Evaluacion.create(
+        supervisor_id=supervisor.id, challenge_id=challenge.id, nombre="Otra",
+        email="otra@example.com", telefono="", fecha=FECHA, hora="10:00",
+    )
+    confirmada.estado = "CONFIRMADO"
+    vencida = Evaluacion.create(
+        supervisor_id=supervisor.id, challenge_id=challenge.id, nombre="Vencida",
+        email="vencida@example.com", telefono="", fecha=FECHA, hora="11:00",
+    )
+    vencida.expires_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.session.add_all([confirmada, vencida])
+    db.session.commit()
+
+    assert evaluation_timers.rehidratar(app) == 2
+    assert set(_jobs(temporizadores)) == {f"expira:{pendiente.id}", f"recuerda:{confirmada.id}"}
+    assert evaluation_timers.rehidratar(app) == 0
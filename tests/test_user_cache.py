@@ -0,0 +1,71 @@
+"""
+tests/test_user_cache.py
+Usuario de la sesión cacheado (user_cache): desactivación, invalidación
+desde el panel de admin, snapshot en la cookie y consultas ahorradas.
+
+Cada request va en su propio app context: la fixture `base` deja uno
+abierto y Flask-Login guarda el usuario cargado en `g`, que de otro
+modo pasaría de un request al siguiente.
+"""
+from app import db
+from app.models import User
+from app.services import user_cache
+
+DASHBOARD = "/supervisor/dashboard"
+
+
+def _pedir(app, cliente, metodo, url):
+    with app.app_context():
+        return cliente.open(url, method=metodo).status_code
+
+
+def test_usuario_desactivado_no_carga(app, supervisor):
+    supervisor.activo = False
+    db.session.commit()
+    with app.test_request_context():
+        assert user_cache.cargar_usuario(supervisor.id) is None
+
+
+def test_admin_invalida_el_snapshot(app, client, sesion, supervisor, admin):
+    cliente_supervisor = app.test_client()
+    with cliente_supervisor.session_transaction() as sess:
+        sess["_user_id"] = str(supervisor.id)
+    assert _pedir(app, cliente_supervisor, "GET", DASHBOARD) == 200
+
+    sesion(admin)
+    _pedir(app, client, "POST", f"/admin/supervisores/{supervisor.id}/eliminar")
+    assert _pedir(app, cliente_supervisor, "GET", DASHBOARD) == 302
+
+    _pedir(app, client, "POST", f"/admin/supervisores/{supervisor.id}/restaurar")
+    assert _pedir(app, cliente_supervisor, "GET", DASHBOARD) == 200
+
+
+def test_snapshot_en_sesion_se_relee_al_vencer(app, client, sesion, supervisor, monkeypatch):
+    monkeypatch.setitem(app.config, "USER_SESSION_SNAPSHOT", True)
+    sesion(supervisor)
+    _pedir(app, client, "GET", DASHBOARD)
+
+    # Renombrado por otro worker: este proceso no se enteró
+    db.session.execute(
+        User.__table__.update().where(User.id == supervisor.id).values(nombre="Renombrado")
+    )
+    db.session.commit()
+    user_cache.invalidar()
+
+    _pedir(app, client, "GET", DASHBOARD)
+    with client.session_transaction() as sess:
+        assert sess[user_cache.CLAVE_SESION][1] == "Supervisor"
+        *datos, leido_en = sess[user_cache.CLAVE_SESION]
+        sess[user_cache.CLAVE_SESION] = [*datos, leido_en - app.config["USER_CACHE_TTL"] - 1]
+
+    _pedir(app, client, "GET", DASHBOARD)
+    with client.session_transaction() as sess:
+        assert sess[user_cache.CLAVE_SESION][1] == "Renombrado"
+
+
+def test_dashboard_con_snapshot_cacheado(app, client, sesion, presupuesto_sql, supervisor):
+    # Sin el SELECT del usuario: pendientes + próximas
+    sesion(supervisor)
+    _pedir(app, client, "GET", DASHBOARD)
+    with presupuesto_sql(2):
+        assert _pedir(app, client, "GET", DASHBOARD) == 200